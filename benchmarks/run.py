@@ -0,0 +1,278 @@
+"""
+Pod Cleaner性能测试
+
+为每个模拟集群启动一个独立的API服务器替身进程（tests.fake_apiserver），
+生成对应的kubeconfig，然后在当前进程中依次测量：
+
+- cli_import: 导入pod_cleaner.cli的耗时（独立子进程）
+- startup: 创建集群管理器并探测所有集群（不使用元数据缓存）
+- list: list_problem_pods，重复多次取中位数
+- delete: 删除list列出的问题Pod（会修改模拟集群，只执行一次）
+- 峰值RSS
+
+结果保存为JSON，可以与之前保存的基线比较：
+    python -m benchmarks.run --clusters 3 --pods 100000 --output results.json
+    python -m benchmarks.run --clusters 3 --pods 100000 --baseline results.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from tests.fake_apiserver import write_kubeconfig
+
+# 比较基线时越小越好的指标
+LOWER_IS_BETTER = (
+    'cli_import_seconds',
+    'startup_seconds',
+    'list_seconds',
+    'delete_seconds',
+    'peak_rss_mb',
+)
+
+# 比较基线时越大越好的指标
+HIGHER_IS_BETTER = (
+    'list_pods_per_second',
+    'deletes_per_second',
+)
+
+def peak_rss_mb() -> float:
+    """
+    当前进程的峰值RSS（MB），Linux上ru_maxrss的单位为KB，macOS上为字节
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+@contextmanager
+def fake_clusters(args: argparse.Namespace) -> Iterator[List[Tuple[str, int]]]:
+    """
+    为每个模拟集群启动一个API服务器替身进程
+
+    Yields:
+        List[Tuple[str, int]]: 集群名称和端口
+    """
+    processes = []
+    clusters = []
+    try:
+        for i in range(args.clusters):
+            command = [
+                sys.executable, '-m', 'tests.fake_apiserver',
+                '--pods', str(args.pods),
+                '--namespaces', str(args.namespaces),
+                '--bad-ratio', str(args.bad_ratio),
+                '--latency', str(args.latency),
+                '--throttle-ratio', str(args.throttle_ratio),
+                '--seed', str(i + 1),
+            ]
+            processes.append(subprocess.Popen(
+                command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            ))
+        for i, process in enumerate(processes):
+            line = process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"模拟集群 {i} 启动失败")
+            clusters.append((f"bench-{i:03d}", json.loads(line)['port']))
+        yield clusters
+    finally:
+        for process in processes:
+            if process.stdin:
+                process.stdin.close()
+        for process in processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+def measure_cli_import() -> float:
+    """
+    在新的解释器中测量导入CLI的耗时
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import pod_cleaner.cli'], check=True)
+    return time.perf_counter() - start
+
+def create_manager(args: argparse.Namespace, kubeconfig_dir: str):
+    """
+    创建待测的集群管理器，不使用集群元数据缓存和运行历史
+    """
+    kwargs: Dict[str, Any] = {
+        'kubeconfig_dir': kubeconfig_dir,
+        'page_size': args.page_size,
+        'fast_decode': args.fast_decode,
+        'delete_qps': args.delete_qps,
+        'cache_ttl': 0,
+        'rules_file': args.rules,
+    }
+    if args.max_workers:
+        kwargs['max_workers'] = args.max_workers
+    if args.engine == 'async':
+        from pod_cleaner.async_cluster_manager import AsyncClusterManager
+        return AsyncClusterManager(**kwargs)
+    from pod_cleaner.cluster_manager import ClusterManager
+    return ClusterManager(shard_namespaces=args.shard_namespaces, **kwargs)
+
+def quiet_logging() -> None:
+    """
+    只保留警告以上的日志，避免逐个Pod的日志影响测量
+    """
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith('pod_cleaner'):
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+def stage_totals(summary: Dict[str, Any]) -> Dict[str, float]:
+    """
+    汇总所有集群各阶段的总耗时（毫秒）
+    """
+    totals: Dict[str, float] = {}
+    for cluster in summary['clusters'].values():
+        for stage, timing in cluster['timings'].items():
+            totals[stage] = round(totals.get(stage, 0) + timing['total_ms'], 3)
+    return totals
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    运行所有测试
+
+    Returns:
+        Dict[str, Any]: 测试参数、环境信息和结果
+    """
+    results: Dict[str, Any] = {}
+    if not args.skip_import:
+        results['cli_import_seconds'] = round(measure_cli_import(), 4)
+
+    with fake_clusters(args) as clusters, tempfile.TemporaryDirectory(prefix='pod-cleaner-bench-') as kubeconfig_dir:
+        for name, port in clusters:
+            write_kubeconfig(os.path.join(kubeconfig_dir, f"{name}.yaml"), name, port)
+
+        start = time.perf_counter()
+        manager = create_manager(args, kubeconfig_dir)
+        try:
+            quiet_logging()
+            cluster_info = manager.get_cluster_info()
+            results['startup_seconds'] = round(time.perf_counter() - start, 4)
+            if len(cluster_info) != len(clusters):
+                raise RuntimeError(f"只有 {len(cluster_info)}/{len(clusters)} 个模拟集群可用")
+
+            durations = []
+            problem_pods: Dict[str, List[Dict]] = {}
+            for _ in range(max(1, args.repeat)):
+                start = time.perf_counter()
+                problem_pods = manager.list_problem_pods()
+                durations.append(time.perf_counter() - start)
+            results['list_seconds'] = round(statistics.median(durations), 4)
+            results['list_seconds_min'] = round(min(durations), 4)
+            results['list_pods_per_second'] = round(args.pods * args.clusters / results['list_seconds'])
+            results['problem_pods'] = sum(len(pods) for pods in problem_pods.values())
+            results['peak_rss_mb_after_list'] = peak_rss_mb()
+
+            if not args.skip_delete:
+                start = time.perf_counter()
+                stats = manager.delete_problem_pods(candidates=problem_pods)
+                results['delete_seconds'] = round(time.perf_counter() - start, 4)
+                results['deleted_pods'] = sum(result['success'] for result in stats.values())
+                results['delete_failed'] = sum(result['failed'] for result in stats.values())
+                results['deletes_per_second'] = round(results['deleted_pods'] / results['delete_seconds']) \
+                    if results['delete_seconds'] else 0
+
+            results['peak_rss_mb'] = peak_rss_mb()
+            results['stage_total_ms'] = stage_totals(manager.metrics.summary())
+        finally:
+            manager.close()
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'parameters': {
+            key: getattr(args, key) for key in (
+                'clusters', 'pods', 'namespaces', 'bad_ratio', 'latency', 'throttle_ratio', 'engine',
+                'rules', 'page_size', 'fast_decode', 'max_workers', 'shard_namespaces', 'delete_qps', 'repeat',
+            )
+        },
+        'results': results,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    打印与基线的对比，并返回超过阈值的回退指标
+
+    Args:
+        current: 本次结果
+        baseline: 基线结果
+        threshold: 允许的相对变化，如0.1表示10%
+
+    Returns:
+        List[str]: 回退的指标名称
+    """
+    if current['parameters'] != baseline['parameters']:
+        print("警告: 测试参数与基线不同，对比结果仅供参考")
+    regressions = []
+    print(f"{'指标':<24}{'基线':>14}{'本次':>14}{'变化':>10}")
+    for key in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+        before = baseline['results'].get(key)
+        after = current['results'].get(key)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        worse = change > threshold if key in LOWER_IS_BETTER else change < -threshold
+        if worse:
+            regressions.append(key)
+        print(f"{key:<24}{before:>14}{after:>14}{change:>+10.1%}{'  回退' if worse else ''}")
+    return regressions
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pod Cleaner性能测试")
+    parser.add_argument('--clusters', type=int, default=3, help="模拟集群数量")
+    parser.add_argument('--pods', type=int, default=10000, help="每个集群的Pod数量")
+    parser.add_argument('--namespaces', type=int, default=20, help="每个集群的命名空间数量")
+    parser.add_argument('--bad-ratio', type=float, default=0.05, help="问题Pod的比例")
+    parser.add_argument('--latency', type=float, default=0.0, help="API服务器替身每个请求注入的延迟（秒）")
+    parser.add_argument('--throttle-ratio', type=float, default=0.0, help="API服务器替身按该比例返回429")
+    parser.add_argument('--engine', choices=('sync', 'async'), default='sync', help="集群管理引擎")
+    parser.add_argument('--rules', default=None, help="清理规则的YAML文件，默认按Pod状态Error/Unknown匹配")
+    parser.add_argument('--page-size', type=int, default=500, help="分页大小")
+    parser.add_argument('--fast-decode', action='store_true', help="直接解析原始JSON响应")
+    parser.add_argument('--max-workers', type=int, default=None, help="最大线程数或每个集群的最大并发请求数")
+    parser.add_argument('--shard-namespaces', action='store_true', help="按命名空间分片扫描（仅sync引擎）")
+    parser.add_argument('--delete-qps', type=float, default=0, help="删除限流，默认不限流")
+    parser.add_argument('--repeat', type=int, default=3, help="list测试的重复次数")
+    parser.add_argument('--skip-delete', action='store_true', help="跳过删除测试")
+    parser.add_argument('--skip-import', action='store_true', help="跳过CLI导入耗时测试")
+    parser.add_argument('--output', help="将结果写入该JSON文件，可作为之后的基线")
+    parser.add_argument('--baseline', help="与该JSON基线比较")
+    parser.add_argument('--threshold', type=float, default=0.1, help="判定为回退的相对变化，默认10%%")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.shard_namespaces and args.engine == 'async':
+        print("--shard-namespaces 只支持sync引擎", file=sys.stderr)
+        return 2
+
+    report = run(args)
+    print(json.dumps(report['results'], ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入: {args.output}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
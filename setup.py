@@ -12,6 +12,14 @@ setup(
         "rich>=13.7.0",
         "typer>=0.9.0",
     ],
+    extras_require={
+        # 更快的JSON解析，用于--fast-decode
+        "fast": ["orjson>=3.8.0"],
+        # asyncio引擎，用于--engine async
+        "async": ["kubernetes_asyncio>=29.0.0"],
+        # HTTP/2，用于--http2
+        "http2": ["urllib3>=2.3.0", "h2>=4.1.0"],
+    },
     entry_points={
         "console_scripts": [
             "pod-cleaner=pod_cleaner.cli:main",
@@ -0,0 +1,571 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .cluster_cache import ClusterInfoCache
+from .config import (
+    get_kubeconfig_dir,
+    CLUSTER_CONNECT_TIMEOUT,
+    LIST_PAGE_SIZE,
+    FAST_DECODE,
+    ASYNC_CLUSTER_CONCURRENCY,
+    BATCH_SIZE,
+    MAX_WORKERS,
+    REQUEST_TIMEOUT,
+    DELETE_QPS,
+    DELETE_BURST,
+    DELETE_MAX_RETRIES,
+    BULK_DELETE_MIN_PODS,
+    CLUSTER_CACHE_TTL,
+    RULES_FILE,
+    HTTP_POOL_SIZE,
+)
+from .deleter import RETRYABLE_STATUS, backoff_delay, latency_stats, log_delete_summary, plan_collection_deletes
+from .kubeconfig import resolve_kubeconfigs
+from .logger import setup_logger
+from .metrics import MetricsRegistry
+from .pod_record import PodListPage, PodRecord, decode_pod_list
+from .rate_limit import TokenBucket
+from .rules import PodQuery, Rule, RuleSet, match_rules, problem_pod_dict
+from .snapshot_store import SnapshotWriter
+
+try:
+    from kubernetes_asyncio import client as async_client, config as async_config
+    from kubernetes_asyncio.client.rest import ApiException
+except ImportError:  # kubernetes_asyncio是可选依赖，只有async引擎需要
+    async_client = None
+    async_config = None
+    ApiException = None
+
+logger = setup_logger(__name__)
+
+async def _gather(*aws: Awaitable) -> List[Any]:
+    """在事件循环内部等待所有任务完成，异常作为结果返回"""
+    return await asyncio.gather(*aws, return_exceptions=True)
+
+class AsyncClusterManager:
+    """
+    基于asyncio的集群管理器
+
+    与ClusterManager提供相同的list_problem_pods/delete_problem_pods/get_cluster_info接口。
+    所有集群共享一个事件循环，每个集群使用独立的连接池，
+    并通过信号量限制单个集群的并发请求数。
+    """
+
+    def __init__(
+        self,
+        kubeconfig_dir: Optional[str] = None,
+        connect_timeout: float = CLUSTER_CONNECT_TIMEOUT,
+        page_size: int = LIST_PAGE_SIZE,
+        fast_decode: bool = FAST_DECODE,
+        max_workers: int = ASYNC_CLUSTER_CONCURRENCY,
+        batch_size: int = BATCH_SIZE,
+        delete_workers: int = MAX_WORKERS,
+        request_timeout: float = REQUEST_TIMEOUT,
+        delete_qps: float = DELETE_QPS,
+        bulk_delete_min_pods: int = BULK_DELETE_MIN_PODS,
+        cache_ttl: float = CLUSTER_CACHE_TTL,
+        refresh: bool = False,
+        cluster_names: Optional[Iterable[str]] = None,
+        rules_file: Optional[str] = RULES_FILE,
+        metrics: Optional[MetricsRegistry] = None,
+        pool_size: int = HTTP_POOL_SIZE,
+        snapshot: Optional[SnapshotWriter] = None,
+    ):
+        """
+        初始化集群管理器
+
+        Args:
+            kubeconfig_dir: kubeconfig目录路径，默认读取KUBECONFIG_DIR
+            connect_timeout: 单个集群的连接超时时间（秒）
+            page_size: 分页列出Pod时每页的数量，0表示不分页
+            fast_decode: 是否直接解析原始JSON响应，跳过kubernetes模型反序列化
+            max_workers: 每个集群的最大并发请求数
+            batch_size: 删除Pod时每个批次的数量
+            delete_workers: 每个集群同时执行的删除批次数，与sync引擎的删除线程数相同
+            request_timeout: 单个API请求的超时时间（秒）
+            delete_qps: 每个集群每秒最多发出的删除请求数，0表示不限流
+            bulk_delete_min_pods: 使用delete_collection批量删除的最小Pod数量，0表示禁用
+            cache_ttl: 集群元数据缓存的有效期（秒），0表示禁用缓存
+            refresh: 是否忽略缓存，重新探测所有集群
+            cluster_names: 可选的集群名称列表，只管理这些集群
+            rules_file: 清理规则的YAML文件，为空时使用POD_ERROR_STATES作为规则
+            metrics: 记录各阶段耗时和计数的指标，默认新建
+            pool_size: 每个集群连接池的最大连接数，0表示与max_workers相同
+            snapshot: 可选的快照缓冲，扫描到的问题Pod写入其中，由调用方提交
+
+        aiohttp默认复用连接并请求gzip压缩的响应，不支持HTTP/2。
+        """
+        if async_client is None:
+            raise ImportError("async引擎需要安装kubernetes_asyncio: pip install pod-cleaner[async]")
+
+        self.kubeconfig_dir = kubeconfig_dir or get_kubeconfig_dir()
+        self.connect_timeout = connect_timeout
+        self.page_size = page_size
+        self.fast_decode = fast_decode
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.delete_workers = delete_workers
+        self.request_timeout = request_timeout
+        self.delete_qps = delete_qps
+        self.bulk_delete_min_pods = bulk_delete_min_pods
+        self.refresh = refresh
+        self.cache = ClusterInfoCache(ttl=cache_ttl)
+        self.metrics = metrics or MetricsRegistry()
+        self.pool_size = pool_size or max_workers
+        self.snapshot = snapshot
+        self.rules = RuleSet.load(rules_file) if rules_file else RuleSet.default()
+        self.kubeconfigs = resolve_kubeconfigs(self.kubeconfig_dir, cluster_names)
+        # 客户端在第一次使用时才创建，不会连接没有用到的集群
+        self._clients: Dict[str, Any] = {}
+        self._client_locks: Dict[str, asyncio.Lock] = {}
+        self.version_apis: Optional[Dict[str, Dict]] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop = asyncio.new_event_loop()
+
+    def _run(self, coro: Awaitable) -> Any:
+        """在共享的事件循环中运行协程"""
+        return self._loop.run_until_complete(coro)
+
+    def _iter_completed(self, coros: List[Awaitable]) -> Iterator[Any]:
+        """
+        并发运行多个协程，按完成顺序返回结果
+
+        协程抛出的异常在返回到该协程的结果时重新抛出，不会使调用方一直等待
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run(coro: Awaitable) -> None:
+            try:
+                result = await coro
+            except BaseException as e:
+                queue.put_nowait((False, e))
+                raise
+            queue.put_nowait((True, result))
+
+        tasks = [self._loop.create_task(run(coro)) for coro in coros]
+        try:
+            for _ in tasks:
+                ok, result = self._run(queue.get())
+                if not ok:
+                    raise result
+                yield result
+        finally:
+            # 调用方提前结束迭代时取消剩余任务
+            for task in tasks:
+                task.cancel()
+            self._run(_gather(*tasks))
+
+    def close(self) -> None:
+        """关闭已创建的连接池和事件循环"""
+        if self._loop.is_closed():
+            return
+        self._run(_gather(*(api.api_client.close() for api in self._clients.values())))
+        self._loop.close()
+
+    async def _get_api(self, cluster_name: str) -> Any:
+        """
+        获取集群的CoreV1Api客户端，第一次使用时解析kubeconfig并创建
+
+        Returns:
+            Any: CoreV1Api客户端
+        """
+        api = self._clients.get(cluster_name)
+        if api is not None:
+            return api
+        lock = self._client_locks.setdefault(cluster_name, asyncio.Lock())
+        async with lock:
+            api = self._clients.get(cluster_name)
+            if api is None:
+                configuration = async_client.Configuration()
+                with self.metrics.timer(cluster_name, 'connect'):
+                    await async_config.load_kube_config(
+                        config_file=self.kubeconfigs[cluster_name], client_configuration=configuration,
+                    )
+                configuration.connection_pool_maxsize = self.pool_size
+                api = async_client.CoreV1Api(async_client.ApiClient(configuration))
+                self._semaphores[cluster_name] = asyncio.Semaphore(self.max_workers)
+                self._clients[cluster_name] = api
+                logger.info(f"成功加载集群配置: {cluster_name}")
+        return api
+
+    async def _probe_cluster(self, cluster_name: str) -> Dict:
+        """
+        获取单个集群的版本和API信息
+
+        缓存中有该kubeconfig的有效信息时直接返回，不创建客户端，也不连接集群。
+
+        Returns:
+            Dict: 版本信息
+        """
+        kubeconfig_path = self.kubeconfigs[cluster_name]
+        cached = None if self.refresh else self.cache.get(kubeconfig_path)
+        if cached is not None:
+            return cached
+
+        core_api = await self._get_api(cluster_name)
+        version_api = async_client.VersionApi(core_api.api_client)
+        with self.metrics.timer(cluster_name, 'connect'):
+            # 测试连接
+            await core_api.list_namespace(limit=1, _request_timeout=(self.connect_timeout, self.connect_timeout))
+            # 获取版本信息
+            version_info = await version_api.get_code(_request_timeout=(self.connect_timeout, self.connect_timeout))
+
+        info = {
+            'version': version_info.git_version,
+            'build_date': version_info.build_date,
+            'platform': version_info.platform,
+            'api_server': core_api.api_client.configuration.host or "未知",
+        }
+        self.cache.put(kubeconfig_path, info)
+        return info
+
+    def get_cluster_info(self) -> Dict[str, Dict]:
+        """
+        获取所有集群的版本和API信息
+
+        优先读取本地缓存，只并发探测缓存未命中的集群，探测失败的集群不会出现在结果中。
+
+        Returns:
+            Dict[str, Dict]: 按集群名称组织的版本和API信息
+        """
+        if self.version_apis is not None:
+            return self.version_apis
+
+        cluster_names = list(self.kubeconfigs)
+        results = self._run(_gather(*(self._probe_cluster(name) for name in cluster_names)))
+        self.version_apis = {}
+        for cluster_name, result in zip(cluster_names, results):
+            if isinstance(result, BaseException):
+                logger.error(f"获取集群信息失败 {cluster_name}: {str(result)}")
+                continue
+            self.version_apis[cluster_name] = result
+        self.cache.save()
+        return self.version_apis
+
+    async def _list_pods_page(self, cluster_name: str, namespace: Optional[str], **kwargs) -> PodListPage:
+        """
+        获取一页Pod并转换为精简记录
+
+        Returns:
+            PodListPage: Pod记录列表、continue token和resourceVersion
+        """
+        api = await self._get_api(cluster_name)
+        kwargs.setdefault('_request_timeout', (self.connect_timeout, self.request_timeout))
+        if self.fast_decode:
+            kwargs['_preload_content'] = False
+
+        async with self._semaphores[cluster_name]:
+            start = time.perf_counter()
+            try:
+                if namespace is None:
+                    pods = await api.list_pod_for_all_namespaces(**kwargs)
+                else:
+                    pods = await api.list_namespaced_pod(namespace, **kwargs)
+
+                if self.fast_decode:
+                    try:
+                        data = await pods.read()
+                        if not 200 <= pods.status <= 299:
+                            raise ApiException(status=pods.status, reason=pods.reason)
+                    finally:
+                        pods.release()
+            except Exception:
+                self.metrics.inc(cluster_name, 'api_errors')
+                raise
+            finally:
+                self.metrics.observe(cluster_name, 'list_page', time.perf_counter() - start)
+
+        self.metrics.inc(cluster_name, 'list_pages')
+        with self.metrics.timer(cluster_name, 'decode'):
+            if self.fast_decode:
+                self.metrics.inc(cluster_name, 'bytes_received', len(data))
+                page = decode_pod_list(data)
+            else:
+                metadata = pods.metadata
+                page = PodListPage(
+                    [PodRecord.from_model(pod) for pod in pods.items],
+                    metadata._continue if metadata else None,
+                    metadata.resource_version if metadata else None,
+                )
+        self.metrics.inc(cluster_name, 'pods_scanned', len(page.records))
+        return page
+
+    async def _list_by_query(self, cluster_name: str, namespace: Optional[str], query: PodQuery) -> List[PodRecord]:
+        """
+        分页列出匹配查询的所有Pod
+        """
+        records: List[PodRecord] = []
+        _continue = None
+        while True:
+            kwargs: Dict[str, Any] = query.kwargs()
+            if self.page_size:
+                kwargs['limit'] = self.page_size
+            if _continue:
+                kwargs['_continue'] = _continue
+            page = await self._list_pods_page(cluster_name, namespace, **kwargs)
+            records.extend(page.records)
+            _continue = page.continue_token
+            if not _continue:
+                return records
+
+    async def _cluster_problem_pods(self, cluster_name: str, namespace: Optional[str]) -> List[Tuple[PodRecord, Rule]]:
+        """
+        列出单个集群中满足清理规则的Pod，规则合并后的各个查询并发执行
+        """
+        plan = self.rules.plan()
+        pages = await asyncio.gather(*(self._list_by_query(cluster_name, namespace, query) for query, _ in plan))
+        now = datetime.now(timezone.utc)
+        # Pod在两次查询之间变更状态时可能被重复返回
+        seen_uids = set()
+        matched = []
+        with self.metrics.timer(cluster_name, 'filter'):
+            for (_, rules), page in zip(plan, pages):
+                for pod in page:
+                    if pod.uid in seen_uids:
+                        continue
+                    rule = match_rules(rules, pod, now)
+                    if rule is not None:
+                        seen_uids.add(pod.uid)
+                        matched.append((pod, rule))
+        self.metrics.inc(cluster_name, 'pods_matched', len(matched))
+        return matched
+
+    async def _scan_cluster(self, cluster_name: str, namespace: Optional[str]) -> Dict[str, List[Dict]]:
+        """
+        列出单个集群的问题Pod，失败时只记录错误，不影响其他集群
+        """
+        try:
+            pods = [problem_pod_dict(pod, rule) for pod, rule in await self._cluster_problem_pods(cluster_name, namespace)]
+        except Exception as e:
+            logger.error(f"获取集群 {cluster_name} 的Pod列表失败: {str(e)}")
+            return {}
+
+        if pods:
+            logger.info(f"集群 {cluster_name} 发现 {len(pods)} 个问题Pod")
+        if self.snapshot is not None:
+            self.snapshot.add(cluster_name, pods)
+        return {cluster_name: pods}
+
+    def iter_problem_pods(self, namespace: Optional[str] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        并发列出所有集群的问题Pod，每个集群完成后立即返回
+
+        Args:
+            namespace: 可选的命名空间过滤
+
+        Yields:
+            Tuple[str, List[Dict]]: 集群名称和该集群的问题Pod列表
+        """
+        for result in self._iter_completed([self._scan_cluster(name, namespace) for name in self.kubeconfigs]):
+            yield from result.items()
+
+    def iter_problem_pod_records(self, namespace: Optional[str] = None) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        逐个返回问题Pod，与ClusterManager.iter_problem_pod_records的接口一致
+
+        async引擎的规则查询在集群内并发执行，结果按集群返回，因此这里以集群为单位输出。
+
+        Yields:
+            Tuple[str, Optional[Dict]]: 集群名称和问题Pod，Pod为None表示该集群扫描完成
+        """
+        for cluster_name, pods in self.iter_problem_pods(namespace):
+            for pod in pods:
+                yield cluster_name, pod
+            yield cluster_name, None
+
+    def list_problem_pods(self, namespace: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        列出所有集群中满足清理规则的Pod
+
+        Args:
+            namespace: 可选的命名空间过滤
+
+        Returns:
+            Dict[str, List[Dict]]: 按集群名称组织的问题Pod列表
+        """
+        return dict(self.iter_problem_pods(namespace))
+
+    async def _call_with_retry(self, cluster_name: str, bucket: TokenBucket, func, *args, **kwargs) -> float:
+        """
+        带限流和重试地调用删除接口，404视为已删除
+
+        Returns:
+            float: 最后一次请求的耗时（秒）
+        """
+        attempt = 0
+        while True:
+            await asyncio.sleep(bucket.reserve())
+            start = time.monotonic()
+            try:
+                async with self._semaphores[cluster_name]:
+                    await func(*args, _request_timeout=(self.connect_timeout, self.request_timeout), **kwargs)
+                elapsed = time.monotonic() - start
+                self.metrics.observe(cluster_name, 'delete', elapsed)
+                return elapsed
+            except ApiException as e:
+                elapsed = time.monotonic() - start
+                self.metrics.observe(cluster_name, 'delete', elapsed)
+                if e.status == 404:
+                    return elapsed
+                self.metrics.inc(cluster_name, 'api_errors')
+                if e.status not in RETRYABLE_STATUS or attempt >= DELETE_MAX_RETRIES:
+                    raise
+                self.metrics.inc(cluster_name, 'retries')
+                await asyncio.sleep(backoff_delay(attempt, e.headers.get('Retry-After') if e.headers else None))
+                attempt += 1
+
+    async def _delete_pod(self, cluster_name: str, bucket: TokenBucket, pod: Dict) -> Tuple[str, Optional[float]]:
+        """
+        删除单个Pod
+
+        Returns:
+            Tuple[str, Optional[float]]: 结果（success/failed/skipped）和请求耗时
+        """
+        preconditions = async_client.V1Preconditions(uid=pod['uid']) if pod.get('uid') else None
+        try:
+            api = await self._get_api(cluster_name)
+            elapsed = await self._call_with_retry(
+                cluster_name, bucket, api.delete_namespaced_pod,
+                name=pod['name'],
+                namespace=pod['namespace'],
+                body=async_client.V1DeleteOptions(preconditions=preconditions),
+            )
+            logger.debug("成功删除Pod: %s/%s in %s", pod['namespace'], pod['name'], cluster_name)
+            return 'success', elapsed
+        except Exception as e:
+            if ApiException is not None and isinstance(e, ApiException) and e.status == 409:
+                logger.warning(f"Pod已被重建，跳过删除: {pod['namespace']}/{pod['name']} in {cluster_name}")
+                return 'skipped', None
+            logger.error(f"删除Pod失败 {pod['namespace']}/{pod['name']} in {cluster_name}: {str(e)}")
+            return 'failed', None
+
+    async def _delete_collection(self, cluster_name: str, bucket: TokenBucket, namespace: str, phase: str,
+                                 pods: List[Dict]) -> Tuple[Dict[str, int], List[float]]:
+        """
+        使用field selector一次删除命名空间中指定状态的所有Pod
+        """
+        try:
+            api = await self._get_api(cluster_name)
+            elapsed = await self._call_with_retry(
+                cluster_name, bucket, api.delete_collection_namespaced_pod, namespace,
+                field_selector=f"status.phase={phase}",
+                body=async_client.V1DeleteOptions(),
+            )
+            logger.info(f"成功批量删除 {len(pods)} 个Pod: {namespace} (status.phase={phase}) in {cluster_name}")
+            return {'success': len(pods), 'failed': 0, 'skipped': 0}, [elapsed]
+        except Exception as e:
+            logger.error(f"批量删除Pod失败 {namespace} (status.phase={phase}) in {cluster_name}: {str(e)}")
+            return {'success': 0, 'failed': len(pods), 'skipped': 0}, []
+
+    async def _delete_batch(self, cluster_name: str, bucket: TokenBucket,
+                            pods: List[Dict]) -> Tuple[Dict[str, int], List[float]]:
+        """
+        顺序删除一批Pod
+        """
+        stats = {'success': 0, 'failed': 0, 'skipped': 0}
+        latencies: List[float] = []
+        for pod in pods:
+            outcome, elapsed = await self._delete_pod(cluster_name, bucket, pod)
+            stats[outcome] += 1
+            if elapsed is not None:
+                latencies.append(elapsed)
+        return stats, latencies
+
+    async def _delete_cluster_pods(self, cluster_name: str, pods: List[Dict], dry_run: bool,
+                                   allow_collection: bool = True) -> Dict[str, Dict[str, int]]:
+        """
+        并发删除单个集群中的问题Pod
+
+        与sync引擎的PodDeleter相同：Pod按batch_size分批，批次内顺序删除，
+        最多delete_workers个批次同时执行，所有请求共享一个令牌桶。
+
+        Returns:
+            Dict[str, Dict[str, int]]: {集群名称: 删除统计信息}
+        """
+        if dry_run:
+            logger.info(f"[试运行] 将删除集群 {cluster_name} 中的 {len(pods)} 个Pod")
+            return {cluster_name: {'total': len(pods), 'success': 0, 'failed': 0}}
+
+        bucket = TokenBucket(self.delete_qps, DELETE_BURST)
+        # 规则中有状态和命名空间以外的条件时，按状态批量删除会误删不满足规则的Pod
+        allow_collection = allow_collection and self.rules.collection_safe
+        collections, single = plan_collection_deletes(pods, self.bulk_delete_min_pods) if allow_collection else ([], pods)
+        # 按命名空间排序，使同一批次尽量落在同一个命名空间
+        single = sorted(single, key=lambda pod: pod['namespace'])
+        batches = [self._delete_collection(cluster_name, bucket, *group) for group in collections]
+        batches += [self._delete_batch(cluster_name, bucket, single[i:i + self.batch_size])
+                    for i in range(0, len(single), self.batch_size)]
+        semaphore = asyncio.Semaphore(max(1, self.delete_workers))
+
+        async def run(batch: Awaitable) -> Tuple[Dict[str, int], List[float]]:
+            async with semaphore:
+                return await batch
+
+        stats = {'total': len(pods), 'success': 0, 'failed': 0, 'skipped': 0}
+        latencies: List[float] = []
+        for batch_stats, batch_latencies in await asyncio.gather(*(run(batch) for batch in batches)):
+            for key, value in batch_stats.items():
+                stats[key] += value
+            latencies.extend(batch_latencies)
+
+        stats.update(latency_stats(latencies))
+        self.metrics.inc(cluster_name, 'pods_deleted', stats['success'])
+        log_delete_summary(cluster_name, stats)
+        return {cluster_name: stats}
+
+    async def _delete_cluster(self, cluster_name: str, namespace: Optional[str], dry_run: bool,
+                              candidates: Optional[Dict[str, List[Dict]]]) -> Dict[str, Dict[str, int]]:
+        """
+        删除单个集群的问题Pod，未提供候选Pod时先列出
+        """
+        if candidates is not None:
+            return await self._delete_cluster_pods(cluster_name, candidates[cluster_name], dry_run, allow_collection=False)
+        result = await self._scan_cluster(cluster_name, namespace)
+        if not result:
+            return {}
+        return await self._delete_cluster_pods(cluster_name, result[cluster_name], dry_run)
+
+    def iter_delete_problem_pods(
+        self,
+        namespace: Optional[str] = None,
+        dry_run: bool = False,
+        candidates: Optional[Dict[str, List[Dict]]] = None,
+    ) -> Iterator[Tuple[str, Dict[str, int]]]:
+        """
+        并发删除所有集群中的问题Pod，每个集群完成后立即返回统计信息
+
+        Args:
+            namespace: 可选的命名空间过滤
+            dry_run: 是否执行试运行而不实际删除Pod
+            candidates: 预先列出的候选Pod，提供时不再重新列出
+
+        Yields:
+            Tuple[str, Dict[str, int]]: 集群名称和该集群的删除统计信息
+        """
+        if candidates is None:
+            cluster_names = list(self.kubeconfigs)
+        else:
+            cluster_names = [name for name in candidates if name in self.kubeconfigs]
+        coros = [self._delete_cluster(name, namespace, dry_run, candidates) for name in cluster_names]
+        for result in self._iter_completed(coros):
+            yield from result.items()
+
+    def delete_problem_pods(
+        self,
+        namespace: Optional[str] = None,
+        dry_run: bool = False,
+        candidates: Optional[Dict[str, List[Dict]]] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        删除所有集群中满足清理规则的Pod
+
+        Args:
+            namespace: 可选的命名空间过滤
+            dry_run: 是否执行试运行而不实际删除Pod
+            candidates: 预先列出的候选Pod，提供时不再重新列出
+
+        Returns:
+            Dict[str, Dict[str, int]]: 每个集群的删除统计信息
+        """
+        return dict(self.iter_delete_problem_pods(namespace, dry_run, candidates))
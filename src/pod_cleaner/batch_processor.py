@@ -1,6 +1,6 @@
-from typing import List, Dict, Any, Callable, TypeVar, Generic
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from .config import BATCH_SIZE
+from typing import List, Dict, Any, Callable, Iterator, Optional, TypeVar, Generic
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from .config import BATCH_SIZE, MAX_WORKERS
 from .logger import setup_logger
 
 T = TypeVar('T')
@@ -15,7 +15,7 @@ class BatchProcessor(Generic[T, R]):
     可以将大量数据分批处理，并支持并行执行
     """
     
-    def __init__(self, items: List[T], batch_size: int = BATCH_SIZE, max_workers: int = 5):
+    def __init__(self, items: List[T], batch_size: int = BATCH_SIZE, max_workers: int = MAX_WORKERS):
         """
         初始化批量处理器
         
@@ -40,47 +40,72 @@ class BatchProcessor(Generic[T, R]):
             batches.append(self.items[i:i + self.batch_size])
         return batches
         
-    def process(self, processor_func: Callable[[List[T]], Dict[str, R]]) -> Dict[str, R]:
+    def iter_results(self, processor_func: Callable[[List[T]], Dict[str, R]], timeout: Optional[float] = None) -> Iterator[Dict[str, R]]:
         """
-        处理所有项目
+        并行处理所有批次，每个批次完成后立即返回其结果
+        
+        单个批次的异常只会被记录，不影响其他批次。
         
         Args:
             processor_func: 处理函数，接受一个批次并返回结果字典
+            timeout: 等待所有批次完成的最长时间（秒），None表示不限制
             
-        Returns:
-            Dict[str, R]: 处理结果
+        Yields:
+            Dict[str, R]: 单个批次的处理结果
         """
         batches = self._create_batches()
-        logger.info(f"将 {len(self.items)} 个项目分为 {len(batches)} 个批次进行处理")
+        logger.debug(f"将 {len(self.items)} 个项目分为 {len(batches)} 个批次进行处理")
+        if not batches:
+            return
         
-        results: Dict[str, R] = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        future_to_batch = {
+            executor.submit(processor_func, batch): batch
+            for batch in batches
+        }
         
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_batch = {
-                executor.submit(processor_func, batch): batch
-                for batch in batches
-            }
-            
-            for future in as_completed(future_to_batch):
+        try:
+            for future in as_completed(future_to_batch, timeout=timeout):
                 try:
-                    batch_result = future.result()
-                    # 合并结果
-                    for key, value in batch_result.items():
-                        if key in results:
-                            if isinstance(value, dict) and isinstance(results[key], dict):
-                                # 如果是字典，合并它们
-                                for k, v in value.items():
-                                    if k in results[key]:
-                                        if isinstance(v, int) and isinstance(results[key][k], int):
-                                            results[key][k] += v
-                                    else:
-                                        results[key][k] = v
-                            elif isinstance(value, list) and isinstance(results[key], list):
-                                # 如果是列表，扩展它
-                                results[key].extend(value)
-                        else:
-                            results[key] = value
+                    yield future.result()
                 except Exception as e:
                     logger.error(f"处理批次时发生错误: {str(e)}")
+        except FuturesTimeoutError:
+            pending = sum(1 for future in future_to_batch if not future.done())
+            logger.error(f"处理超时，{pending} 个批次未在 {timeout} 秒内完成")
+        finally:
+            # 超时或提前退出时不等待剩余批次
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+    def process(self, processor_func: Callable[[List[T]], Dict[str, R]], timeout: Optional[float] = None) -> Dict[str, R]:
+        """
+        处理所有项目
+        
+        Args:
+            processor_func: 处理函数，接受一个批次并返回结果字典
+            timeout: 等待所有批次完成的最长时间（秒），None表示不限制
+            
+        Returns:
+            Dict[str, R]: 处理结果
+        """
+        results: Dict[str, R] = {}
+        
+        for batch_result in self.iter_results(processor_func, timeout):
+            # 合并结果
+            for key, value in batch_result.items():
+                if key in results:
+                    if isinstance(value, dict) and isinstance(results[key], dict):
+                        # 如果是字典，合并它们
+                        for k, v in value.items():
+                            if k in results[key]:
+                                if isinstance(v, int) and isinstance(results[key][k], int):
+                                    results[key][k] += v
+                            else:
+                                results[key][k] = v
+                    elif isinstance(value, list) and isinstance(results[key], list):
+                        # 如果是列表，扩展它
+                        results[key].extend(value)
+                else:
+                    results[key] = value
         
-        return results 
\ No newline at end of file
+        return results
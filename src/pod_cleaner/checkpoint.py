@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from .config import CHECKPOINT_FILE
+from .logger import setup_logger
+from .pod_record import PodRecord, parse_timestamp
+from .rules import Rule
+
+logger = setup_logger(__name__)
+
+def _file_sha256(path: str) -> Optional[str]:
+    """文件内容的sha256，文件无法读取时返回None"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def pod_key(pod: Dict[str, Any]) -> str:
+    """Pod在检查点中的键，优先使用uid"""
+    return pod.get('uid') or f"{pod['namespace']}/{pod['name']}"
+
+class ClusterProgress:
+    """单个集群在检查点中的进度"""
+
+    __slots__ = ('pods', 'tokens', 'listed', 'deleted', 'done')
+
+    def __init__(self):
+        # 已列出的候选Pod，按列出的顺序保存
+        self.pods: Dict[str, List[Any]] = {}
+        # 每个查询的continue token，值为None表示该查询已列完
+        self.tokens: Dict[str, Optional[str]] = {}
+        self.listed = False
+        self.deleted: Set[str] = set()
+        self.done = False
+
+class CheckpointJournal:
+    """
+    清理进度的检查点日志
+
+    每行一个JSON对象，只追加写入，进程被中断时最多丢失最后一行：
+        {"t": "run", "namespace": ..., "rules": ..., "rules_sha256": ..., "clusters": [...], "started": ...}
+        {"t": "page", "c": 集群, "q": 查询, "next": continue token, "pods": [[命名空间, 名称, uid, 状态, 原因, 规则, 创建时间, 节点], ...]}
+        {"t": "listed", "c": 集群}
+        {"t": "deleted", "c": 集群, "keys": [...]}
+        {"t": "done", "c": 集群}
+
+    使用resume打开时重放日志，第一行记录的命名空间、规则文件（路径和内容的sha256）和集群与本次运行不同时重新开始；
+    已完成的集群不再处理，已列出的集群不再重新列出，
+    已删除的Pod不再删除，未列完的查询从记录的continue token继续。可在多个线程间共享。
+    """
+
+    def __init__(self, path: str = CHECKPOINT_FILE, namespace: Optional[str] = None,
+                 rules_file: Optional[str] = None, clusters: Optional[Iterable[str]] = None, resume: bool = False):
+        """
+        打开检查点日志
+
+        Args:
+            path: 日志文件路径
+            namespace: 本次运行的命名空间过滤
+            rules_file: 本次运行的规则文件
+            clusters: 本次运行的集群
+            resume: 是否从已有的日志继续，为False或日志与本次运行的参数不同时重新开始
+        """
+        self.path = path
+        self.header = {
+            'namespace': namespace,
+            'rules': os.path.abspath(rules_file) if rules_file else None,
+            'rules_sha256': _file_sha256(rules_file) if rules_file else None,
+            'clusters': sorted(clusters) if clusters is not None else None,
+        }
+        self.clusters: Dict[str, ClusterProgress] = {}
+        self.resumed = False
+        self._lock = threading.Lock()
+        if resume:
+            self.resumed = self._replay()
+        if not self.resumed:
+            self.clusters = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 每写一行立即交给操作系统，进程被杀死时已写入的记录不会丢失
+        self._file = open(path, 'a' if self.resumed else 'w', encoding='utf-8', buffering=1)
+        if not self.resumed:
+            self._append({'t': 'run', **self.header, 'started': time.strftime('%Y-%m-%dT%H:%M:%S')})
+
+    def _replay(self) -> bool:
+        """
+        读取已有的日志
+
+        Returns:
+            bool: 日志存在且与本次运行的参数一致
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.warning(f"读取检查点失败，将重新开始: {str(e)}")
+            return False
+
+        for number, line in enumerate(lines):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # 进程中断时最后一行可能不完整
+                logger.warning(f"忽略检查点中不完整的第 {number + 1} 行")
+                continue
+            if number == 0:
+                if entry.get('t') != 'run':
+                    logger.warning("检查点缺少运行参数，将重新开始")
+                    return False
+                changed = [key for key, value in self.header.items() if entry.get(key) != value]
+                if changed:
+                    logger.warning(f"检查点的运行参数与本次运行不同（{', '.join(changed)}），将重新开始")
+                    return False
+                continue
+            self._apply(entry)
+        return bool(lines)
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        """将一条记录应用到内存中的进度"""
+        progress = self.clusters.setdefault(entry['c'], ClusterProgress())
+        kind = entry['t']
+        if kind == 'page':
+            for row in entry['pods']:
+                progress.pods.setdefault(row[2] or f"{row[0]}/{row[1]}", row)
+            progress.tokens[entry['q']] = entry['next']
+        elif kind == 'listed':
+            progress.listed = True
+        elif kind == 'deleted':
+            progress.deleted.update(entry['keys'])
+        elif kind == 'done':
+            progress.done = True
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def _record(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._apply(entry)
+            self._append(entry)
+
+    def query_progress(self, cluster_name: str, query: str) -> Tuple[bool, Optional[str]]:
+        """
+        查询的列出进度
+
+        Returns:
+            Tuple[bool, Optional[str]]: 是否已列完，以及继续列出时使用的continue token
+        """
+        with self._lock:
+            progress = self.clusters.get(cluster_name)
+            if progress is None or query not in progress.tokens:
+                return False, None
+            token = progress.tokens[query]
+            return token is None, token
+
+    def record_page(self, cluster_name: str, query: str, matched: Iterable[Tuple[PodRecord, Rule]],
+                    next_token: Optional[str]) -> None:
+        """记录一页列表中匹配的Pod和之后的continue token"""
+        pods = [
+            [pod.namespace, pod.name, pod.uid, pod.phase, pod.reason, rule.name,
+             pod.creation_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ') if pod.creation_timestamp else None,
+             pod.node_name]
+            for pod, rule in matched
+        ]
+        self._record({'t': 'page', 'c': cluster_name, 'q': query, 'next': next_token, 'pods': pods})
+
+    def record_listed(self, cluster_name: str) -> None:
+        """记录集群的候选Pod已全部列出"""
+        self._record({'t': 'listed', 'c': cluster_name})
+
+    def record_deleted(self, cluster_name: str, pods: Iterable[Dict[str, Any]]) -> None:
+        """记录已删除（或已不存在、已被重建）的Pod"""
+        keys = [pod_key(pod) for pod in pods]
+        if keys:
+            self._record({'t': 'deleted', 'c': cluster_name, 'keys': keys})
+
+    def record_done(self, cluster_name: str) -> None:
+        """记录集群的清理已完成"""
+        self._record({'t': 'done', 'c': cluster_name})
+
+    def is_listed(self, cluster_name: str) -> bool:
+        with self._lock:
+            progress = self.clusters.get(cluster_name)
+            return progress is not None and progress.listed
+
+    def is_done(self, cluster_name: str) -> bool:
+        with self._lock:
+            progress = self.clusters.get(cluster_name)
+            return progress is not None and progress.done
+
+    def known_keys(self, cluster_name: str) -> Set[str]:
+        """已记录的候选Pod的键，包括已删除的Pod"""
+        with self._lock:
+            progress = self.clusters.get(cluster_name)
+            return set(progress.pods) if progress else set()
+
+    def candidates(self, cluster_name: str) -> List[Dict[str, Any]]:
+        """
+        已记录但尚未删除的候选Pod
+
+        Returns:
+            List[Dict[str, Any]]: 与list_problem_pods相同格式的Pod
+        """
+        with self._lock:
+            progress = self.clusters.get(cluster_name)
+            if progress is None:
+                return []
+            rows = [row for key, row in progress.pods.items() if key not in progress.deleted]
+        return [
+            {
+                'namespace': namespace,
+                'name': name,
+                'uid': uid,
+                'status': status,
+                'reason': reason,
+                'rule': rule,
+                'creation_timestamp': parse_timestamp(created),
+                'node_name': node_name,
+            }
+            for namespace, name, uid, status, reason, rule, created, node_name in rows
+        ]
+
+    def finished(self, cluster_names: Iterable[str]) -> bool:
+        """所有集群是否都已完成"""
+        return all(self.is_done(name) for name in cluster_names)
+
+    def close(self, remove: bool = False) -> None:
+        """
+        关闭日志文件
+
+        Args:
+            remove: 是否删除日志文件，所有集群都完成时使用
+        """
+        with self._lock:
+            self._file.close()
+            if remove:
+                try:
+                    os.remove(self.path)
+                except FileNotFoundError:
+                    pass
@@ -1,16 +1,59 @@
 import typer
 import os
+import signal
 import sys
+import time
 from typing import Optional, List
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
 from rich.box import ROUNDED
-from datetime import datetime
-from .cluster_manager import ClusterManager
+from datetime import datetime, timezone
+from .kubeconfig import discover_kubeconfigs
 from .logger import setup_logger
-from .config import get_kubeconfig_dir
+from .output import (
+    OUTPUT_FORMATS,
+    OUTPUT_TABLE,
+    POD_FIELDS,
+    SUMMARY_FIELDS,
+    PodSummary,
+    RecordWriter,
+    pod_row,
+)
+from .config import (
+    get_kubeconfig_dir,
+    LIST_PAGE_SIZE,
+    FAST_DECODE,
+    MAX_WORKERS,
+    ASYNC_CLUSTER_CONCURRENCY,
+    BATCH_SIZE,
+    DELETE_QPS,
+    BULK_DELETE_MIN_PODS,
+    WATCH_TIMEOUT,
+    RULES_FILE,
+    SHARD_NAMESPACES,
+    SHARD_WORKERS,
+    METRICS_PORT,
+    METRICS_TEXTFILE,
+    CLUSTER_CONNECT_TIMEOUT,
+    REQUEST_TIMEOUT,
+    HTTP_POOL_SIZE,
+    HTTP_KEEPALIVE,
+    HTTP_GZIP,
+    HTTP2,
+    CHECKPOINT_FILE,
+    FLEET_PROCESSES,
+    NODE_AWARE,
+    DEAD_NODE_GRACE,
+    SNAPSHOT_DIR,
+    KUBECONFIG_WATCH,
+    RUN_DEADLINE,
+    SCHEDULE_BY_HISTORY,
+    CLUSTER_HISTORY_FILE,
+    KUBECONFIG_POLL_INTERVAL,
+    SNAPSHOT_SCANS,
+)
 
 app = typer.Typer(
     help="Pod Cleaner - 用于清理Kubernetes集群中的问题Pod的工具",
@@ -19,92 +62,387 @@ app = typer.Typer(
 )
 logger = setup_logger(__name__)
 console = Console()
+# 机器可读的输出格式下，提示和错误信息写入stderr，不混入stdout中的数据
+err_console = Console(stderr=True)
+
+# 集群管理引擎
+ENGINE_SYNC = "sync"
+ENGINE_ASYNC = "async"
+
+def create_manager(engine: str, **kwargs):
+    """
+    根据引擎类型创建集群管理器
+    
+    Args:
+        engine: sync使用基于线程池的ClusterManager，async使用基于asyncio的AsyncClusterManager
+        **kwargs: 传递给集群管理器的参数，值为None的参数使用默认值；
+            processes不为0时使用FleetManager在多个子进程中运行ClusterManager；
+            schedule为True或设置了deadline时按CLUSTER_HISTORY_FILE中的运行历史安排集群，并写回本次运行的历史；
+            deadline和schedule为None时使用环境变量RUN_DEADLINE和SCHEDULE_BY_HISTORY，async引擎忽略这两个环境变量
+        
+    Returns:
+        ClusterManager、AsyncClusterManager或FleetManager
+    """
+    # 不传入时（如daemon）不限制截止时间，也不按历史调度
+    deadline = kwargs.pop('deadline', 0)
+    schedule = kwargs.pop('schedule', False)
+    kwargs = {key: value for key, value in kwargs.items() if value is not None}
+    processes = kwargs.pop('processes', 0)
+    if engine != ENGINE_ASYNC:
+        deadline = RUN_DEADLINE if deadline is None else deadline
+        schedule = SCHEDULE_BY_HISTORY if schedule is None else schedule
+        kwargs['deadline'] = deadline
+        # 只有按历史调度时才读写历史文件，普通的list-pods不写入任何文件
+        if schedule or deadline:
+            kwargs['history_file'] = CLUSTER_HISTORY_FILE
+    if processes and engine != ENGINE_SYNC:
+        raise typer.BadParameter("--processes 只支持sync引擎")
+    if processes:
+        # 每个子进程运行自己的ClusterManager，父进程只合并结果
+        from .fleet import FleetManager
+        return FleetManager(processes, **kwargs)
+    if engine == ENGINE_ASYNC:
+        from .async_cluster_manager import AsyncClusterManager
+        if kwargs.pop('shard_namespaces', False):
+            raise typer.BadParameter("--shard-namespaces 只支持sync引擎")
+        kwargs.pop('shard_workers', None)
+        if kwargs.pop('http2', False):
+            raise typer.BadParameter("--http2 只支持sync引擎，aiohttp不支持HTTP/2")
+        # aiohttp默认复用连接并请求gzip压缩的响应
+        kwargs.pop('tcp_keepalive', None)
+        kwargs.pop('gzip', None)
+        if kwargs.pop('node_aware', False):
+            raise typer.BadParameter("--node-aware 只支持sync引擎")
+        kwargs.pop('dead_node_grace', None)
+        if deadline:
+            raise typer.BadParameter("--deadline 只支持sync引擎")
+        if schedule:
+            raise typer.BadParameter("--schedule 只支持sync引擎")
+        # 命令行没有指定时，环境变量中的默认值只对sync引擎生效
+        ignored = [name for name, value in (
+            ('RUN_DEADLINE', deadline is None and RUN_DEADLINE),
+            ('SCHEDULE_BY_HISTORY', schedule is None and SCHEDULE_BY_HISTORY),
+        ) if value]
+        if ignored:
+            logger.warning(f"async引擎不支持截止时间和按历史调度，忽略环境变量 {', '.join(ignored)}")
+        return AsyncClusterManager(**kwargs)
+    if engine != ENGINE_SYNC:
+        raise typer.BadParameter(f"不支持的引擎: {engine}，可选值: {ENGINE_SYNC}, {ENGINE_ASYNC}")
+    # kubernetes客户端导入较慢，只在真正需要连接集群时导入
+    from .cluster_manager import ClusterManager
+    return ClusterManager(**kwargs)
+
+def close_manager(manager, metrics_out: Optional[str] = None) -> None:
+    """
+    关闭集群管理器，指定metrics_out时先写入本次运行的指标摘要
+    """
+    if manager is None:
+        return
+    if metrics_out:
+        try:
+            manager.metrics.write_json(metrics_out)
+            err_console.print(f"指标已写入: [cyan]{metrics_out}[/cyan]")
+        except OSError as e:
+            logger.error(f"写入指标文件失败 {metrics_out}: {str(e)}")
+    manager.close()
+
+def print_cluster_status(manager, message_console: Console) -> bool:
+    """
+    显示最近一次列出或删除中没有完成的集群及其状态
+
+    Returns:
+        bool: 是否有集群没有完成
+    """
+    schedule = getattr(manager, 'schedule', None)
+    incomplete = schedule.incomplete() if schedule is not None else {}
+    if not incomplete:
+        return False
+    from .scheduler import STATUS_LABELS
+    table = Table(show_header=True, header_style="bold magenta", box=ROUNDED)
+    table.add_column("集群", style="cyan")
+    table.add_column("状态", style="red")
+    for cluster_name, status in incomplete.items():
+        table.add_row(cluster_name, STATUS_LABELS.get(status, status))
+    message_console.print(Panel(table, title=f"{len(incomplete)} 个集群未完成", border_style="yellow"))
+    return True
 
 def create_pod_table(pods: list) -> Table:
     """创建用于显示Pod信息的表格"""
-    table = Table(show_header=True, header_style="bold magenta", box=ROUNDED, show_lines=True)
+    # 不在行之间画分隔线，问题Pod很多时可以少渲染一半的行
+    table = Table(show_header=True, header_style="bold magenta", box=ROUNDED)
     table.add_column("命名空间", style="cyan")
     table.add_column("Pod名称", style="green")
     table.add_column("状态", style="red")
     table.add_column("创建时间", style="yellow")
+    table.add_column("匹配规则", style="blue")
     
     for pod in pods:
+        # 快照和检查点中可能没有创建时间
+        created = pod.get('creation_timestamp')
         table.add_row(
             pod['namespace'],
             pod['name'],
             pod['status'],
-            pod['creation_timestamp'].strftime("%Y-%m-%d %H:%M:%S")
+            created.strftime("%Y-%m-%d %H:%M:%S") if created is not None else '-',
+            pod.get('rule', '')
         )
     
     return table
 
+def create_summary_table(summary: PodSummary) -> Table:
+    """创建按集群、命名空间和原因统计问题Pod数量的表格"""
+    table = Table(show_header=True, header_style="bold magenta", box=ROUNDED)
+    table.add_column("集群", style="cyan")
+    table.add_column("命名空间", style="cyan")
+    table.add_column("原因", style="red")
+    table.add_column("数量", style="yellow", justify="right")
+
+    for row in summary.rows():
+        table.add_row(row['cluster'], row['namespace'], row['reason'] or '', str(row['count']))
+
+    return table
+
+def print_problem_pods(manager, namespace: Optional[str]) -> None:
+    """以Rich表格显示问题Pod，每个集群列出完成后立即显示"""
+    console.print("\n[bold blue]Pod 状态检查报告[/bold blue]")
+    console.print(f"检查时间: [yellow]{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}[/yellow]")
+    if namespace:
+        console.print(f"命名空间: [cyan]{namespace}[/cyan]")
+    console.print("─" * 50)
+
+    total_clusters = 0
+    clusters_with_problems = 0
+    total_problem_pods = 0
+
+    for cluster_name, pods in manager.iter_problem_pods(namespace):
+        total_clusters += 1
+        panel_title = f"集群: {cluster_name}"
+        if pods:
+            clusters_with_problems += 1
+            total_problem_pods += len(pods)
+            table = create_pod_table(pods)
+            console.print(Panel(table, title=panel_title, border_style="red"))
+        else:
+            status_text = Text("\n✓ 未发现异常Pod\n", style="green")
+            console.print(Panel(status_text, title=panel_title, border_style="green"))
+
+    # 显示摘要信息
+    summary = Text()
+    summary.append("\n摘要信息:\n", style="bold")
+    summary.append(f"检查的集群总数: {total_clusters}\n", style="blue")
+    summary.append(f"发现问题的集群数: {clusters_with_problems}\n", style="yellow")
+    summary.append(f"问题Pod总数: {total_problem_pods}\n", style="red")
+    console.print(Panel(summary, title="检查结果摘要", border_style="blue"))
+
+def summarize_problem_pods(manager, namespace: Optional[str], output: str) -> None:
+    """
+    只统计问题Pod的数量，不保存逐个Pod的记录
+
+    table格式显示统计表格，其余格式写出SUMMARY_FIELDS中的字段
+    """
+    summary = PodSummary()
+    for cluster_name, pod in manager.iter_problem_pod_records(namespace):
+        if pod is None:
+            summary.finish_cluster(cluster_name)
+        else:
+            summary.add(cluster_name, pod)
+
+    if output != OUTPUT_TABLE:
+        writer = RecordWriter(output, SUMMARY_FIELDS)
+        for row in summary.rows():
+            writer.write(row)
+        writer.close()
+        return
+
+    console.print(Panel(create_summary_table(summary), title="问题Pod统计", border_style="red"))
+    text = Text()
+    text.append(f"检查的集群总数: {len(summary.clusters)}\n", style="blue")
+    text.append(f"发现问题的集群数: {len({row['cluster'] for row in summary.rows()})}\n", style="yellow")
+    text.append(f"问题Pod总数: {summary.total}", style="red")
+    console.print(Panel(text, title="检查结果摘要", border_style="blue"))
+
+def stream_problem_pods(manager, namespace: Optional[str], output: str) -> None:
+    """
+    以json、ndjson或csv格式写出问题Pod，每匹配到一个Pod立即写出，每个集群完成时刷新输出
+    """
+    writer = RecordWriter(output, POD_FIELDS)
+    for cluster_name, pod in manager.iter_problem_pod_records(namespace):
+        if pod is None:
+            writer.flush()
+        else:
+            writer.write(pod_row(cluster_name, pod))
+    writer.close()
+
 @app.command()
 def list_pods(
     namespace: Optional[str] = typer.Option(None, "--namespace", "-n", help="指定命名空间"),
     kubeconfig_dir: Optional[str] = typer.Option(None, "--kubeconfig-dir", "-k", help="指定kubeconfig目录路径"),
+    clusters: Optional[List[str]] = typer.Option(None, "--cluster", "-c", help="只处理指定的集群（kubeconfig文件名去掉扩展名），可重复指定"),
+    rules_file: Optional[str] = typer.Option(RULES_FILE, "--rules", "-r", help="清理规则的YAML文件，默认按Pod状态Error/Unknown匹配"),
+    page_size: int = typer.Option(LIST_PAGE_SIZE, "--page-size", help="分页列出Pod时每页的数量，0表示不分页"),
+    fast_decode: bool = typer.Option(FAST_DECODE, "--fast-decode", help="直接解析原始JSON响应，跳过kubernetes模型反序列化"),
+    max_workers: Optional[int] = typer.Option(
+        None, "--max-workers", "-w",
+        help=f"并行处理集群和批次的最大线程数（默认{MAX_WORKERS}）；async引擎下为每个集群的最大并发请求数（默认{ASYNC_CLUSTER_CONCURRENCY}）",
+    ),
+    engine: str = typer.Option(ENGINE_SYNC, "--engine", "-e", help="集群管理引擎: sync（线程池）或 async（asyncio）"),
+    refresh: bool = typer.Option(False, "--refresh", help="忽略本地缓存，重新探测所有集群的版本和API地址"),
+    shard_namespaces: bool = typer.Option(SHARD_NAMESPACES, "--shard-namespaces", help="按命名空间分片并发扫描集群（仅sync引擎）"),
+    shard_workers: int = typer.Option(SHARD_WORKERS, "--shard-workers", help="分片扫描时每个集群的最大并发列表请求数"),
+    metrics_out: Optional[str] = typer.Option(None, "--metrics-out", help="结束时将各集群的耗时、计数和延迟分布以JSON写入该文件"),
+    pool_size: int = typer.Option(HTTP_POOL_SIZE, "--pool-size", help="每个集群连接池的最大连接数，0表示按并发数设置"),
+    connect_timeout: float = typer.Option(CLUSTER_CONNECT_TIMEOUT, "--connect-timeout", help="建立连接的超时时间（秒）"),
+    request_timeout: float = typer.Option(REQUEST_TIMEOUT, "--request-timeout", help="单个API请求等待响应数据的超时时间（秒）"),
+    tcp_keepalive: bool = typer.Option(HTTP_KEEPALIVE, "--tcp-keepalive/--no-tcp-keepalive", help="对API服务器的连接开启TCP keepalive"),
+    gzip: bool = typer.Option(HTTP_GZIP, "--gzip/--no-gzip", help="请求gzip压缩的响应"),
+    http2: bool = typer.Option(HTTP2, "--http2", help="尝试使用HTTP/2（需要安装h2，仅sync引擎）"),
+    processes: int = typer.Option(FLEET_PROCESSES, "--processes", "-p", help="将集群分配给N个子进程处理，0表示在当前进程中处理（仅sync引擎）"),
+    output: str = typer.Option(
+        OUTPUT_TABLE, "--output", "-o",
+        help="输出格式: table、json、ndjson 或 csv；ndjson和csv边扫描边输出",
+    ),
+    summary_only: bool = typer.Option(False, "--summary-only", help="只按集群、命名空间和原因统计问题Pod的数量"),
+    snapshot: bool = typer.Option(SNAPSHOT_SCANS, "--snapshot/--no-snapshot", help="将本次扫描的问题Pod追加到快照存储，供report命令查询"),
+    snapshot_dir: str = typer.Option(SNAPSHOT_DIR, "--snapshot-dir", help="快照存储目录"),
+    deadline: Optional[float] = typer.Option(
+        None, "--deadline",
+        help=f"整个运行的截止时间（秒），到达后只返回已完成集群的结果并显示每个集群的状态，0表示不限制（默认{RUN_DEADLINE:g}，仅sync引擎）",
+    ),
+    schedule: Optional[bool] = typer.Option(
+        None, "--schedule/--no-schedule",
+        help=f"按运行历史从耗时最长的集群开始处理，并记录本次运行的耗时；使用--deadline时总是开启（默认{'开启' if SCHEDULE_BY_HISTORY else '关闭'}，仅sync引擎）",
+    ),
 ):
-    """列出所有集群中状态为Error或Unknown的Pod"""
+    """列出所有集群中满足清理规则的Pod（默认为状态为Error或Unknown的Pod）"""
+    if output not in OUTPUT_FORMATS:
+        raise typer.BadParameter(f"不支持的输出格式: {output}，可选值: {', '.join(OUTPUT_FORMATS)}")
+    # 机器可读的格式只在stdout中输出数据
+    message_console = console if output == OUTPUT_TABLE else err_console
+
     # 检查kubeconfig目录是否存在且不为空
     if kubeconfig_dir:
         os.environ['KUBECONFIG_DIR'] = kubeconfig_dir
         
     current_kubeconfig_dir = get_kubeconfig_dir()
     if not os.path.exists(current_kubeconfig_dir):
-        console.print(f"\n[bold red]错误: kubeconfig目录不存在: {current_kubeconfig_dir}[/bold red]")
+        message_console.print(f"\n[bold red]错误: kubeconfig目录不存在: {current_kubeconfig_dir}[/bold red]")
         return
         
+    manager = None
+    snapshot_writer = None
+    incomplete = False
     try:
-        manager = ClusterManager()
+        if snapshot:
+            from .snapshot_store import SnapshotStore
+            snapshot_writer = SnapshotStore(snapshot_dir).writer()
+        manager = create_manager(
+            engine,
+            refresh=refresh,
+            cluster_names=clusters,
+            rules_file=rules_file,
+            page_size=page_size,
+            fast_decode=fast_decode,
+            max_workers=max_workers,
+            shard_namespaces=shard_namespaces,
+            shard_workers=shard_workers,
+            pool_size=pool_size,
+            connect_timeout=connect_timeout,
+            request_timeout=request_timeout,
+            tcp_keepalive=tcp_keepalive,
+            gzip=gzip,
+            http2=http2,
+            processes=processes,
+            snapshot=snapshot_writer,
+            deadline=deadline,
+            schedule=schedule,
+        )
             
         # 检查目录中是否有kubeconfig文件
-        kubeconfig_files = [f for f in os.listdir(current_kubeconfig_dir) 
-                          if f.endswith(('.yaml', '.yml')) or f.startswith(('k8s', 'K8S'))]
+        kubeconfig_files = discover_kubeconfigs(current_kubeconfig_dir, clusters)
         if not kubeconfig_files:
-            console.print(f"\n[bold yellow]警告: 目录 {current_kubeconfig_dir} 中没有找到k8s kubeconfig文件[/bold yellow]")
+            message_console.print(f"\n[bold yellow]警告: 目录 {current_kubeconfig_dir} 中没有找到k8s kubeconfig文件[/bold yellow]")
             return
             
-        problem_pods = manager.list_problem_pods(namespace)
-        
-        console.print("\n[bold blue]Pod 状态检查报告[/bold blue]")
-        console.print(f"检查时间: [yellow]{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}[/yellow]")
-        if namespace:
-            console.print(f"命名空间: [cyan]{namespace}[/cyan]")
-        console.print("─" * 50)
-        
-        total_clusters = len(problem_pods)
-        clusters_with_problems = sum(1 for pods in problem_pods.values() if pods)
-        total_problem_pods = sum(len(pods) for pods in problem_pods.values())
-        
-        # 显示摘要信息
-        summary = Text()
-        summary.append("\n摘要信息:\n", style="bold")
-        summary.append(f"检查的集群总数: {total_clusters}\n", style="blue")
-        summary.append(f"发现问题的集群数: {clusters_with_problems}\n", style="yellow")
-        summary.append(f"问题Pod总数: {total_problem_pods}\n", style="red")
-        console.print(Panel(summary, title="检查结果摘要", border_style="blue"))
-        
-        # 显示详细信息
-        for cluster_name, pods in problem_pods.items():
-            panel_title = f"集群: {cluster_name}"
-            if pods:
-                table = create_pod_table(pods)
-                console.print(Panel(table, title=panel_title, border_style="red"))
-            else:
-                status_text = Text("\n✓ 未发现异常Pod\n", style="green")
-                console.print(Panel(status_text, title=panel_title, border_style="green"))
+        if summary_only:
+            summarize_problem_pods(manager, namespace, output)
+        elif output == OUTPUT_TABLE:
+            print_problem_pods(manager, namespace)
+        else:
+            stream_problem_pods(manager, namespace, output)
+
+        incomplete = print_cluster_status(manager, message_console)
+        # 只有扫描完整结束时才提交快照
+        if snapshot_writer is not None and incomplete:
+            message_console.print("[bold yellow]部分集群未完成，本次扫描不写入快照[/bold yellow]")
+        elif snapshot_writer is not None:
+            rows = snapshot_writer.commit()
+            message_console.print(f"快照已写入: [cyan]{snapshot_dir}[/cyan]（{rows} 个问题Pod）")
                 
     except Exception as e:
         logger.error(f"列出Pod时发生错误: {str(e)}")
-        console.print(f"\n[bold red]错误:[/bold red] {str(e)}")
+        message_console.print(f"\n[bold red]错误:[/bold red] {str(e)}")
         raise typer.Exit(1)
+    finally:
+        close_manager(manager, metrics_out)
+    # 结果不完整时以2退出，便于定时任务区分
+    if incomplete:
+        raise typer.Exit(2)
 
 @app.command()
 def clean_pods(
     namespace: Optional[str] = typer.Option(None, "--namespace", "-n", help="指定命名空间"),
     dry_run: bool = typer.Option(False, "--dry-run", help="试运行模式，不实际删除Pod"),
     kubeconfig_dir: Optional[str] = typer.Option(None, "--kubeconfig-dir", "-k", help="指定kubeconfig目录路径"),
+    clusters: Optional[List[str]] = typer.Option(None, "--cluster", "-c", help="只处理指定的集群（kubeconfig文件名去掉扩展名），可重复指定"),
+    rules_file: Optional[str] = typer.Option(RULES_FILE, "--rules", "-r", help="清理规则的YAML文件，默认按Pod状态Error/Unknown匹配"),
+    page_size: int = typer.Option(LIST_PAGE_SIZE, "--page-size", help="分页列出Pod时每页的数量，0表示不分页"),
+    fast_decode: bool = typer.Option(FAST_DECODE, "--fast-decode", help="直接解析原始JSON响应，跳过kubernetes模型反序列化"),
+    max_workers: Optional[int] = typer.Option(
+        None, "--max-workers", "-w",
+        help=f"并行处理集群和批次的最大线程数（默认{MAX_WORKERS}）；async引擎下为每个集群的最大并发请求数（默认{ASYNC_CLUSTER_CONCURRENCY}）",
+    ),
+    engine: str = typer.Option(ENGINE_SYNC, "--engine", "-e", help="集群管理引擎: sync（线程池）或 async（asyncio）"),
+    refresh: bool = typer.Option(False, "--refresh", help="忽略本地缓存，重新探测所有集群的版本和API地址"),
+    shard_namespaces: bool = typer.Option(SHARD_NAMESPACES, "--shard-namespaces", help="按命名空间分片并发扫描集群（仅sync引擎）"),
+    shard_workers: int = typer.Option(SHARD_WORKERS, "--shard-workers", help="分片扫描时每个集群的最大并发列表请求数"),
+    batch_size: int = typer.Option(BATCH_SIZE, "--batch-size", help="删除Pod时每个批次的数量"),
+    delete_qps: float = typer.Option(DELETE_QPS, "--delete-qps", help="每个集群每秒最多发出的删除请求数，0表示不限流"),
+    bulk_delete_min_pods: int = typer.Option(
+        BULK_DELETE_MIN_PODS, "--bulk-delete-min-pods",
+        help="同一命名空间、同一状态的问题Pod达到该数量时使用delete_collection批量删除，0表示禁用",
+    ),
+    metrics_out: Optional[str] = typer.Option(None, "--metrics-out", help="结束时将各集群的耗时、计数和延迟分布以JSON写入该文件"),
+    pool_size: int = typer.Option(HTTP_POOL_SIZE, "--pool-size", help="每个集群连接池的最大连接数，0表示按并发数设置"),
+    connect_timeout: float = typer.Option(CLUSTER_CONNECT_TIMEOUT, "--connect-timeout", help="建立连接的超时时间（秒）"),
+    request_timeout: float = typer.Option(REQUEST_TIMEOUT, "--request-timeout", help="单个API请求等待响应数据的超时时间（秒）"),
+    tcp_keepalive: bool = typer.Option(HTTP_KEEPALIVE, "--tcp-keepalive/--no-tcp-keepalive", help="对API服务器的连接开启TCP keepalive"),
+    gzip: bool = typer.Option(HTTP_GZIP, "--gzip/--no-gzip", help="请求gzip压缩的响应"),
+    http2: bool = typer.Option(HTTP2, "--http2", help="尝试使用HTTP/2（需要安装h2，仅sync引擎）"),
+    processes: int = typer.Option(FLEET_PROCESSES, "--processes", "-p", help="将集群分配给N个子进程处理，0表示在当前进程中处理（仅sync引擎）"),
+    resume: bool = typer.Option(False, "--resume", help="从上次中断的运行继续，跳过已完成的集群和已删除的Pod（仅sync引擎）"),
+    checkpoint_file: str = typer.Option(CHECKPOINT_FILE, "--checkpoint-file", help="记录清理进度的检查点文件"),
+    node_aware: bool = typer.Option(
+        NODE_AWARE, "--node-aware",
+        help="列出节点，失联（NotReady或已删除）节点上的问题Pod按节点分批强制删除（仅sync引擎）",
+    ),
+    dead_node_grace: float = typer.Option(DEAD_NODE_GRACE, "--dead-node-grace", help="节点NotReady持续超过该时间（秒）才确认为失联"),
+    deadline: Optional[float] = typer.Option(
+        None, "--deadline",
+        help=f"整个运行的截止时间（秒），到达后只返回已完成集群的结果并显示每个集群的状态，0表示不限制（默认{RUN_DEADLINE:g}，仅sync引擎）",
+    ),
+    schedule: Optional[bool] = typer.Option(
+        None, "--schedule/--no-schedule",
+        help=f"按运行历史从耗时最长的集群开始处理，并记录本次运行的耗时；使用--deadline时总是开启（默认{'开启' if SCHEDULE_BY_HISTORY else '关闭'}，仅sync引擎）",
+    ),
 ):
-    """删除所有集群中状态为Error或Unknown的Pod"""
+    """删除所有集群中满足清理规则的Pod（默认为状态为Error或Unknown的Pod）"""
+    if resume and engine == ENGINE_ASYNC:
+        raise typer.BadParameter("--resume 只支持sync引擎")
+    if resume and dry_run:
+        raise typer.BadParameter("--resume 不能与 --dry-run 同时使用")
+    if resume and processes:
+        raise typer.BadParameter("--resume 不能与 --processes 同时使用")
+
     # 检查kubeconfig目录是否存在且不为空
     if kubeconfig_dir:
         os.environ['KUBECONFIG_DIR'] = kubeconfig_dir
@@ -114,57 +452,180 @@ def clean_pods(
         console.print(f"\n[bold red]错误: kubeconfig目录不存在: {current_kubeconfig_dir}[/bold red]")
         return
         
+    manager = None
+    checkpoint = None
+    # 所有集群都完成或用户取消时删除检查点
+    remove_checkpoint = False
+    incomplete = False
     try:
-        manager = ClusterManager()
-            
         # 检查目录中是否有kubeconfig文件
-        kubeconfig_files = [f for f in os.listdir(current_kubeconfig_dir) 
-                          if f.endswith(('.yaml', '.yml')) or f.startswith(('k8s', 'K8S'))]
+        kubeconfig_files = discover_kubeconfigs(current_kubeconfig_dir, clusters)
         if not kubeconfig_files:
             console.print(f"\n[bold yellow]警告: 目录 {current_kubeconfig_dir} 中没有找到k8s kubeconfig文件[/bold yellow]")
             return
+
+        # 实际删除时记录检查点，进程被中断后可以使用--resume继续；多进程模式不记录检查点
+        if not dry_run and engine == ENGINE_SYNC and not processes:
+            from .checkpoint import CheckpointJournal
+            checkpoint = CheckpointJournal(
+                checkpoint_file, namespace=namespace, rules_file=rules_file,
+                clusters=[name for name, _ in kubeconfig_files], resume=resume,
+            )
+            if checkpoint.resumed:
+                console.print(f"[bold blue]从检查点继续: {checkpoint_file}[/bold blue]")
+        manager = create_manager(
+            engine,
+            refresh=refresh,
+            cluster_names=clusters,
+            rules_file=rules_file,
+            page_size=page_size,
+            fast_decode=fast_decode,
+            max_workers=max_workers,
+            batch_size=batch_size,
+            delete_qps=delete_qps,
+            bulk_delete_min_pods=bulk_delete_min_pods,
+            shard_namespaces=shard_namespaces,
+            shard_workers=shard_workers,
+            pool_size=pool_size,
+            connect_timeout=connect_timeout,
+            request_timeout=request_timeout,
+            tcp_keepalive=tcp_keepalive,
+            gzip=gzip,
+            http2=http2,
+            checkpoint=checkpoint,
+            processes=processes,
+            node_aware=node_aware,
+            dead_node_grace=dead_node_grace,
+            deadline=deadline,
+            schedule=schedule,
+        )
             
         # 首先显示要删除的Pod
         problem_pods = manager.list_problem_pods(namespace)
         total_pods = sum(len(pods) for pods in problem_pods.values())
+        # 截止时间前没有列完的集群不会被清理
+        incomplete = print_cluster_status(manager, console)
         
         if total_pods == 0:
             console.print("[bold green]没有发现需要清理的Pod[/bold green]")
-            return
-            
-        console.print(f"\n[bold yellow]发现 {total_pods} 个问题Pod需要清理:[/bold yellow]")
-        for cluster_name, pods in problem_pods.items():
-            if pods:
-                console.print(f"\n[bold blue]集群: {cluster_name}[/bold blue]")
-                table = create_pod_table(pods)
-                console.print(table)
-        
-        # 如果不是试运行，请求确认
-        if not dry_run:
-            confirm = typer.confirm("\n确定要删除这些Pod吗?")
-            if not confirm:
-                console.print("[bold yellow]操作已取消[/bold yellow]")
-                return
-        
-        # 执行删除操作
-        stats = manager.delete_problem_pods(namespace, dry_run)
-        
-        # 显示结果
-        console.print("\n[bold blue]清理结果:[/bold blue]")
-        for cluster_name, result in stats.items():
-            status = "[bold green]成功[/bold green]" if result['failed'] == 0 else "[bold red]部分失败[/bold red]"
-            console.print(f"集群 {cluster_name}: {status}")
-            console.print(f"  总计: {result['total']}")
-            console.print(f"  成功: {result['success']}")
-            console.print(f"  失败: {result['failed']}")
+            remove_checkpoint = not incomplete
+        else:
+            console.print(f"\n[bold yellow]发现 {total_pods} 个问题Pod需要清理:[/bold yellow]")
+            for cluster_name, pods in problem_pods.items():
+                if pods:
+                    console.print(f"\n[bold blue]集群: {cluster_name}[/bold blue]")
+                    table = create_pod_table(pods)
+                    console.print(table)
+        
+            # 如果不是试运行，请求确认
+            if not dry_run:
+                asked_at = time.time()
+                confirm = typer.confirm("\n确定要删除这些Pod吗?")
+                if not confirm:
+                    console.print("[bold yellow]操作已取消[/bold yellow]")
+                    # 之后的--resume不应沿用这次列出、但没有确认的候选Pod
+                    remove_checkpoint = True
+                    return
+                # 等待确认的时间不计入截止时间
+                if getattr(manager, 'deadline_at', None) is not None:
+                    manager.extend_deadline(time.time() - asked_at)
+        
+            # 只删除上面显示过的Pod，不再重新列出；每个集群完成后立即显示结果
+            console.print("\n[bold blue]清理结果:[/bold blue]")
+            for cluster_name, result in manager.iter_delete_problem_pods(namespace, dry_run, candidates=problem_pods):
+                status = "[bold green]成功[/bold green]" if result['failed'] == 0 else "[bold red]部分失败[/bold red]"
+                console.print(f"集群 {cluster_name}: {status}")
+                console.print(f"  总计: {result['total']}")
+                console.print(f"  成功: {result['success']}")
+                console.print(f"  失败: {result['failed']}")
+                if result.get('skipped'):
+                    console.print(f"  跳过: {result['skipped']}")
+                if 'p50_ms' in result:
+                    console.print(f"  延迟: p50 {result['p50_ms']}ms / p90 {result['p90_ms']}ms / p99 {result['p99_ms']}ms")
+            incomplete = print_cluster_status(manager, console) or incomplete
+        
+            if checkpoint is not None:
+                remove_checkpoint = checkpoint.finished(manager.clusters)
+                if not remove_checkpoint:
+                    console.print(f"[bold yellow]部分集群未完成，可以使用 --resume 继续: {checkpoint_file}[/bold yellow]")
             
     except Exception as e:
         logger.error(f"清理Pod时发生错误: {str(e)}")
         raise typer.Exit(1)
+    finally:
+        close_manager(manager, metrics_out)
+        if checkpoint is not None:
+            checkpoint.close(remove=remove_checkpoint)
+    if incomplete:
+        raise typer.Exit(2)
+
+@app.command()
+def report(
+    by: List[str] = typer.Option(
+        ["namespace", "reason"], "--by", "-b",
+        help="分组的列，可重复指定: cluster、namespace、node、reason、rule",
+    ),
+    top: int = typer.Option(20, "--top", "-t", help="只显示出现次数最多的前N组，0表示全部显示"),
+    since: Optional[str] = typer.Option(None, "--since", "-s", help="只统计该时间之后的快照，如 24h、7d、2w 或 ISO 格式的日期"),
+    cluster: Optional[str] = typer.Option(None, "--cluster", "-c", help="只统计该集群"),
+    namespace: Optional[str] = typer.Option(None, "--namespace", "-n", help="只统计该命名空间"),
+    reason: Optional[str] = typer.Option(None, "--reason", help="只统计该原因（如OOMKilled）"),
+    rule: Optional[str] = typer.Option(None, "--rule", help="只统计匹配该规则的Pod"),
+    snapshot_dir: str = typer.Option(SNAPSHOT_DIR, "--snapshot-dir", help="快照存储目录"),
+    output: str = typer.Option(OUTPUT_TABLE, "--output", "-o", help="输出格式: table、json、ndjson 或 csv"),
+):
+    """查询list-pods写入的快照，按列分组统计问题Pod出现的次数，不连接集群"""
+    from .snapshot_store import SnapshotStore, parse_since
+
+    if output not in OUTPUT_FORMATS:
+        raise typer.BadParameter(f"不支持的输出格式: {output}，可选值: {', '.join(OUTPUT_FORMATS)}")
+    try:
+        since_ts = parse_since(since) if since else None
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    filters = {
+        column: value
+        for column, value in (('cluster', cluster), ('namespace', namespace), ('reason', reason), ('rule', rule))
+        if value is not None
+    }
+
+    store = SnapshotStore(snapshot_dir)
+    snapshots = store.snapshots(since_ts)
+    try:
+        rows = store.query(by, since_ts, filters, top)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    fields = tuple(by) + ('count', 'snapshots', 'last_seen')
+    if output != OUTPUT_TABLE:
+        writer = RecordWriter(output, fields)
+        for row in rows:
+            writer.write(row)
+        writer.close()
+        return
+
+    if not snapshots:
+        console.print(f"[bold yellow]快照存储 {snapshot_dir} 中没有符合条件的快照，可以使用 list-pods --snapshot 写入[/bold yellow]")
+        return
+    # 与最近出现的时间一样使用UTC
+    first = datetime.fromtimestamp(snapshots[0][0], timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    last = datetime.fromtimestamp(snapshots[-1][0], timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    table = Table(show_header=True, header_style="bold magenta", box=ROUNDED)
+    for column in by:
+        table.add_column(column, style="cyan")
+    table.add_column("次数", style="red", justify="right")
+    table.add_column("快照数", style="yellow", justify="right")
+    table.add_column("最近出现", style="green")
+    for row in rows:
+        table.add_row(*(row[column] or '-' for column in by), str(row['count']), str(row['snapshots']), row['last_seen'])
+    console.print(Panel(table, title=f"{len(snapshots)} 个快照（{first} ~ {last} UTC）", border_style="blue"))
 
 @app.command()
 def cluster_info(
     kubeconfig_dir: Optional[str] = typer.Option(None, "--kubeconfig-dir", "-k", help="指定kubeconfig目录路径"),
+    clusters: Optional[List[str]] = typer.Option(None, "--cluster", "-c", help="只处理指定的集群（kubeconfig文件名去掉扩展名），可重复指定"),
+    engine: str = typer.Option(ENGINE_SYNC, "--engine", "-e", help="集群管理引擎: sync（线程池）或 async（asyncio）"),
+    refresh: bool = typer.Option(False, "--refresh", help="忽略本地缓存，重新探测所有集群的版本和API地址"),
 ):
     """显示所有集群的Kubernetes版本和API地址信息"""
     # 检查kubeconfig目录是否存在且不为空
@@ -176,12 +637,12 @@ def cluster_info(
         console.print(f"\n[bold red]错误: kubeconfig目录不存在: {current_kubeconfig_dir}[/bold red]")
         return
         
+    manager = None
     try:
-        manager = ClusterManager()
+        manager = create_manager(engine, refresh=refresh, cluster_names=clusters)
             
         # 检查目录中是否有kubeconfig文件
-        kubeconfig_files = [f for f in os.listdir(current_kubeconfig_dir) 
-                          if f.endswith(('.yaml', '.yml')) or f.startswith(('k8s', 'K8S'))]
+        kubeconfig_files = discover_kubeconfigs(current_kubeconfig_dir, clusters)
         if not kubeconfig_files:
             console.print(f"\n[bold yellow]警告: 目录 {current_kubeconfig_dir} 中没有找到k8s kubeconfig文件[/bold yellow]")
             return
@@ -214,6 +675,103 @@ def cluster_info(
     except Exception as e:
         logger.error(f"获取集群信息时发生错误: {str(e)}")
         raise typer.Exit(1)
+    finally:
+        close_manager(manager)
+
+@app.command()
+def daemon(
+    namespace: Optional[str] = typer.Option(None, "--namespace", "-n", help="指定命名空间"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="试运行模式，只记录将要删除的Pod"),
+    kubeconfig_dir: Optional[str] = typer.Option(None, "--kubeconfig-dir", "-k", help="指定kubeconfig目录路径"),
+    clusters: Optional[List[str]] = typer.Option(None, "--cluster", "-c", help="只处理指定的集群（kubeconfig文件名去掉扩展名），可重复指定"),
+    rules_file: Optional[str] = typer.Option(RULES_FILE, "--rules", "-r", help="清理规则的YAML文件，默认按Pod状态Error/Unknown匹配"),
+    page_size: int = typer.Option(LIST_PAGE_SIZE, "--page-size", help="重新列出Pod时每页的数量，0表示不分页"),
+    fast_decode: bool = typer.Option(FAST_DECODE, "--fast-decode", help="直接解析原始JSON响应，跳过kubernetes模型反序列化"),
+    max_workers: Optional[int] = typer.Option(None, "--max-workers", "-w", help=f"每个集群并行删除的最大线程数（默认{MAX_WORKERS}）"),
+    batch_size: int = typer.Option(BATCH_SIZE, "--batch-size", help="每次从删除队列取出的最大Pod数量"),
+    delete_qps: float = typer.Option(DELETE_QPS, "--delete-qps", help="每个集群每秒最多发出的删除请求数，0表示不限流"),
+    watch_timeout: int = typer.Option(WATCH_TIMEOUT, "--watch-timeout", help="单次watch请求的超时时间（秒）"),
+    refresh: bool = typer.Option(False, "--refresh", help="忽略本地缓存，重新探测所有集群的版本和API地址"),
+    metrics_port: int = typer.Option(METRICS_PORT, "--metrics-port", help="在该端口提供Prometheus /metrics接口，0表示不开启"),
+    metrics_textfile: Optional[str] = typer.Option(
+        METRICS_TEXTFILE, "--metrics-textfile", help="输出汇总日志时将指标写入该Prometheus textfile",
+    ),
+    metrics_out: Optional[str] = typer.Option(None, "--metrics-out", help="结束时将各集群的耗时、计数和延迟分布以JSON写入该文件"),
+    pool_size: int = typer.Option(HTTP_POOL_SIZE, "--pool-size", help="每个集群连接池的最大连接数，0表示按并发数设置"),
+    connect_timeout: float = typer.Option(CLUSTER_CONNECT_TIMEOUT, "--connect-timeout", help="建立连接的超时时间（秒）"),
+    request_timeout: float = typer.Option(REQUEST_TIMEOUT, "--request-timeout", help="单个API请求等待响应数据的超时时间（秒）"),
+    tcp_keepalive: bool = typer.Option(HTTP_KEEPALIVE, "--tcp-keepalive/--no-tcp-keepalive", help="对API服务器的连接开启TCP keepalive"),
+    gzip: bool = typer.Option(HTTP_GZIP, "--gzip/--no-gzip", help="请求gzip压缩的响应"),
+    http2: bool = typer.Option(HTTP2, "--http2", help="尝试使用HTTP/2（需要安装h2，仅sync引擎）"),
+    watch_kubeconfigs: bool = typer.Option(
+        KUBECONFIG_WATCH, "--watch-kubeconfigs/--no-watch-kubeconfigs",
+        help="监听kubeconfig目录，只为新增、更新或删除的kubeconfig启动、重建或停止对应的集群",
+    ),
+    kubeconfig_poll_interval: float = typer.Option(
+        KUBECONFIG_POLL_INTERVAL, "--kubeconfig-poll-interval",
+        help="轮询kubeconfig目录的间隔（秒）；可用inotify时按该间隔兜底扫描",
+    ),
+):
+    """常驻运行，watch所有集群并在问题Pod出现时删除"""
+    from .daemon import PodCleanupDaemon
+    from .kubeconfig_registry import KubeconfigRegistry
+
+    if kubeconfig_dir:
+        os.environ['KUBECONFIG_DIR'] = kubeconfig_dir
+        
+    current_kubeconfig_dir = get_kubeconfig_dir()
+    if not os.path.exists(current_kubeconfig_dir):
+        console.print(f"\n[bold red]错误: kubeconfig目录不存在: {current_kubeconfig_dir}[/bold red]")
+        return
+        
+    manager = None
+    try:
+        manager = create_manager(
+            ENGINE_SYNC,
+            refresh=refresh,
+            cluster_names=clusters,
+            rules_file=rules_file,
+            page_size=page_size,
+            fast_decode=fast_decode,
+            max_workers=max_workers,
+            batch_size=batch_size,
+            delete_qps=delete_qps,
+            pool_size=pool_size,
+            connect_timeout=connect_timeout,
+            request_timeout=request_timeout,
+            tcp_keepalive=tcp_keepalive,
+            gzip=gzip,
+            http2=http2,
+        )
+        registry = None
+        if watch_kubeconfigs:
+            # 监听目录时允许从空目录启动，之后加入的kubeconfig会被自动加载
+            registry = KubeconfigRegistry(current_kubeconfig_dir, clusters, poll_interval=kubeconfig_poll_interval)
+        elif not manager.clusters:
+            console.print(f"\n[bold yellow]警告: 目录 {current_kubeconfig_dir} 中没有可用的集群[/bold yellow]")
+            return
+        
+        cleaner = PodCleanupDaemon(
+            manager,
+            namespace=namespace,
+            dry_run=dry_run,
+            watch_timeout=watch_timeout,
+            metrics_port=metrics_port,
+            metrics_textfile=metrics_textfile,
+            registry=registry,
+        )
+        # 收到SIGTERM（如Pod被驱逐）时正常退出
+        signal.signal(signal.SIGTERM, lambda signum, frame: cleaner.stop())
+        try:
+            cleaner.run_forever()
+        except KeyboardInterrupt:
+            cleaner.stop()
+        
+    except Exception as e:
+        logger.error(f"daemon运行时发生错误: {str(e)}")
+        raise typer.Exit(1)
+    finally:
+        close_manager(manager, metrics_out)
 
 def main():
     try:
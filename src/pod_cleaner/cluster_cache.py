@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from .config import CLUSTER_CACHE_FILE, CLUSTER_CACHE_TTL
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def file_fingerprint(path: str) -> Dict:
+    """
+    计算文件指纹
+
+    Returns:
+        Dict: 文件的mtime_ns、size和sha256
+    """
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': digest}
+
+class ClusterInfoCache:
+    """
+    集群元数据的本地缓存
+
+    以kubeconfig文件的绝对路径为键，保存集群的版本和API地址信息，
+    kubeconfig文件内容变化或超过有效期后缓存失效。可在多个线程间共享。
+    """
+
+    def __init__(self, path: str = CLUSTER_CACHE_FILE, ttl: float = CLUSTER_CACHE_TTL):
+        """
+        初始化缓存
+
+        Args:
+            path: 缓存文件路径
+            ttl: 缓存有效期（秒），0表示禁用缓存
+        """
+        self.path = path
+        self.ttl = ttl
+        self._entries: Dict[str, Dict] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if self.enabled:
+            self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _load(self) -> None:
+        """读取缓存文件，文件不存在或损坏时使用空缓存"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self._entries = entries
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取集群缓存失败，将重新探测所有集群: {str(e)}")
+
+    def get(self, kubeconfig_path: str) -> Optional[Dict]:
+        """
+        获取kubeconfig对应的集群信息
+
+        mtime和大小不变时直接命中；mtime变化但内容哈希不变时仍然命中。
+
+        Returns:
+            Optional[Dict]: 集群信息，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+        key = os.path.abspath(kubeconfig_path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.time() - entry.get('cached_at', 0) > self.ttl:
+            return None
+
+        try:
+            stat = os.stat(key)
+            if stat.st_mtime_ns == entry.get('mtime_ns') and stat.st_size == entry.get('size'):
+                return entry.get('info')
+            fingerprint = file_fingerprint(key)
+        except OSError:
+            return None
+        if fingerprint['sha256'] != entry.get('sha256'):
+            return None
+        with self._lock:
+            entry.update(fingerprint)
+            self._dirty = True
+        return entry.get('info')
+
+    def put(self, kubeconfig_path: str, info: Dict) -> None:
+        """
+        写入kubeconfig对应的集群信息
+        """
+        if not self.enabled:
+            return
+        key = os.path.abspath(kubeconfig_path)
+        try:
+            entry = file_fingerprint(key)
+        except OSError:
+            return
+        entry['cached_at'] = time.time()
+        entry['info'] = info
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty = True
+
+    def discard(self, kubeconfig_path: str) -> None:
+        """
+        删除kubeconfig对应的缓存条目，用于已经被删除的kubeconfig
+        """
+        key = os.path.abspath(kubeconfig_path)
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        """
+        有变化时写回缓存文件，先写临时文件再替换，避免并发读取到不完整的内容
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"写入集群缓存失败: {str(e)}")
@@ -1,102 +1,887 @@
 import os
-from typing import List, Dict, Optional
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Set, Tuple
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
-from .config import KUBECONFIG_DIR, POD_ERROR_STATES
+from .config import (
+    get_kubeconfig_dir,
+    CLUSTER_LOAD_WORKERS,
+    CLUSTER_CONNECT_TIMEOUT,
+    LIST_PAGE_SIZE,
+    FAST_DECODE,
+    MAX_WORKERS,
+    BATCH_SIZE,
+    REQUEST_TIMEOUT,
+    DELETE_QPS,
+    BULK_DELETE_MIN_PODS,
+    CLUSTER_CACHE_TTL,
+    RULES_FILE,
+    SHARD_NAMESPACES,
+    SHARD_WORKERS,
+    SHARD_LATENCY_TARGET,
+    LIST_MAX_RETRIES,
+    STREAM_QUEUE_SIZE,
+    HTTP_POOL_SIZE,
+    HTTP_KEEPALIVE,
+    HTTP_GZIP,
+    HTTP2,
+    NODE_AWARE,
+    DEAD_NODE_GRACE,
+    RUN_DEADLINE,
+)
+from .batch_processor import BatchProcessor
+from .checkpoint import CheckpointJournal
+from .cluster_cache import ClusterInfoCache
+from .deleter import RETRYABLE_STATUS, PodDeleter, backoff_delay
+from .http_tuning import enable_http2, tune_api_client
+from .kubeconfig import resolve_kubeconfigs
+from .kubeconfig_registry import KubeconfigChanges
 from .logger import setup_logger
+from .metrics import MetricsRegistry
+from .nodes import decode_node_list, index_pods_by_dead_node
+from .pod_record import PodListPage, PodRecord, decode_pod_list
+from .rate_limit import AdaptiveConcurrencyLimiter
+from .rules import Rule, RuleSet, match_rules, problem_pod_dict
+from .scheduler import ClusterHistory, RunSchedule
+from .snapshot_store import SnapshotWriter
 
 logger = setup_logger(__name__)
 
+class ClusterClients(Mapping):
+    """
+    按需创建的集群客户端
+
+    键为集群名称，第一次访问某个集群时才解析其kubeconfig并创建客户端，
+    可在多个线程间共享。判断集群是否存在和遍历集群名称都不会创建客户端。
+    """
+
+    def __init__(self, kubeconfigs: Dict[str, str], factory: Callable[[str], client.CoreV1Api]):
+        """
+        Args:
+            kubeconfigs: 集群名称到kubeconfig路径的映射
+            factory: 根据集群名称创建客户端的函数
+        """
+        self.kubeconfigs = kubeconfigs
+        self._factory = factory
+        self._clients: Dict[str, client.CoreV1Api] = {}
+        self._locks = {name: threading.Lock() for name in kubeconfigs}
+
+    def __getitem__(self, cluster_name: str) -> client.CoreV1Api:
+        api = self._clients.get(cluster_name)
+        if api is not None:
+            return api
+        with self._locks[cluster_name]:
+            api = self._clients.get(cluster_name)
+            if api is None:
+                api = self._factory(cluster_name)
+                self._clients[cluster_name] = api
+                logger.info(f"成功加载集群配置: {cluster_name}")
+        return api
+
+    def __contains__(self, cluster_name: object) -> bool:
+        return cluster_name in self.kubeconfigs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.kubeconfigs)
+
+    def __len__(self) -> int:
+        return len(self.kubeconfigs)
+
+    def loaded(self) -> Dict[str, client.CoreV1Api]:
+        """
+        已经创建的客户端
+        """
+        return dict(self._clients)
+
+    def reload(self, kubeconfigs: Dict[str, str], stale: Iterable[str]) -> None:
+        """
+        替换集群列表并关闭指定集群已创建的客户端
+
+        其他集群的客户端保持不变；被关闭的集群下次访问时按新的kubeconfig重新创建。
+
+        Args:
+            kubeconfigs: 新的集群名称到kubeconfig路径的映射（不会被原地修改）
+            stale: kubeconfig已更新或已删除的集群名称
+        """
+        # 先为新增的集群创建锁，再替换映射，并发的__getitem__总能找到锁
+        for name in kubeconfigs:
+            self._locks.setdefault(name, threading.Lock())
+        self.kubeconfigs = kubeconfigs
+        for name in stale:
+            lock = self._locks.get(name)
+            if lock is None:
+                continue
+            with lock:
+                api = self._clients.pop(name, None)
+            if api is not None:
+                # 正在进行的请求不受影响，连接归还时被丢弃
+                api.api_client.close()
+                logger.info(f"已关闭集群客户端: {name}")
+
 class ClusterManager:
-    def __init__(self):
-        """初始化集群管理器"""
-        self.clusters: Dict[str, client.CoreV1Api] = {}
-        self.version_apis: Dict[str, Dict] = {}
-        self._load_all_clusters()
-    
-    def _load_all_clusters(self) -> None:
-        """加载所有kubeconfig文件并初始化客户端"""
-        if not os.path.exists(KUBECONFIG_DIR):
-            logger.error(f"Kubeconfig目录不存在: {KUBECONFIG_DIR}")
-            return
+    def __init__(
+        self,
+        kubeconfig_dir: Optional[str] = None,
+        load_workers: int = CLUSTER_LOAD_WORKERS,
+        connect_timeout: float = CLUSTER_CONNECT_TIMEOUT,
+        page_size: int = LIST_PAGE_SIZE,
+        fast_decode: bool = FAST_DECODE,
+        max_workers: int = MAX_WORKERS,
+        batch_size: int = BATCH_SIZE,
+        request_timeout: float = REQUEST_TIMEOUT,
+        delete_qps: float = DELETE_QPS,
+        bulk_delete_min_pods: int = BULK_DELETE_MIN_PODS,
+        cache_ttl: float = CLUSTER_CACHE_TTL,
+        refresh: bool = False,
+        cluster_names: Optional[Iterable[str]] = None,
+        rules_file: Optional[str] = RULES_FILE,
+        shard_namespaces: bool = SHARD_NAMESPACES,
+        shard_workers: int = SHARD_WORKERS,
+        shard_latency_target: float = SHARD_LATENCY_TARGET,
+        metrics: Optional[MetricsRegistry] = None,
+        pool_size: int = HTTP_POOL_SIZE,
+        tcp_keepalive: bool = HTTP_KEEPALIVE,
+        gzip: bool = HTTP_GZIP,
+        http2: bool = HTTP2,
+        checkpoint: Optional[CheckpointJournal] = None,
+        node_aware: bool = NODE_AWARE,
+        dead_node_grace: float = DEAD_NODE_GRACE,
+        snapshot: Optional[SnapshotWriter] = None,
+        deadline: float = RUN_DEADLINE,
+        history_file: Optional[str] = None,
+    ):
+        """
+        初始化集群管理器
+        
+        Args:
+            kubeconfig_dir: kubeconfig目录路径，默认读取KUBECONFIG_DIR
+            load_workers: 并行加载集群的最大线程数
+            connect_timeout: 建立连接的超时时间（秒），也是探测集群的超时时间
+            page_size: 分页列出Pod时每页的数量，0表示不分页
+            fast_decode: 是否直接解析原始JSON响应，跳过kubernetes模型反序列化
+            max_workers: 并行扫描和删除时的最大线程数（集群之间、集群内部各自使用）
+            batch_size: 删除Pod时每个批次的数量
+            request_timeout: 单个API请求等待响应数据的超时时间（秒）
+            delete_qps: 每个集群每秒最多发出的删除请求数，0表示不限流
+            bulk_delete_min_pods: 使用delete_collection批量删除的最小Pod数量，0表示禁用
+            cache_ttl: 集群元数据缓存的有效期（秒），0表示禁用缓存
+            refresh: 是否忽略缓存，重新探测所有集群
+            cluster_names: 可选的集群名称列表，只管理这些集群
+            rules_file: 清理规则的YAML文件，为空时使用POD_ERROR_STATES作为规则
+            shard_namespaces: 是否按命名空间分片扫描集群
+            shard_workers: 分片扫描时每个集群同时发出的最大列表请求数
+            shard_latency_target: 分片扫描的目标请求耗时（秒），超过时减小并发
+            metrics: 记录各阶段耗时和计数的指标，默认新建
+            pool_size: 每个集群连接池的最大连接数，0表示按并发线程数设置
+            tcp_keepalive: 是否对API服务器的连接开启TCP keepalive
+            gzip: 列表请求是否请求gzip压缩的响应
+            http2: 是否尝试使用HTTP/2
+            checkpoint: 可选的检查点日志，记录列出和删除的进度，并跳过已完成的部分
+            node_aware: 删除前是否列出节点，失联节点上的问题Pod按节点分批强制删除
+            dead_node_grace: 节点NotReady持续超过该时间（秒）才确认为失联
+            snapshot: 可选的快照缓冲，扫描到的问题Pod写入其中，由调用方提交
+            deadline: 从创建时开始计算的截止时间（秒），到达后列出和删除只返回已完成集群的结果，0表示不限制
+            history_file: 每个集群运行历史的文件，用于按耗时从长到短安排集群，为空时不读写文件，只在内存中记录
+        """
+        self.kubeconfig_dir = kubeconfig_dir or get_kubeconfig_dir()
+        self.load_workers = load_workers
+        self.connect_timeout = connect_timeout
+        self.page_size = page_size
+        self.fast_decode = fast_decode
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.request_timeout = request_timeout
+        self.delete_qps = delete_qps
+        self.bulk_delete_min_pods = bulk_delete_min_pods
+        self.refresh = refresh
+        self.cache = ClusterInfoCache(ttl=cache_ttl)
+        self.rules = RuleSet.load(rules_file) if rules_file else RuleSet.default()
+        self.shard_namespaces = shard_namespaces
+        self.shard_workers = shard_workers
+        self.shard_latency_target = shard_latency_target
+        self.metrics = metrics or MetricsRegistry()
+        # 连接池与同时发出请求的线程数一致，多余的连接不会在归还时被丢弃后重新握手
+        self.pool_size = pool_size or max(max_workers, shard_workers if shard_namespaces else 0)
+        self.tcp_keepalive = tcp_keepalive
+        self.gzip = gzip
+        self.http2 = enable_http2() if http2 else False
+        self.checkpoint = checkpoint
+        self.node_aware = node_aware
+        self.dead_node_grace = dead_node_grace
+        self.snapshot = snapshot
+        self.deadline_at = time.time() + deadline if deadline else None
+        self.history = ClusterHistory(history_file)
+        # 最近一次列出或删除的调度，记录每个集群的状态
+        self.schedule: Optional[RunSchedule] = None
+        self.kubeconfigs = resolve_kubeconfigs(self.kubeconfig_dir, cluster_names)
+        # 客户端在第一次使用时才创建，不会连接没有用到的集群
+        self.clusters = ClusterClients(self.kubeconfigs, self._build_core_api)
+        self.version_apis: Optional[Dict[str, Dict]] = None
+    
+    def _build_core_api(self, cluster_name: str) -> client.CoreV1Api:
+        """
+        解析集群的kubeconfig并创建独立的API客户端
+        
+        配置写入独立的Configuration对象，不修改进程全局的默认配置，
+        因此多个集群可以并行加载。
+        """
+        configuration = client.Configuration()
+        with self.metrics.timer(cluster_name, 'connect'):
+            config.load_kube_config(config_file=self.kubeconfigs[cluster_name], client_configuration=configuration)
+        # 不可达的集群直接失败，不做连接重试
+        configuration.retries = 0
+        configuration.connection_pool_maxsize = self._cluster_workers(cluster_name, self.pool_size)
+        api_client = client.ApiClient(configuration)
+        tune_api_client(api_client, self.tcp_keepalive, self.gzip)
+        return client.CoreV1Api(api_client)
+    
+    @property
+    def request_timeouts(self) -> Tuple[float, float]:
+        """
+        API请求的（连接超时, 读取超时）
+
+        kubernetes客户端只接受整数或二元组形式的_request_timeout，浮点数会被忽略。
+        设置了截止时间时，读取超时不超过剩余的时间，无响应的API服务器不会让运行超过截止时间。
+        """
+        if self.deadline_at is None:
+            return (self.connect_timeout, self.request_timeout)
+        return (self.connect_timeout, max(1.0, min(self.request_timeout, self.deadline_at - time.time())))
+    
+    def _check_deadline(self, cluster_name: str) -> None:
+        """
+        到达截止时间时中止集群的处理
+
+        Raises:
+            TimeoutError: 已经到达截止时间
+        """
+        if self.deadline_at is not None and time.time() >= self.deadline_at:
+            raise TimeoutError(f"已到达截止时间，中止集群 {cluster_name} 的处理")
+    
+    def extend_deadline(self, seconds: float) -> None:
+        """
+        推迟截止时间，用于不应计入截止时间的等待（如clean-pods等待用户确认删除）
+
+        Args:
+            seconds: 推迟的秒数，没有设置截止时间时忽略
+        """
+        if self.deadline_at is not None:
+            self.deadline_at += seconds
+    
+    def _new_schedule(self, cluster_names: List[str], operation: str) -> RunSchedule:
+        """
+        按运行历史安排本次处理的集群，保存在self.schedule中，调用方可以查看每个集群的状态
+        """
+        self.schedule = RunSchedule(cluster_names, self.history, operation, self.deadline_at)
+        return self.schedule
+    
+    def _cluster_workers(self, cluster_name: str, base: int) -> int:
+        """
+        集群内部的并发数，按调度中该集群的预期耗时从默认值base调整
+        """
+        schedule = self.schedule
+        return base if schedule is None else schedule.workers(cluster_name, base)
+    
+    def _cluster_ok(self, cluster_name: str, result: Dict) -> bool:
+        """
+        _scan_cluster的结果是否表示成功，检查点中已完成的集群同样视为成功
+        """
+        return bool(result) or (self.checkpoint is not None and self.checkpoint.is_done(cluster_name))
+    
+    def _probe_cluster(self, cluster_name: str) -> Dict:
+        """
+        获取单个集群的版本和API信息
+        
+        缓存中有该kubeconfig的有效信息时直接返回，不创建客户端，也不连接集群。
+        
+        Args:
+            cluster_name: 集群名称
             
-        for filename in os.listdir(KUBECONFIG_DIR):
-            # 跳过隐藏文件
-            if filename.startswith('.'):
+        Returns:
+            Dict: 版本信息
+        """
+        kubeconfig_path = self.kubeconfigs[cluster_name]
+        cached = None if self.refresh else self.cache.get(kubeconfig_path)
+        if cached is not None:
+            return cached
+        
+        core_api = self.clusters[cluster_name]
+        version_api = client.VersionApi(core_api.api_client)
+        with self.metrics.timer(cluster_name, 'connect'):
+            # 测试连接
+            core_api.list_namespace(limit=1, _request_timeout=(self.connect_timeout, self.connect_timeout))
+            # 获取版本信息
+            version_info = version_api.get_code(_request_timeout=(self.connect_timeout, self.connect_timeout))
+        
+        info = {
+            'version': version_info.git_version,
+            'build_date': version_info.build_date,
+            'platform': version_info.platform,
+            'api_server': core_api.api_client.configuration.host or "未知",
+        }
+        self.cache.put(kubeconfig_path, info)
+        return info
+    
+    def close(self) -> None:
+        """关闭已创建的API客户端及其连接池"""
+        for api in self.clusters.loaded().values():
+            api.api_client.close()
+    
+    def get_cluster_info(self) -> Dict[str, Dict]:
+        """
+        获取所有集群的版本和API信息
+        
+        优先读取本地缓存，只并行探测缓存未命中的集群，探测失败的集群不会出现在结果中。
+        
+        Returns:
+            Dict[str, Dict]: 按集群名称组织的版本和API信息
+        """
+        if self.version_apis is not None:
+            return self.version_apis
+        
+        version_apis = self._probe_clusters(list(self.kubeconfigs))
+        # 按集群名称排序，与kubeconfig目录的顺序一致
+        self.version_apis = {name: version_apis[name] for name in self.kubeconfigs if name in version_apis}
+        return self.version_apis
+    
+    def _probe_clusters(self, cluster_names: List[str]) -> Dict[str, Dict]:
+        """
+        并行探测指定的集群并写回缓存，探测失败的集群不会出现在结果中
+        """
+        results: Dict[str, Dict] = {}
+        if not cluster_names:
+            return results
+        
+        workers = max(1, min(self.load_workers, len(cluster_names)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_cluster = {
+                executor.submit(self._probe_cluster, cluster_name): cluster_name
+                for cluster_name in cluster_names
+            }
+            for future in as_completed(future_to_cluster):
+                cluster_name = future_to_cluster[future]
+                try:
+                    results[cluster_name] = future.result()
+                except Exception as e:
+                    logger.error(f"获取集群信息失败 {cluster_name}: {str(e)}")
+        
+        self.cache.save()
+        return results
+    
+    def apply_kubeconfig_changes(self, changes: KubeconfigChanges) -> None:
+        """
+        应用kubeconfig目录的变化，只重建受影响的集群
+        
+        新增的集群加入集群列表；更新和删除的集群关闭已创建的客户端并丢弃其版本信息，
+        其他集群的客户端、连接和版本信息保持不变。已经获取过版本信息时只探测新增和更新的集群。
+        
+        Args:
+            changes: KubeconfigRegistry.scan()返回的变化
+        """
+        if not changes:
+            return
+        kubeconfigs = dict(self.kubeconfigs)
+        for cluster_name in changes.removed:
+            path = kubeconfigs.pop(cluster_name, None)
+            if path is not None:
+                self.cache.discard(path)
+        kubeconfigs.update(changes.added)
+        kubeconfigs.update(changes.changed)
+        kubeconfigs = dict(sorted(kubeconfigs.items()))
+        
+        # 替换而不是原地修改映射，正在遍历集群列表的线程不受影响
+        self.kubeconfigs = kubeconfigs
+        self.clusters.reload(kubeconfigs, list(changes.changed) + list(changes.removed))
+        
+        if self.version_apis is None:
+            self.cache.save()
+            return
+        version_apis = {
+            name: info for name, info in self.version_apis.items()
+            if name in kubeconfigs and name not in changes.changed
+        }
+        version_apis.update(self._probe_clusters(list(changes.added) + list(changes.changed)))
+        self.version_apis = {name: version_apis[name] for name in kubeconfigs if name in version_apis}
+    
+    def _list_pods_page(self, cluster_name: str, namespace: Optional[str], **kwargs) -> PodListPage:
+        """
+        获取一页Pod并转换为精简记录
+        
+        开启fast_decode时请求原始响应（_preload_content=False），
+        直接解析JSON，跳过kubernetes模型的反序列化。
+        请求、解码的耗时和解压后的响应大小记录到metrics中。
+        
+        Returns:
+            PodListPage: Pod记录列表、continue token和resourceVersion
+        """
+        api = self.clusters[cluster_name]
+        kwargs.setdefault('_request_timeout', self.request_timeouts)
+        if self.fast_decode:
+            kwargs['_preload_content'] = False
+        
+        start = time.perf_counter()
+        try:
+            if namespace is None:
+                pods = api.list_pod_for_all_namespaces(**kwargs)
+            else:
+                pods = api.list_namespaced_pod(namespace, **kwargs)
+            if self.fast_decode:
+                try:
+                    data = pods.data
+                finally:
+                    pods.release_conn()
+        except Exception:
+            self.metrics.inc(cluster_name, 'api_errors')
+            raise
+        finally:
+            self.metrics.observe(cluster_name, 'list_page', time.perf_counter() - start)
+        
+        self.metrics.inc(cluster_name, 'list_pages')
+        with self.metrics.timer(cluster_name, 'decode'):
+            if self.fast_decode:
+                self.metrics.inc(cluster_name, 'bytes_received', len(data))
+                page = decode_pod_list(data)
+            else:
+                metadata = pods.metadata
+                page = PodListPage(
+                    [PodRecord.from_model(pod) for pod in pods.items],
+                    metadata._continue if metadata else None,
+                    metadata.resource_version if metadata else None,
+                )
+        self.metrics.inc(cluster_name, 'pods_scanned', len(page.records))
+        return page
+    
+    def _list_pods_page_limited(
+        self,
+        cluster_name: str,
+        namespace: Optional[str],
+        limiter: AdaptiveConcurrencyLimiter,
+        **kwargs,
+    ) -> PodListPage:
+        """
+        在自适应并发限制下获取一页Pod，遇到429/503时减小并发并退避重试
+        """
+        attempt = 0
+        while True:
+            start = limiter.acquire()
+            try:
+                page = self._list_pods_page(cluster_name, namespace, **kwargs)
+            except ApiException as e:
+                retryable = e.status in RETRYABLE_STATUS
+                limiter.release(start, error=retryable)
+                if not retryable or attempt >= LIST_MAX_RETRIES:
+                    raise
+                self.metrics.inc(cluster_name, 'retries')
+                time.sleep(backoff_delay(attempt, e.headers.get('Retry-After') if e.headers else None))
+                attempt += 1
                 continue
-                
-            # 检查文件是否符合要求：
-            # 1. 以.yaml或.yml结尾
-            # 2. 以k8s或K8S开头
-            is_valid = (
-                filename.endswith(('.yaml', '.yml')) or
-                filename.startswith(('k8s', 'K8S'))
-            )
+            except Exception:
+                limiter.release(start, error=True)
+                raise
+            limiter.release(start)
+            return page
+    
+    def _iter_pages(
+        self,
+        cluster_name: str,
+        namespace: Optional[str] = None,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        start_token: Optional[str] = None,
+        **kwargs,
+    ) -> Iterator[PodListPage]:
+        """
+        使用limit/continue分页列出Pod
+        
+        每次只在内存中保留一页数据，page_size为0时一次性列出。
+        
+        Args:
+            cluster_name: 集群名称
+            namespace: 可选的命名空间过滤
+            limiter: 可选的自适应并发限制器，每页请求都受其限制
+            start_token: 可选的continue token，从上次中断的位置继续列出，已过期（410）时从头列出
+            **kwargs: 传递给list接口的其他参数
             
-            if not is_valid:
-                continue
+        Yields:
+            PodListPage: 一页Pod记录
+        """
+        _continue = start_token
+        while True:
+            self._check_deadline(cluster_name)
+            if self.page_size:
+                kwargs['limit'] = self.page_size
+            if _continue:
+                kwargs['_continue'] = _continue
+            else:
+                kwargs.pop('_continue', None)
                 
-            kubeconfig_path = os.path.join(KUBECONFIG_DIR, filename)
-            # 跳过目录
-            if os.path.isdir(kubeconfig_path):
+            try:
+                if limiter is not None:
+                    page = self._list_pods_page_limited(cluster_name, namespace, limiter, **kwargs)
+                else:
+                    page = self._list_pods_page(cluster_name, namespace, **kwargs)
+            except ApiException as e:
+                if e.status != 410 or not start_token or _continue != start_token:
+                    raise
+                logger.warning(f"集群 {cluster_name} 的continue token已过期，重新开始列出")
+                _continue = start_token = None
                 continue
-                
-            cluster_name = os.path.splitext(filename)[0]
+            yield page
             
+            _continue = page.continue_token
+            if not _continue:
+                break
+    
+    def list_pods_snapshot(
+        self,
+        cluster_name: str,
+        namespace: Optional[str] = None,
+        field_selector: Optional[str] = None,
+        label_selector: Optional[str] = None,
+    ) -> Tuple[List[PodRecord], Optional[str]]:
+        """
+        分页列出集群中的Pod，并返回列表的resourceVersion
+        
+        分页列表是同一时刻的一致快照，可以从返回的resourceVersion开始watch。
+        
+        Args:
+            cluster_name: 集群名称
+            namespace: 可选的命名空间过滤
+            field_selector: 可选的field selector
+            label_selector: 可选的label selector
+            
+        Returns:
+            Tuple[List[PodRecord], Optional[str]]: Pod记录列表和resourceVersion
+        """
+        kwargs = {}
+        if field_selector:
+            kwargs['field_selector'] = field_selector
+        if label_selector:
+            kwargs['label_selector'] = label_selector
+        records: List[PodRecord] = []
+        resource_version = None
+        for page in self._iter_pages(cluster_name, namespace, **kwargs):
+            records.extend(page.records)
+            resource_version = page.resource_version
+        return records, resource_version
+    
+    def iter_cluster_problem_pods(self, cluster_name: str, namespace: Optional[str] = None) -> Iterator[Tuple[PodRecord, Rule]]:
+        """
+        逐个返回单个集群中满足清理规则的Pod
+        
+        Args:
+            cluster_name: 集群名称
+            namespace: 可选的命名空间过滤
+            
+        Yields:
+            Tuple[PodRecord, Rule]: 问题Pod记录和它满足的规则
+        """
+        now = datetime.now(timezone.utc)
+        if self.shard_namespaces and namespace is None:
+            yield from self._iter_sharded_problem_pods(cluster_name, now)
+            return
+        yield from self._match_pods(cluster_name, namespace, now)
+    
+    def _match_pods(
+        self,
+        cluster_name: str,
+        namespace: Optional[str],
+        now: datetime,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+    ) -> Iterator[Tuple[PodRecord, Rule]]:
+        """
+        按规则的查询计划列出Pod，返回满足规则的Pod
+        """
+        # 能推送到selector的条件由API服务器过滤，其余条件在本地逐个Pod计算
+        seen_uids = set()
+        checkpoint = self.checkpoint
+        if checkpoint is not None:
+            # 检查点中已有的Pod不再重复记录和返回
+            seen_uids = checkpoint.known_keys(cluster_name)
+        for index, (query, rules) in enumerate(self.rules.plan()):
+            # 规则文件不变时查询计划的顺序不变，查询在检查点中以命名空间和序号区分
+            query_key = f"{namespace or ''}#{index}"
+            start_token = None
+            if checkpoint is not None:
+                finished, start_token = checkpoint.query_progress(cluster_name, query_key)
+                if finished:
+                    continue
+            for page in self._iter_pages(cluster_name, namespace, limiter, start_token, **query.kwargs()):
+                matched = []
+                with self.metrics.timer(cluster_name, 'filter'):
+                    for pod in page.records:
+                        # Pod在两次查询之间变更状态时可能被重复返回
+                        if pod.uid in seen_uids:
+                            continue
+                        rule = match_rules(rules, pod, now)
+                        if rule is None:
+                            continue
+                        seen_uids.add(pod.uid)
+                        matched.append((pod, rule))
+                self.metrics.inc(cluster_name, 'pods_matched', len(matched))
+                if checkpoint is not None:
+                    checkpoint.record_page(cluster_name, query_key, matched, page.continue_token)
+                yield from matched
+    
+    def _list_namespaces(self, cluster_name: str) -> List[str]:
+        """
+        分页列出集群中的所有命名空间
+        """
+        api = self.clusters[cluster_name]
+        names: List[str] = []
+        _continue = None
+        while True:
+            kwargs = {'_request_timeout': self.request_timeouts}
+            if self.page_size:
+                kwargs['limit'] = self.page_size
+            if _continue:
+                kwargs['_continue'] = _continue
             try:
-                # 加载kubeconfig
-                config.load_kube_config(config_file=kubeconfig_path)
-                # 创建API客户端
-                api_client = client.CoreV1Api()
-                # 创建版本API客户端
-                version_api = client.VersionApi()
-                # 测试连接
-                api_client.list_namespace(limit=1)
-                # 获取并存储版本信息
-                version_info = version_api.get_code()
-                
-                # 获取API服务器地址
-                try:
-                    # 获取当前上下文的配置
-                    _, active_context = config.kube_config.list_kube_config_contexts(config_file=kubeconfig_path)
-                    if active_context:
-                        cluster_name_from_context = active_context['context']['cluster']
-                        # 获取集群配置
-                        cluster_config = config.kube_config.load_kube_config(config_file=kubeconfig_path)
-                        api_server = None
-                        
-                        # 从配置中读取当前集群的server地址
-                        kube_config = config.kube_config.new_client_from_config(config_file=kubeconfig_path)
-                        if hasattr(kube_config, 'configuration') and hasattr(kube_config.configuration, 'host'):
-                            api_server = kube_config.configuration.host
-                except Exception as e:
-                    logger.warning(f"无法获取API服务器地址: {str(e)}")
-                    api_server = "未知"
-                
-                self.version_apis[cluster_name] = {
-                    'version': version_info.git_version,
-                    'build_date': version_info.build_date,
-                    'platform': version_info.platform,
-                    'api_server': api_server
-                }
-                # 存储客户端
-                self.clusters[cluster_name] = api_client
-                logger.info(f"成功加载集群配置: {cluster_name}")
-            except Exception as e:
-                logger.error(f"加载集群配置失败 {cluster_name}: {str(e)}")
+                namespaces = api.list_namespace(**kwargs)
+            except Exception:
+                self.metrics.inc(cluster_name, 'api_errors')
+                raise
+            names.extend(ns.metadata.name for ns in namespaces.items)
+            _continue = namespaces.metadata._continue if namespaces.metadata else None
+            if not _continue:
+                return names
     
-    def get_cluster_info(self) -> Dict[str, Dict]:
+    def list_nodes(self, cluster_name: str) -> Tuple[Set[str], Set[str]]:
         """
-        获取所有集群的版本和API信息
+        分页列出集群中的所有节点，直接解析原始JSON
         
         Returns:
-            Dict[str, Dict]: 按集群名称组织的版本和API信息
+            Tuple[Set[str], Set[str]]: 所有节点名称和已确认失联的节点名称
         """
-        return self.version_apis
+        api = self.clusters[cluster_name]
+        now = datetime.now(timezone.utc)
+        nodes: Set[str] = set()
+        dead: Set[str] = set()
+        _continue = None
+        while True:
+            kwargs = {'_request_timeout': self.request_timeouts, '_preload_content': False}
+            if self.page_size:
+                kwargs['limit'] = self.page_size
+            if _continue:
+                kwargs['_continue'] = _continue
+            try:
+                with self.metrics.timer(cluster_name, 'list_nodes'):
+                    response = api.list_node(**kwargs)
+                    try:
+                        data = response.data
+                    finally:
+                        response.release_conn()
+            except Exception:
+                self.metrics.inc(cluster_name, 'api_errors')
+                raise
+            names, dead_names, _continue = decode_node_list(data, now, self.dead_node_grace)
+            nodes.update(names)
+            dead.update(dead_names)
+            if not _continue:
+                return nodes, dead
+    
+    def _index_dead_node_pods(self, cluster_name: str, pods: List[Dict]) -> Optional[Dict[str, List[Dict]]]:
+        """
+        建立失联节点到问题Pod的索引，列出节点失败时返回None，按普通方式删除
+        """
+        try:
+            nodes, dead = self.list_nodes(cluster_name)
+        except Exception as e:
+            logger.warning(f"列出集群 {cluster_name} 的节点失败，不按节点清理: {str(e)}")
+            return None
+        return index_pods_by_dead_node(pods, nodes, dead)
+    
+    def _iter_sharded_problem_pods(self, cluster_name: str, now: datetime) -> Iterator[Tuple[PodRecord, Rule]]:
+        """
+        按命名空间分片扫描集群
+        
+        先列出命名空间并跳过规则不可能匹配的命名空间，再用有界线程池并发扫描，
+        所有列表请求共享一个自适应并发限制器，API延迟升高或返回429时自动减小并发。
+        单个命名空间失败时整个集群的扫描失败，与不分片时一致。
+        """
+        namespaces = [ns for ns in self._list_namespaces(cluster_name) if self.rules.matches_namespace(ns)]
+        shard_workers = self._cluster_workers(cluster_name, self.shard_workers)
+        limiter = AdaptiveConcurrencyLimiter(shard_workers, self.shard_latency_target)
+        executor = ThreadPoolExecutor(max_workers=max(1, shard_workers))
+        try:
+            futures = [
+                executor.submit(lambda ns: list(self._match_pods(cluster_name, ns, now, limiter)), namespace)
+                for namespace in namespaces
+            ]
+            for future in as_completed(futures):
+                yield from future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"集群 {cluster_name} 分片扫描了 {len(namespaces)} 个命名空间，结束时并发上限为 {limiter.limit}")
+    
+    def _scan_cluster(self, cluster_name: str, namespace: Optional[str]) -> Dict[str, List[Dict]]:
+        """
+        列出单个集群的问题Pod，失败时只记录错误，不影响其他集群
+        
+        Returns:
+            Dict[str, List[Dict]]: 成功时为 {集群名称: 问题Pod列表}，失败时为空字典
+        """
+        try:
+            if self.checkpoint is None:
+                pods = [
+                    problem_pod_dict(pod, rule)
+                    for pod, rule in self.iter_cluster_problem_pods(cluster_name, namespace)
+                ]
+            else:
+                pods = self._scan_cluster_checkpointed(cluster_name, namespace)
+                if pods is None:
+                    return {}
+        except Exception as e:
+            logger.error(f"获取集群 {cluster_name} 的Pod列表失败: {str(e)}")
+            return {}
+            
+        if pods:
+            logger.info(f"集群 {cluster_name} 发现 {len(pods)} 个问题Pod")
+        if self.snapshot is not None:
+            self.snapshot.add(cluster_name, pods)
+        return {cluster_name: pods}
+    
+    def _scan_cluster_checkpointed(self, cluster_name: str, namespace: Optional[str]) -> Optional[List[Dict]]:
+        """
+        使用检查点列出单个集群的问题Pod
+
+        已完成的集群返回None；已列完的集群直接使用检查点中尚未删除的Pod；
+        否则从检查点中的continue token继续列出，新的Pod在列出时写入检查点。
+        """
+        if self.checkpoint.is_done(cluster_name):
+            logger.info(f"集群 {cluster_name} 已在上次运行中清理完成，跳过")
+            return None
+        if not self.checkpoint.is_listed(cluster_name):
+            for _ in self.iter_cluster_problem_pods(cluster_name, namespace):
+                pass
+            self.checkpoint.record_listed(cluster_name)
+        return self.checkpoint.candidates(cluster_name)
+    
+    def iter_problem_pods(self, namespace: Optional[str] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        并行列出所有集群的问题Pod，每个集群完成后立即返回
+        
+        Args:
+            namespace: 可选的命名空间过滤
+            
+        Yields:
+            Tuple[str, List[Dict]]: 集群名称和该集群的问题Pod列表
+        """
+        schedule = self._new_schedule(list(self.clusters), 'list')
+        
+        def scan(batch: List[str]) -> Dict[str, List[Dict]]:
+            cluster_name = batch[0]
+            if schedule.expired():
+                return {}
+            schedule.start(cluster_name)
+            scanned = self.metrics.counter(cluster_name, 'pods_scanned')
+            result = self._scan_cluster(cluster_name, namespace)
+            pods = result.get(cluster_name)
+            schedule.finish(
+                cluster_name,
+                self._cluster_ok(cluster_name, result),
+                pods=int(self.metrics.counter(cluster_name, 'pods_scanned') - scanned),
+                problem_pods=len(pods) if pods is not None else None,
+            )
+            return result
+        
+        # 耗时最长的集群最先开始；到达截止时间后不再等待未完成的集群
+        processor = BatchProcessor(schedule.order, batch_size=1, max_workers=self.max_workers)
+        try:
+            for result in processor.iter_results(scan, timeout=schedule.remaining()):
+                yield from result.items()
+        finally:
+            schedule.close()
+    
+    def iter_problem_pod_records(self, namespace: Optional[str] = None) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        并行扫描所有集群，每匹配到一个问题Pod立即返回，不保存整个集群的结果
+
+        扫描线程和调用方之间只有一个有界队列，调用方处理得慢时扫描线程等待，
+        内存占用与问题Pod的数量无关。单个集群失败时只记录错误，该集群已经返回的Pod不会撤回。
+        到达截止时间后停止返回，未完成集群的状态记录在self.schedule中。
+
+        Args:
+            namespace: 可选的命名空间过滤
+
+        Yields:
+            Tuple[str, Optional[Dict]]: 集群名称和问题Pod，Pod为None表示该集群扫描完成
+        """
+        cluster_names = list(self.clusters)
+        if not cluster_names:
+            return
+        schedule = self._new_schedule(cluster_names, 'list')
+        records: queue.Queue = queue.Queue(maxsize=max(1, STREAM_QUEUE_SIZE))
+        stopped = threading.Event()
+        finished = object()
+
+        def put(item) -> bool:
+            # 调用方提前结束迭代后不再阻塞在满的队列上
+            while not stopped.is_set():
+                try:
+                    records.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def scan(cluster_name: str) -> None:
+            if schedule.expired():
+                put(finished)
+                return
+            schedule.start(cluster_name)
+            scanned = self.metrics.counter(cluster_name, 'pods_scanned')
+            count = 0
+            ok = False
+            try:
+                for pod, rule in self.iter_cluster_problem_pods(cluster_name, namespace):
+                    pod_dict = problem_pod_dict(pod, rule)
+                    if self.snapshot is not None:
+                        self.snapshot.add(cluster_name, (pod_dict,))
+                    if not put((cluster_name, pod_dict)):
+                        return
+                    count += 1
+                if count:
+                    logger.info(f"集群 {cluster_name} 发现 {count} 个问题Pod")
+                ok = True
+                put((cluster_name, None))
+            except Exception as e:
+                logger.error(f"获取集群 {cluster_name} 的Pod列表失败: {str(e)}")
+            finally:
+                schedule.finish(
+                    cluster_name, ok,
+                    pods=int(self.metrics.counter(cluster_name, 'pods_scanned') - scanned),
+                    problem_pods=count,
+                )
+                put(finished)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(cluster_names))))
+        try:
+            # 耗时最长的集群最先开始
+            for cluster_name in schedule.order:
+                executor.submit(scan, cluster_name)
+            remaining = len(cluster_names)
+            while remaining:
+                try:
+                    item = records.get(timeout=schedule.remaining())
+                except queue.Empty:
+                    # 到达截止时间，不再等待未完成的集群
+                    break
+                if item is finished:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            schedule.close()
     
     def list_problem_pods(self, namespace: Optional[str] = None) -> Dict[str, List[Dict]]:
         """
-        列出所有集群中状态为Error或Unknown的Pod
+        列出所有集群中满足清理规则的Pod
         
         Args:
             namespace: 可选的命名空间过滤
@@ -104,66 +889,142 @@ class ClusterManager:
         Returns:
             Dict[str, List[Dict]]: 按集群名称组织的问题Pod列表
         """
-        problem_pods = {}
+        return dict(self.iter_problem_pods(namespace))
+    
+    def create_deleter(self, cluster_name: str) -> PodDeleter:
+        """
+        创建使用当前并发和限流配置的删除引擎，并发数按调度中该集群的预期耗时调整
         
-        for cluster_name, api in self.clusters.items():
+        Args:
+            cluster_name: 集群名称
+            
+        Returns:
+            PodDeleter: 该集群的删除引擎
+        """
+        return PodDeleter(
+            cluster_name,
+            self.clusters[cluster_name],
+            max_workers=self._cluster_workers(cluster_name, self.max_workers),
+            batch_size=self.batch_size,
+            qps=self.delete_qps,
+            bulk_min_pods=self.bulk_delete_min_pods,
+            request_timeout=self.request_timeouts,
+            metrics=self.metrics,
+            deadline_at=self.deadline_at,
+        )
+    
+    def _delete_cluster_pods(
+        self,
+        cluster_name: str,
+        pods: List[Dict],
+        dry_run: bool,
+        allow_collection: bool = True,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        使用删除引擎并行删除单个集群中的问题Pod
+        
+        Returns:
+            Dict[str, Dict[str, int]]: {集群名称: 删除统计信息}
+        """
+        node_pods = self._index_dead_node_pods(cluster_name, pods) if self.node_aware and pods else None
+        if dry_run:
+            logger.info(f"[试运行] 将删除集群 {cluster_name} 中的 {len(pods)} 个Pod")
+            if node_pods:
+                count = sum(len(node_pod_list) for node_pod_list in node_pods.values())
+                logger.info(f"[试运行] 其中 {count} 个Pod位于失联节点 {', '.join(sorted(node_pods))} 上，将强制删除")
+            return {cluster_name: {'total': len(pods), 'success': 0, 'failed': 0}}
+            
+        deleter = self.create_deleter(cluster_name)
+        # 规则中有状态和命名空间以外的条件时，按状态批量删除会误删不满足规则的Pod
+        allow_collection = allow_collection and self.rules.collection_safe
+        if self.checkpoint is None:
+            return {cluster_name: deleter.delete(pods, allow_collection=allow_collection, node_pods=node_pods)}
+        
+        stats = deleter.delete(
+            pods,
+            allow_collection=allow_collection,
+            on_finished=lambda finished: self.checkpoint.record_deleted(cluster_name, finished),
+            node_pods=node_pods,
+        )
+        if stats['failed'] == 0:
+            self.checkpoint.record_done(cluster_name)
+        return {cluster_name: stats}
+    
+    def iter_delete_problem_pods(
+        self,
+        namespace: Optional[str] = None,
+        dry_run: bool = False,
+        candidates: Optional[Dict[str, List[Dict]]] = None,
+    ) -> Iterator[Tuple[str, Dict[str, int]]]:
+        """
+        并行删除所有集群中的问题Pod，每个集群完成后立即返回统计信息
+        
+        Args:
+            namespace: 可选的命名空间过滤
+            dry_run: 是否执行试运行而不实际删除Pod
+            candidates: 预先列出的候选Pod（list_problem_pods的返回值）。
+                提供时不再重新列出，只删除其中的Pod，并通过uid前置条件
+                保证不会误删同名的新Pod
+            
+        Yields:
+            Tuple[str, Dict[str, int]]: 集群名称和该集群的删除统计信息
+        """
+        if candidates is None:
+            cluster_names = list(self.clusters)
+        else:
+            cluster_names = [name for name in candidates if name in self.clusters]
+        schedule = self._new_schedule(cluster_names, 'clean')
+        
+        def delete_cluster(batch: List[str]) -> Dict[str, Dict[str, int]]:
+            cluster_name = batch[0]
+            if schedule.expired():
+                return {}
+            schedule.start(cluster_name)
+            scanned = self.metrics.counter(cluster_name, 'pods_scanned')
+            result: Dict[str, Dict[str, int]] = {}
+            pods = candidates.get(cluster_name) if candidates is not None else None
             try:
-                pods = api.list_pod_for_all_namespaces() if namespace is None else \
-                      api.list_namespaced_pod(namespace)
-                
-                problem_pods[cluster_name] = []
-                for pod in pods.items:
-                    if pod.status.phase in POD_ERROR_STATES:
-                        pod_info = {
-                            'name': pod.metadata.name,
-                            'namespace': pod.metadata.namespace,
-                            'status': pod.status.phase,
-                            'creation_timestamp': pod.metadata.creation_timestamp,
-                        }
-                        problem_pods[cluster_name].append(pod_info)
-                        
-                if problem_pods[cluster_name]:
-                    logger.info(f"集群 {cluster_name} 发现 {len(problem_pods[cluster_name])} 个问题Pod")
-                    
-            except ApiException as e:
-                logger.error(f"获取集群 {cluster_name} 的Pod列表失败: {str(e)}")
-                continue
-                
-        return problem_pods
+                if pods is not None:
+                    result = self._delete_cluster_pods(cluster_name, pods, dry_run, allow_collection=False)
+                else:
+                    scanned_pods = self._scan_cluster(cluster_name, namespace)
+                    if scanned_pods:
+                        pods = scanned_pods[cluster_name]
+                        result = self._delete_cluster_pods(cluster_name, pods, dry_run)
+            finally:
+                stats = result.get(cluster_name)
+                # 截止时间前没有删除完的集群不算完成
+                ok = stats is not None and not (stats['failed'] and schedule.expired())
+                schedule.finish(
+                    cluster_name, ok,
+                    pods=int(self.metrics.counter(cluster_name, 'pods_scanned') - scanned) if candidates is None else None,
+                    problem_pods=len(pods) if pods is not None else None,
+                )
+            return result
+        
+        # 耗时最长的集群最先开始；到达截止时间后不再等待未完成的集群
+        processor = BatchProcessor(schedule.order, batch_size=1, max_workers=self.max_workers)
+        try:
+            for result in processor.iter_results(delete_cluster, timeout=schedule.remaining()):
+                yield from result.items()
+        finally:
+            schedule.close()
     
-    def delete_problem_pods(self, namespace: Optional[str] = None, dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+    def delete_problem_pods(
+        self,
+        namespace: Optional[str] = None,
+        dry_run: bool = False,
+        candidates: Optional[Dict[str, List[Dict]]] = None,
+    ) -> Dict[str, Dict[str, int]]:
         """
-        删除所有集群中状态为Error或Unknown的Pod
+        删除所有集群中满足清理规则的Pod
         
         Args:
             namespace: 可选的命名空间过滤
             dry_run: 是否执行试运行而不实际删除Pod
+            candidates: 预先列出的候选Pod，提供时不再重新列出
             
         Returns:
             Dict[str, Dict[str, int]]: 每个集群的删除统计信息
         """
-        stats = {}
-        problem_pods = self.list_problem_pods(namespace)
-        
-        for cluster_name, pods in problem_pods.items():
-            stats[cluster_name] = {'total': len(pods), 'success': 0, 'failed': 0}
-            
-            if dry_run:
-                logger.info(f"[试运行] 将删除集群 {cluster_name} 中的 {len(pods)} 个Pod")
-                continue
-                
-            api = self.clusters[cluster_name]
-            for pod in pods:
-                try:
-                    api.delete_namespaced_pod(
-                        name=pod['name'],
-                        namespace=pod['namespace'],
-                        body=client.V1DeleteOptions()
-                    )
-                    stats[cluster_name]['success'] += 1
-                    logger.info(f"成功删除Pod: {pod['namespace']}/{pod['name']} in {cluster_name}")
-                except ApiException as e:
-                    stats[cluster_name]['failed'] += 1
-                    logger.error(f"删除Pod失败 {pod['namespace']}/{pod['name']} in {cluster_name}: {str(e)}")
-        
-        return stats 
\ No newline at end of file
+        return dict(self.iter_delete_problem_pods(namespace, dry_run, candidates))
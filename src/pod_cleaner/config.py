@@ -16,14 +16,135 @@ KUBECONFIG_DIR = get_kubeconfig_dir()
 
 # 日志配置
 LOG_DIR = os.path.join(BASE_DIR, "logs")
-LOG_FILE = os.path.join(LOG_DIR, "pod_cleaner.log")
+LOG_FILE = os.environ.get('LOG_FILE') or os.path.join(LOG_DIR, "pod_cleaner.log")
 
 # 日志格式
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# 日志级别，设置为DEBUG时会逐个记录删除成功的Pod
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+# 日志文件是否使用JSON Lines格式，每行一个JSON对象
+LOG_JSON = os.environ.get('LOG_JSON', '').lower() in ('1', 'true', 'yes')
+
 # Pod状态
 POD_ERROR_STATES = ["Error", "Unknown"]
 
 # 批处理大小
-BATCH_SIZE = 50 
\ No newline at end of file
+BATCH_SIZE = int(os.environ.get('BATCH_SIZE', '50'))
+
+# 并行处理集群和批次的最大线程数
+MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '10'))
+
+# 单个API请求的超时时间（秒），避免无响应的集群阻塞整个任务
+REQUEST_TIMEOUT = float(os.environ.get('REQUEST_TIMEOUT', '60')) 
+
+# 加载集群时的最大并发数
+CLUSTER_LOAD_WORKERS = int(os.environ.get('CLUSTER_LOAD_WORKERS', '16'))
+
+# 单个集群的连接超时时间（秒）
+CLUSTER_CONNECT_TIMEOUT = float(os.environ.get('CLUSTER_CONNECT_TIMEOUT', '5'))
+
+# 分页列出Pod时每页的数量，0表示不分页
+LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', '500'))
+
+# 是否直接解析原始JSON响应，跳过kubernetes模型的反序列化
+FAST_DECODE = os.environ.get('FAST_DECODE', '').lower() in ('1', 'true', 'yes')
+
+# 每个集群每秒最多发出的删除请求数，0表示不限流
+DELETE_QPS = float(os.environ.get('DELETE_QPS', '20'))
+
+# 删除请求允许的突发数量
+DELETE_BURST = int(os.environ.get('DELETE_BURST', '20'))
+
+# 删除请求遇到429/503时的最大重试次数
+DELETE_MAX_RETRIES = int(os.environ.get('DELETE_MAX_RETRIES', '5'))
+
+# 同一命名空间、同一状态的问题Pod达到该数量时使用delete_collection批量删除，0表示禁用
+BULK_DELETE_MIN_PODS = int(os.environ.get('BULK_DELETE_MIN_PODS', '0'))
+
+# async引擎中每个集群的最大并发请求数
+ASYNC_CLUSTER_CONCURRENCY = int(os.environ.get('ASYNC_CLUSTER_CONCURRENCY', '20'))
+
+
+# daemon模式下单次watch请求的超时时间（秒），超时后从上次的resourceVersion继续watch
+WATCH_TIMEOUT = int(os.environ.get('WATCH_TIMEOUT', '300'))
+
+# daemon模式下输出汇总日志的间隔（秒）
+DAEMON_SUMMARY_INTERVAL = float(os.environ.get('DAEMON_SUMMARY_INTERVAL', '60'))
+
+# 集群元数据（版本、API地址）缓存文件
+CLUSTER_CACHE_FILE = os.environ.get('CLUSTER_CACHE_FILE', os.path.join(BASE_DIR, "cache", "clusters.json"))
+
+# 集群元数据缓存的有效期（秒），0表示禁用缓存
+CLUSTER_CACHE_TTL = float(os.environ.get('CLUSTER_CACHE_TTL', '86400'))
+
+# 清理规则的YAML文件，为空时按POD_ERROR_STATES匹配Pod状态
+RULES_FILE = os.environ.get('RULES_FILE') or None
+
+# 是否按命名空间分片扫描集群：先列出命名空间，再并发扫描各个命名空间
+SHARD_NAMESPACES = os.environ.get('SHARD_NAMESPACES', '').lower() in ('1', 'true', 'yes')
+
+# 分片扫描时每个集群同时发出的最大列表请求数
+SHARD_WORKERS = int(os.environ.get('SHARD_WORKERS', '8'))
+
+# 分片扫描的目标请求耗时（秒），超过时减小并发
+SHARD_LATENCY_TARGET = float(os.environ.get('SHARD_LATENCY_TARGET', '2'))
+
+# 列表请求遇到429/503时的最大重试次数
+LIST_MAX_RETRIES = int(os.environ.get('LIST_MAX_RETRIES', '5'))
+
+# daemon模式下提供 /metrics 接口的端口，0表示不开启
+METRICS_PORT = int(os.environ.get('METRICS_PORT', '0'))
+
+# daemon模式下定期写入的Prometheus textfile路径，为空时不写入
+METRICS_TEXTFILE = os.environ.get('METRICS_TEXTFILE') or None
+
+# 每个集群连接池的最大连接数，0表示按并发线程数（max_workers，分片扫描时取较大的shard_workers）设置
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', '0'))
+
+# 是否对API服务器的连接开启TCP keepalive，避免空闲连接被负载均衡器断开后重新TLS握手
+HTTP_KEEPALIVE = os.environ.get('HTTP_KEEPALIVE', 'true').lower() in ('1', 'true', 'yes')
+
+# 列表请求是否携带Accept-Encoding: gzip，大的列表响应压缩传输
+HTTP_GZIP = os.environ.get('HTTP_GZIP', 'true').lower() in ('1', 'true', 'yes')
+
+# 是否尝试使用HTTP/2（urllib3的实验性功能，需要安装h2，仅sync引擎）
+HTTP2 = os.environ.get('HTTP2', '').lower() in ('1', 'true', 'yes')
+
+# 每个集群的运行耗时和Pod数量历史，用于按耗时从长到短安排集群和分配并发，只在按历史调度时读写
+CLUSTER_HISTORY_FILE = os.environ.get('CLUSTER_HISTORY_FILE', os.path.join(BASE_DIR, "cache", "history.json"))
+
+# list-pods和clean-pods是否按运行历史安排集群，并把本次运行的耗时写入CLUSTER_HISTORY_FILE；使用截止时间时总是开启
+SCHEDULE_BY_HISTORY = os.environ.get('SCHEDULE_BY_HISTORY', '').lower() in ('1', 'true', 'yes')
+
+# 一次运行的截止时间（秒），到达后返回已完成集群的结果，0表示不限制
+RUN_DEADLINE = float(os.environ.get('RUN_DEADLINE', '0'))
+
+# clean-pods的检查点日志，记录每个集群的候选Pod、已删除的Pod和continue token，用于--resume
+CHECKPOINT_FILE = os.environ.get('CHECKPOINT_FILE', os.path.join(BASE_DIR, "cache", "checkpoint.jsonl"))
+
+# 是否按节点清理：每个集群列出一次节点，失联节点上的问题Pod按节点分批强制删除（grace_period_seconds=0）
+NODE_AWARE = os.environ.get('NODE_AWARE', '').lower() in ('1', 'true', 'yes')
+
+# 节点的Ready条件不为True持续超过该时间（秒）才确认为失联，与Pod默认的not-ready容忍时间一致
+DEAD_NODE_GRACE = float(os.environ.get('DEAD_NODE_GRACE', '300'))
+
+# 列式快照存储的目录，list-pods每次扫描的问题Pod追加为一个快照，供report命令离线查询
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join(BASE_DIR, "snapshots"))
+
+# list-pods是否默认写入快照
+SNAPSHOT_SCANS = os.environ.get('SNAPSHOT_SCANS', '').lower() in ('1', 'true', 'yes')
+
+# daemon是否监听kubeconfig目录，只为新增、更新或删除的kubeconfig重建集群客户端
+KUBECONFIG_WATCH = os.environ.get('KUBECONFIG_WATCH', 'true').lower() in ('1', 'true', 'yes')
+
+# 轮询kubeconfig目录的间隔（秒）；使用inotify时按该间隔兜底扫描
+KUBECONFIG_POLL_INTERVAL = float(os.environ.get('KUBECONFIG_POLL_INTERVAL', '30'))
+
+# 多进程模式的进程数，0表示在当前进程中处理所有集群
+FLEET_PROCESSES = int(os.environ.get('FLEET_PROCESSES', '0'))
+
+# 流式输出时扫描线程与输出之间缓冲的最大Pod数，缓冲满时扫描线程等待输出
+STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', '1000'))
@@ -0,0 +1,536 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from kubernetes.client.rest import ApiException
+from kubernetes.watch.watch import iter_resp_lines
+from .cluster_manager import ClusterManager
+from .config import WATCH_TIMEOUT, DAEMON_SUMMARY_INTERVAL, METRICS_PORT, METRICS_TEXTFILE
+from .deleter import backoff_delay
+from .kubeconfig_registry import KubeconfigChanges, KubeconfigRegistry
+from .logger import setup_logger
+from .pod_record import PodRecord, json_loads
+from .rules import PodQuery, Rule, match_rules, next_match_time
+
+logger = setup_logger(__name__)
+
+# watch因网络等错误中断后，重试前的最大退避次数
+MAX_WATCH_BACKOFF_ATTEMPTS = 6
+
+# 每个集群的删除统计，dry_run为试运行中将要删除（未实际删除）的Pod数量
+STAT_KEYS = ('total', 'success', 'failed', 'skipped', 'dry_run')
+
+class PodIndex:
+    """
+    内存中的问题Pod索引
+
+    按 (集群, 查询) 分区，分区内以uid为键，可在多个线程间共享
+    """
+
+    def __init__(self):
+        self._pods: Dict[Tuple[str, str], Dict[str, PodRecord]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def replace(self, cluster_name: str, query: str, records: Iterable[PodRecord]) -> Set[str]:
+        """
+        用一次完整列表的结果替换分区中的所有Pod
+
+        Returns:
+            Set[str]: 不在新列表中、被移出分区的Pod的uid
+        """
+        pods = {record.uid: record for record in records}
+        with self._lock:
+            previous = self._pods.get((cluster_name, query), {})
+            self._pods[(cluster_name, query)] = pods
+        return set(previous).difference(pods)
+
+    def upsert(self, cluster_name: str, query: str, record: PodRecord) -> None:
+        """
+        添加或更新一个Pod
+        """
+        with self._lock:
+            self._pods[(cluster_name, query)][record.uid] = record
+
+    def remove(self, cluster_name: str, query: str, uid: str) -> None:
+        """
+        移除一个Pod，不存在时忽略
+        """
+        with self._lock:
+            self._pods[(cluster_name, query)].pop(uid, None)
+
+    def drop(self, cluster_name: str) -> None:
+        """
+        移除一个集群的所有分区
+        """
+        with self._lock:
+            for key in [key for key in self._pods if key[0] == cluster_name]:
+                del self._pods[key]
+
+    def counts(self) -> Dict[str, int]:
+        """
+        统计每个集群当前索引中的Pod数量
+
+        Returns:
+            Dict[str, int]: 集群名称到Pod数量的映射
+        """
+        counts: Dict[str, int] = defaultdict(int)
+        with self._lock:
+            for (cluster_name, _), pods in self._pods.items():
+                counts[cluster_name] += len(pods)
+        return dict(counts)
+
+class PodCleanupDaemon:
+    """
+    常驻的Pod清理进程
+
+    - 清理规则合并后的每个查询，在每个集群上先完整列出一次，再从返回的resourceVersion开始watch
+    - 事件直接解析原始JSON并计算规则，维护内存中的问题Pod索引，并开启watch bookmark
+    - resourceVersion过期（410 Gone）时重新列出，其他错误退避后重新watch
+    - 新出现的问题Pod进入所在集群的删除队列，由该集群的清理线程分批删除
+    - 只因存在时长不足（min_age）而不满足规则的Pod，在creation_timestamp + min_age时重新计算规则
+    - 可选地提供 /metrics 接口，或在输出汇总日志时写入Prometheus textfile
+    - 可选地监听kubeconfig目录：为新增的集群启动线程，停止已删除集群的线程；
+      kubeconfig更新的集群只重建客户端，watch从原来的resourceVersion继续，不重新列出
+    """
+
+    def __init__(
+        self,
+        manager: ClusterManager,
+        namespace: Optional[str] = None,
+        dry_run: bool = False,
+        watch_timeout: int = WATCH_TIMEOUT,
+        summary_interval: float = DAEMON_SUMMARY_INTERVAL,
+        metrics_port: int = METRICS_PORT,
+        metrics_textfile: Optional[str] = METRICS_TEXTFILE,
+        registry: Optional[KubeconfigRegistry] = None,
+    ):
+        """
+        初始化清理进程
+
+        Args:
+            manager: 已加载集群的ClusterManager
+            namespace: 可选的命名空间过滤
+            dry_run: 是否只输出将要删除的Pod而不删除
+            watch_timeout: 单次watch请求的超时时间（秒）
+            summary_interval: 输出汇总日志的间隔（秒）
+            metrics_port: 提供 /metrics 接口的端口，0表示不开启
+            metrics_textfile: 定期写入的Prometheus textfile路径，为空时不写入
+            registry: 监听kubeconfig目录的登记，为空时集群列表在运行期间不变
+        """
+        self.manager = manager
+        self.namespace = namespace
+        self.dry_run = dry_run
+        self.watch_timeout = watch_timeout
+        self.summary_interval = summary_interval
+        self.metrics_port = metrics_port
+        self.metrics_textfile = metrics_textfile
+        self.registry = registry
+        self._metrics_server = None
+        self.index = PodIndex()
+        self.stats: Dict[str, Dict[str, int]] = {name: dict.fromkeys(STAT_KEYS, 0) for name in manager.clusters}
+        self._queues: Dict[str, queue.Queue] = {name: queue.Queue() for name in manager.clusters}
+        # 已进入删除队列、尚未处理完的Pod，避免重复删除；试运行时保留到Pod移出索引，避免重复输出
+        self._enqueued: Dict[str, Set[str]] = {name: set() for name in manager.clusters}
+        # 每个集群的线程在集群被删除或进程停止时退出
+        self._cluster_stops: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._plan: List[Tuple[PodQuery, List[Rule]]] = []
+        # 等待满足min_age的Pod：(集群, 查询, uid) -> (Pod记录, 规则)，以及按到期时间排列的堆
+        self._deferred: Dict[Tuple[str, str, str], Tuple[PodRecord, List[Rule]]] = {}
+        self._deferred_heap: List[Tuple[datetime, int, Tuple[str, str, str], PodRecord]] = []
+        self._deferred_seq = itertools.count()
+
+    def _enqueue(self, cluster_name: str, record: PodRecord) -> None:
+        """
+        将问题Pod放入删除队列，正在删除或已在队列中的Pod会被忽略
+        """
+        if record.deletion_timestamp is not None or not record.uid:
+            return
+        with self._lock:
+            enqueued = self._enqueued.get(cluster_name)
+            # 集群已被删除
+            if enqueued is None or record.uid in enqueued:
+                return
+            enqueued.add(record.uid)
+            pending = self._queues[cluster_name]
+        pending.put(record)
+
+    def _forget(self, cluster_name: str, uids: Iterable[str]) -> None:
+        """
+        Pod移出索引（已删除或不再满足规则）后，允许它再次进入删除队列
+        """
+        with self._lock:
+            enqueued = self._enqueued.get(cluster_name)
+            if enqueued is not None:
+                enqueued.difference_update(uids)
+
+    def _defer(self, cluster_name: str, query: str, rules: List[Rule], record: PodRecord, now: datetime) -> None:
+        """
+        Pod只因存在时长不足而不满足规则时，记录其到期时间；否则取消之前的记录
+        """
+        key = (cluster_name, query, record.uid)
+        due = next_match_time(rules, record, now)
+        with self._lock:
+            if due is None:
+                self._deferred.pop(key, None)
+                return
+            self._deferred[key] = (record, rules)
+            heapq.heappush(self._deferred_heap, (due, next(self._deferred_seq), key, record))
+
+    def _drop_deferred(self, cluster_name: str, query: Optional[str] = None, uid: Optional[str] = None) -> None:
+        """
+        取消一个Pod、一个分区或一个集群的所有到期记录，堆中的旧条目在到期时被忽略
+        """
+        with self._lock:
+            if uid is not None:
+                self._deferred.pop((cluster_name, query, uid), None)
+                return
+            for key in [key for key in self._deferred if key[0] == cluster_name and query in (None, key[1])]:
+                del self._deferred[key]
+
+    def _check_deferred(self, now: Optional[datetime] = None) -> Optional[float]:
+        """
+        重新计算已到期的Pod，满足规则的Pod加入索引和删除队列
+
+        Returns:
+            Optional[float]: 距离下一个到期时间的秒数，没有等待中的Pod时返回None
+        """
+        now = now or datetime.now(timezone.utc)
+        due_pods = []
+        with self._lock:
+            while self._deferred_heap and self._deferred_heap[0][0] <= now:
+                _, _, key, record = heapq.heappop(self._deferred_heap)
+                entry = self._deferred.get(key)
+                # Pod在到期前已更新、删除或重新列出
+                if entry is None or entry[0] is not record:
+                    continue
+                del self._deferred[key]
+                due_pods.append((key, record, entry[1]))
+            next_due = self._deferred_heap[0][0] if self._deferred_heap else None
+
+        for (cluster_name, query, _), record, rules in due_pods:
+            if match_rules(rules, record, now) is not None:
+                self.index.upsert(cluster_name, query, record)
+                self._enqueue(cluster_name, record)
+        return None if next_due is None else (next_due - now).total_seconds()
+
+    def _run_deferred(self) -> None:
+        """
+        定期重新计算等待满足min_age的Pod
+        """
+        while not self._stop.is_set():
+            wait = self._check_deferred()
+            self._stop.wait(1.0 if wait is None else min(wait, 1.0))
+
+    def _relist(self, cluster_name: str, query: PodQuery, rules: List[Rule]) -> Optional[str]:
+        """
+        完整列出一次Pod，刷新索引并返回列表的resourceVersion
+        """
+        records, resource_version = self.manager.list_pods_snapshot(cluster_name, self.namespace, **query.kwargs())
+        now = datetime.now(timezone.utc)
+        self._drop_deferred(cluster_name, str(query))
+        matched = []
+        for record in records:
+            if match_rules(rules, record, now) is not None:
+                matched.append(record)
+            else:
+                self._defer(cluster_name, str(query), rules, record, now)
+        self._forget(cluster_name, self.index.replace(cluster_name, str(query), matched))
+        for record in matched:
+            self._enqueue(cluster_name, record)
+        logger.info(f"集群 {cluster_name} 列出 {len(matched)} 个问题Pod ({query})，resourceVersion={resource_version}")
+        return resource_version
+
+    def _apply_event(self, cluster_name: str, query: PodQuery, rules: List[Rule], event_type: str,
+                     record: PodRecord, now: Optional[datetime] = None) -> None:
+        """
+        根据一个watch事件更新索引、删除队列和等待满足min_age的Pod
+        """
+        now = now or datetime.now(timezone.utc)
+        if event_type != 'DELETED' and match_rules(rules, record, now) is not None:
+            self._drop_deferred(cluster_name, str(query), record.uid)
+            self.index.upsert(cluster_name, str(query), record)
+            self._enqueue(cluster_name, record)
+            return
+        # 不再满足规则的Pod（如状态已恢复）同样从索引中移除
+        self.index.remove(cluster_name, str(query), record.uid)
+        self._forget(cluster_name, [record.uid])
+        if event_type == 'DELETED':
+            self._drop_deferred(cluster_name, str(query), record.uid)
+        else:
+            self._defer(cluster_name, str(query), rules, record, now)
+
+    def _watch(
+        self,
+        cluster_name: str,
+        query: PodQuery,
+        rules: List[Rule],
+        resource_version: Optional[str],
+        stop: threading.Event,
+    ) -> Optional[str]:
+        """
+        从指定的resourceVersion开始watch，直到超时或stop被设置
+
+        Returns:
+            Optional[str]: 最后处理的resourceVersion
+
+        Raises:
+            ApiException: 请求失败或收到ERROR事件，410表示resourceVersion已过期
+        """
+        api = self.manager.clusters[cluster_name]
+        kwargs = query.kwargs()
+        kwargs.update({
+            'watch': True,
+            'allow_watch_bookmarks': True,
+            'timeout_seconds': self.watch_timeout,
+            '_preload_content': False,
+            '_request_timeout': (self.manager.connect_timeout, self.watch_timeout + self.manager.connect_timeout),
+        })
+        if resource_version:
+            kwargs['resource_version'] = resource_version
+        if self.namespace:
+            response = api.list_namespaced_pod(self.namespace, **kwargs)
+        else:
+            response = api.list_pod_for_all_namespaces(**kwargs)
+
+        try:
+            for line in iter_resp_lines(response):
+                event = json_loads(line)
+                event_type = event.get('type')
+                self.manager.metrics.inc(cluster_name, 'watch_events')
+                obj = event.get('object') or {}
+                if event_type == 'ERROR':
+                    raise ApiException(status=obj.get('code'), reason=obj.get('message'))
+
+                resource_version = (obj.get('metadata') or {}).get('resourceVersion') or resource_version
+                if event_type == 'BOOKMARK':
+                    continue
+
+                self._apply_event(cluster_name, query, rules, event_type, PodRecord.from_dict(obj))
+
+                if stop.is_set():
+                    break
+        finally:
+            response.close()
+            response.release_conn()
+        return resource_version
+
+    def _run_watcher(self, cluster_name: str, query: PodQuery, rules: List[Rule], stop: threading.Event) -> None:
+        """
+        单个集群、单个查询的list-watch循环
+
+        每次watch都重新获取集群客户端，kubeconfig更新后下一次watch使用新的客户端。
+        """
+        resource_version = None
+        attempt = 0
+        while not stop.is_set():
+            try:
+                if resource_version is None:
+                    resource_version = self._relist(cluster_name, query, rules)
+                resource_version = self._watch(cluster_name, query, rules, resource_version, stop)
+                attempt = 0
+            except ApiException as e:
+                if e.status == 410:
+                    logger.info(f"集群 {cluster_name} 的resourceVersion已过期，重新列出Pod ({query})")
+                    resource_version = None
+                    continue
+                logger.error(f"集群 {cluster_name} watch失败 ({query}): {str(e)}")
+                self.manager.metrics.inc(cluster_name, 'api_errors')
+                stop.wait(backoff_delay(min(attempt, MAX_WATCH_BACKOFF_ATTEMPTS)))
+                attempt += 1
+            except Exception as e:
+                logger.error(f"集群 {cluster_name} watch失败 ({query}): {str(e)}")
+                stop.wait(backoff_delay(min(attempt, MAX_WATCH_BACKOFF_ATTEMPTS)))
+                attempt += 1
+
+    def _run_cleaner(self, cluster_name: str, pending: queue.Queue, stop: threading.Event) -> None:
+        """
+        单个集群的清理循环，分批取出删除队列中的Pod并删除
+
+        集群客户端因kubeconfig更新而重建后，下一批删除使用新的客户端。
+        """
+        deleter = None
+        while not stop.is_set():
+            try:
+                batch = [pending.get(timeout=1)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.manager.batch_size:
+                try:
+                    batch.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            pods = [record.to_dict() for record in batch]
+            if self.dry_run:
+                for pod in pods:
+                    logger.debug("[试运行] 将删除Pod: %s/%s (%s) in %s", pod['namespace'], pod['name'], pod['status'], cluster_name)
+                logger.info(f"[试运行] 将删除集群 {cluster_name} 中的 {len(pods)} 个Pod", extra={'cluster': cluster_name})
+                stats = {'total': len(pods), 'dry_run': len(pods)}
+            else:
+                try:
+                    if deleter is None or deleter.api is not self.manager.clusters[cluster_name]:
+                        deleter = self.manager.create_deleter(cluster_name)
+                    stats = deleter.delete(pods, allow_collection=False)
+                except KeyError:
+                    # 集群已被删除，剩余的Pod不再处理
+                    break
+                # 删除失败的Pod在下次事件或重新列出时会再次进入队列
+                with self._lock:
+                    self._enqueued.get(cluster_name, set()).difference_update(record.uid for record in batch)
+
+            with self._lock:
+                cluster_stats = self.stats.get(cluster_name)
+                if cluster_stats is not None:
+                    for key in STAT_KEYS:
+                        cluster_stats[key] += stats.get(key, 0)
+
+    def _log_summary(self) -> None:
+        """
+        输出每个集群的索引大小和删除统计，并更新Prometheus textfile
+        """
+        if self.metrics_textfile:
+            try:
+                self.manager.metrics.write_textfile(self.metrics_textfile)
+            except OSError as e:
+                logger.error(f"写入指标文件失败 {self.metrics_textfile}: {str(e)}")
+        counts = self.index.counts()
+        with self._lock:
+            for cluster_name, stats in self.stats.items():
+                if self.dry_run:
+                    result = f"[试运行] 将删除 {stats['dry_run']} 个"
+                else:
+                    result = f"已删除 {stats['success']} 个，失败 {stats['failed']} 个，跳过 {stats['skipped']} 个"
+                logger.info(
+                    f"集群 {cluster_name}: 索引中 {counts.get(cluster_name, 0)} 个问题Pod，"
+                    f"待删除 {self._queues[cluster_name].qsize()} 个，{result}"
+                )
+
+    def _start_cluster(self, cluster_name: str) -> None:
+        """
+        为一个集群创建删除队列和统计，并启动watch线程和清理线程
+        """
+        stop = threading.Event()
+        with self._lock:
+            self.stats.setdefault(cluster_name, dict.fromkeys(STAT_KEYS, 0))
+            pending = self._queues.setdefault(cluster_name, queue.Queue())
+            self._enqueued.setdefault(cluster_name, set())
+            self._cluster_stops[cluster_name] = stop
+        threads = [
+            threading.Thread(
+                target=self._run_watcher, args=(cluster_name, query, rules, stop),
+                name=f"watch-{cluster_name}-{query}", daemon=True,
+            )
+            for query, rules in self._plan
+        ]
+        threads.append(threading.Thread(
+            target=self._run_cleaner, args=(cluster_name, pending, stop),
+            name=f"clean-{cluster_name}", daemon=True,
+        ))
+        for thread in threads:
+            thread.start()
+        self._threads.extend(threads)
+
+    def _stop_cluster(self, cluster_name: str) -> None:
+        """
+        通知一个集群的线程退出，并丢弃其队列、统计和索引
+        """
+        with self._lock:
+            stop = self._cluster_stops.pop(cluster_name, None)
+            self.stats.pop(cluster_name, None)
+            self._queues.pop(cluster_name, None)
+            self._enqueued.pop(cluster_name, None)
+        if stop is not None:
+            stop.set()
+        self.index.drop(cluster_name)
+        self._drop_deferred(cluster_name)
+        # 已退出的线程不再保留
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+
+    def apply_kubeconfig_changes(self, changes: KubeconfigChanges) -> None:
+        """
+        应用kubeconfig目录的变化
+
+        更新的集群只由ClusterManager重建客户端，线程和resourceVersion保持不变。
+        """
+        self.manager.apply_kubeconfig_changes(changes)
+        for cluster_name in changes.removed:
+            self._stop_cluster(cluster_name)
+            logger.info(f"已停止集群 {cluster_name} 的watch")
+        for cluster_name in changes.added:
+            self._start_cluster(cluster_name)
+            logger.info(f"已启动集群 {cluster_name} 的watch")
+
+    def _run_registry(self) -> None:
+        """
+        等待kubeconfig目录变化并应用
+        """
+        while self.registry.wait(self._stop):
+            try:
+                changes = self.registry.scan()
+                if changes:
+                    self.apply_kubeconfig_changes(changes)
+            except Exception as e:
+                logger.error(f"应用kubeconfig变化失败: {str(e)}")
+
+    def start(self) -> None:
+        """
+        为每个集群启动watch线程和清理线程
+        """
+        self._plan = self.manager.rules.plan()
+        for cluster_name in list(self.manager.clusters):
+            self._start_cluster(cluster_name)
+        if any(rule.min_age is not None for rule in self.manager.rules.rules):
+            thread = threading.Thread(target=self._run_deferred, name="min-age-recheck", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.registry is not None:
+            # 启动前已经发生的变化
+            self.apply_kubeconfig_changes(self.registry.scan())
+            thread = threading.Thread(target=self._run_registry, name="kubeconfig-registry", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            logger.info(f"监听kubeconfig目录 {self.registry.kubeconfig_dir} ({self.registry.mode})")
+        if self.metrics_port:
+            self._metrics_server = self.manager.metrics.serve(self.metrics_port)
+            logger.info(f"指标接口: http://0.0.0.0:{self.metrics_port}/metrics")
+        logger.info(
+            f"已启动 {len(self.manager.clusters)} 个集群的watch，"
+            f"规则: {', '.join(rule.name for rule in self.manager.rules.rules)}，查询: {', '.join(str(query) for query, _ in self._plan)}"
+        )
+
+    def stop(self) -> None:
+        """
+        通知所有线程退出
+        """
+        self._stop.set()
+        with self._lock:
+            stops = list(self._cluster_stops.values())
+        for stop in stops:
+            stop.set()
+        if self._metrics_server is not None:
+            self._metrics_server.shutdown()
+            self._metrics_server = None
+
+    def run_forever(self) -> None:
+        """
+        启动并阻塞运行，直到调用stop()，期间定期输出汇总日志
+        """
+        self.start()
+        last_summary = time.monotonic()
+        while not self._stop.wait(1):
+            if time.monotonic() - last_summary >= self.summary_interval:
+                self._log_summary()
+                last_summary = time.monotonic()
+        # watch线程可能阻塞在读取上，不等待其退出
+        for thread in self._threads:
+            thread.join(timeout=1)
+        if self.registry is not None:
+            self.registry.close()
+        self._log_summary()
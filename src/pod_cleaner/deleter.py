@@ -0,0 +1,334 @@
+import math
+import random
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from .batch_processor import BatchProcessor
+from .config import (
+    BATCH_SIZE,
+    MAX_WORKERS,
+    REQUEST_TIMEOUT,
+    CLUSTER_CONNECT_TIMEOUT,
+    DELETE_QPS,
+    DELETE_BURST,
+    DELETE_MAX_RETRIES,
+    BULK_DELETE_MIN_PODS,
+)
+from .logger import setup_logger
+from .metrics import MetricsRegistry
+from .rate_limit import TokenBucket
+
+logger = setup_logger(__name__)
+
+# 需要退避重试的HTTP状态码
+RETRYABLE_STATUS = (429, 503)
+
+# 退避重试的基础等待时间和上限（秒）
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    计算百分位数（最近秩法）
+
+    Args:
+        values: 已排序的数值列表
+        q: 百分位，取值0-100
+
+    Returns:
+        float: 百分位数，列表为空时返回0
+    """
+    if not values:
+        return 0.0
+    index = max(0, math.ceil(q / 100.0 * len(values)) - 1)
+    return values[min(index, len(values) - 1)]
+
+def latency_stats(latencies: List[float]) -> Dict[str, int]:
+    """
+    根据请求耗时（秒）生成p50/p90/p99统计（毫秒）
+    """
+    latencies = sorted(latencies)
+    return {
+        'p50_ms': int(round(percentile(latencies, 50) * 1000)),
+        'p90_ms': int(round(percentile(latencies, 90) * 1000)),
+        'p99_ms': int(round(percentile(latencies, 99) * 1000)),
+    }
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    计算重试前的等待时间，优先使用服务端返回的Retry-After
+
+    Args:
+        attempt: 已重试的次数
+        retry_after: 响应头中的Retry-After
+
+    Returns:
+        float: 等待时间（秒），包含随机抖动，避免所有请求同时重试
+    """
+    try:
+        delay = float(retry_after) if retry_after is not None else BACKOFF_BASE * (2 ** attempt)
+    except ValueError:
+        delay = BACKOFF_BASE * (2 ** attempt)
+    return min(BACKOFF_MAX, delay) * random.uniform(1.0, 1.5)
+
+def log_delete_summary(cluster_name: str, stats: Dict[str, int]) -> None:
+    """
+    输出单个集群删除结果的汇总日志，代替逐个Pod的日志
+    """
+    if not stats.get('total'):
+        return
+    logger.info(
+        f"集群 {cluster_name} 删除完成: 共 {stats['total']} 个，成功 {stats['success']} 个，"
+        f"失败 {stats['failed']} 个，跳过 {stats.get('skipped', 0)} 个，"
+        f"延迟 p50 {stats.get('p50_ms', 0)}ms / p99 {stats.get('p99_ms', 0)}ms",
+        extra={'cluster': cluster_name, 'stats': stats},
+    )
+
+def plan_collection_deletes(pods: List[Dict], min_pods: int) -> Tuple[List[Tuple[str, str, List[Dict]]], List[Dict]]:
+    """
+    将Pod分为可以用delete_collection批量删除的分组和需要逐个删除的Pod
+
+    Args:
+        pods: 要删除的Pod列表
+        min_pods: 同一命名空间、同一状态的Pod达到该数量时批量删除，0表示禁用
+
+    Returns:
+        Tuple: (命名空间, 状态, Pod列表) 分组列表，以及逐个删除的Pod列表
+    """
+    if min_pods <= 0:
+        return [], pods
+
+    groups: Dict[Tuple[str, str], List[Dict]] = defaultdict(list)
+    for pod in pods:
+        groups[(pod['namespace'], pod['status'])].append(pod)
+
+    collections = []
+    single = []
+    for (namespace, phase), group in groups.items():
+        if len(group) >= min_pods:
+            collections.append((namespace, phase, group))
+        else:
+            single.extend(group)
+    return collections, single
+
+class PodDeleter:
+    """
+    单个集群的Pod删除引擎
+
+    - 按批次并行删除，所有线程共享一个令牌桶限流
+    - 遇到429/503时按Retry-After或指数退避（带抖动）重试
+    - 404视为已删除
+    - 同一命名空间、同一状态的Pod足够多时，使用delete_collection一次删除
+    - 失联节点上的Pod按节点分批，使用grace_period_seconds=0强制删除，不等待无法响应的kubelet
+    """
+
+    def __init__(
+        self,
+        cluster_name: str,
+        api: client.CoreV1Api,
+        max_workers: int = MAX_WORKERS,
+        batch_size: int = BATCH_SIZE,
+        qps: float = DELETE_QPS,
+        burst: int = DELETE_BURST,
+        max_retries: int = DELETE_MAX_RETRIES,
+        bulk_min_pods: int = BULK_DELETE_MIN_PODS,
+        request_timeout: Union[int, Tuple[float, float]] = (CLUSTER_CONNECT_TIMEOUT, REQUEST_TIMEOUT),
+        metrics: Optional[MetricsRegistry] = None,
+        deadline_at: Optional[float] = None,
+    ):
+        """
+        初始化删除引擎
+
+        Args:
+            cluster_name: 集群名称
+            api: 集群的API客户端
+            max_workers: 并行删除的最大线程数
+            batch_size: 每个批次的Pod数量
+            qps: 每秒最多发出的删除请求数，0表示不限流
+            burst: 允许的突发请求数
+            max_retries: 429/503时的最大重试次数
+            bulk_min_pods: 使用delete_collection的最小Pod数量，0表示禁用
+            request_timeout: 单个API请求的超时时间，整数秒或（连接超时, 读取超时）
+            metrics: 可选的指标，记录删除请求耗时、错误和重试次数
+            deadline_at: 可选的截止时间（time.time()时间戳），到达后不再发出新的删除请求，未删除的Pod计为失败
+        """
+        self.cluster_name = cluster_name
+        self.api = api
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.bulk_min_pods = bulk_min_pods
+        self.request_timeout = request_timeout
+        self.rate_limiter = TokenBucket(qps, burst)
+        self.metrics = metrics or MetricsRegistry()
+        self.deadline_at = deadline_at
+
+    def _expired(self) -> bool:
+        """是否已经到达截止时间"""
+        return self.deadline_at is not None and time.time() >= self.deadline_at
+
+    def _call_with_retry(self, func, *args, **kwargs) -> float:
+        """
+        带限流和重试地调用删除接口，404视为已删除
+
+        Returns:
+            float: 最后一次请求的耗时（秒）
+        """
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            start = time.monotonic()
+            try:
+                func(*args, _request_timeout=self.request_timeout, **kwargs)
+                elapsed = time.monotonic() - start
+                self.metrics.observe(self.cluster_name, 'delete', elapsed)
+                return elapsed
+            except ApiException as e:
+                elapsed = time.monotonic() - start
+                self.metrics.observe(self.cluster_name, 'delete', elapsed)
+                if e.status == 404:
+                    return elapsed
+                self.metrics.inc(self.cluster_name, 'api_errors')
+                if e.status not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    raise
+                self.metrics.inc(self.cluster_name, 'retries')
+                time.sleep(backoff_delay(attempt, e.headers.get('Retry-After') if e.headers else None))
+                attempt += 1
+
+    def _delete_batch(
+        self,
+        pods: List[Dict],
+        on_finished: Optional[Callable[[List[Dict]], None]] = None,
+        grace_period_seconds: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        顺序删除一批Pod
+
+        Pod带有uid时，删除请求会携带uid前置条件，
+        同名但已被重建的Pod不会被误删（API返回409，计为跳过）。
+        grace_period_seconds为0时强制删除，API服务器不等待kubelet确认容器已停止。
+
+        Returns:
+            Dict[str, Any]: {'stats': 成功/失败/跳过数量, 'latencies': 请求耗时列表}
+        """
+        stats = {'success': 0, 'failed': 0, 'skipped': 0}
+        latencies = []
+        finished = []
+        for pod in pods:
+            if self._expired():
+                break
+            preconditions = client.V1Preconditions(uid=pod['uid']) if pod.get('uid') else None
+            try:
+                elapsed = self._call_with_retry(
+                    self.api.delete_namespaced_pod,
+                    name=pod['name'],
+                    namespace=pod['namespace'],
+                    body=client.V1DeleteOptions(preconditions=preconditions, grace_period_seconds=grace_period_seconds),
+                )
+                latencies.append(elapsed)
+                stats['success'] += 1
+                finished.append(pod)
+                # 删除循环中的逐个Pod日志默认关闭，使用惰性格式化避免无谓的字符串拼接
+                logger.debug("成功删除Pod: %s/%s in %s", pod['namespace'], pod['name'], self.cluster_name)
+            except ApiException as e:
+                if e.status != 409:
+                    stats['failed'] += 1
+                    logger.error(f"删除Pod失败 {pod['namespace']}/{pod['name']} in {self.cluster_name}: {str(e)}")
+                    continue
+                stats['skipped'] += 1
+                finished.append(pod)
+                logger.warning(f"Pod已被重建，跳过删除: {pod['namespace']}/{pod['name']} in {self.cluster_name}")
+            except Exception as e:
+                stats['failed'] += 1
+                logger.error(f"删除Pod失败 {pod['namespace']}/{pod['name']} in {self.cluster_name}: {str(e)}")
+        if on_finished is not None and finished:
+            on_finished(finished)
+        return {'stats': stats, 'latencies': latencies}
+
+    def _delete_collection(self, namespace: str, phase: str, pods: List[Dict],
+                           on_finished: Optional[Callable[[List[Dict]], None]] = None) -> Dict[str, Any]:
+        """
+        使用field selector一次删除命名空间中指定状态的所有Pod
+
+        Returns:
+            Dict[str, Any]: {'stats': 成功/失败数量, 'latencies': 请求耗时列表}
+        """
+        try:
+            elapsed = self._call_with_retry(
+                self.api.delete_collection_namespaced_pod,
+                namespace,
+                field_selector=f"status.phase={phase}",
+                body=client.V1DeleteOptions(),
+            )
+            logger.info(f"成功批量删除 {len(pods)} 个Pod: {namespace} (status.phase={phase}) in {self.cluster_name}")
+            if on_finished is not None:
+                on_finished(pods)
+            return {'stats': {'success': len(pods), 'failed': 0, 'skipped': 0}, 'latencies': [elapsed]}
+        except Exception as e:
+            logger.error(f"批量删除Pod失败 {namespace} (status.phase={phase}) in {self.cluster_name}: {str(e)}")
+            return {'stats': {'success': 0, 'failed': len(pods), 'skipped': 0}, 'latencies': []}
+
+    def delete(
+        self,
+        pods: List[Dict],
+        allow_collection: bool = True,
+        on_finished: Optional[Callable[[List[Dict]], None]] = None,
+        node_pods: Optional[Dict[str, List[Dict]]] = None,
+    ) -> Dict[str, int]:
+        """
+        并行删除Pod
+
+        Args:
+            pods: 要删除的Pod列表
+            allow_collection: 是否允许使用delete_collection；
+                只有当Pod列表正好是field selector的全部匹配结果时才应开启，
+                删除预先确认过的候选Pod时必须关闭
+            on_finished: 可选的回调，每个批次结束后以该批次中已删除、已不存在或已被重建的Pod调用，
+                可能在多个线程中同时调用
+            node_pods: 可选的失联节点到Pod的索引（Pod必须在pods中），这些Pod按节点分批强制删除，
+                不同节点的批次与其他批次一起并行执行
+
+        Returns:
+            Dict[str, int]: total/success/failed/skipped以及p50_ms/p90_ms/p99_ms延迟统计
+        """
+        tasks: List[Any] = []
+        remaining = pods
+        if node_pods:
+            # 失联节点上的Pod先提交，每个节点的Pod单独分批，不与其他节点混在同一批次
+            for node_pod_list in node_pods.values():
+                tasks += [('node', node_pod_list[i:i + self.batch_size])
+                          for i in range(0, len(node_pod_list), self.batch_size)]
+            on_nodes = {id(pod) for node_pod_list in node_pods.values() for pod in node_pod_list}
+            remaining = [pod for pod in pods if id(pod) not in on_nodes]
+            self.metrics.inc(self.cluster_name, 'dead_node_pods', len(on_nodes))
+            logger.info(f"集群 {self.cluster_name} 有 {len(on_nodes)} 个问题Pod位于 {len(node_pods)} 个失联节点上，按节点强制删除")
+
+        collections, single = plan_collection_deletes(remaining, self.bulk_min_pods) if allow_collection else ([], remaining)
+
+        # 按命名空间排序，使同一批次尽量落在同一个命名空间
+        single = sorted(single, key=lambda pod: pod['namespace'])
+        tasks += [('collection', group) for group in collections]
+        tasks += [('single', single[i:i + self.batch_size]) for i in range(0, len(single), self.batch_size)]
+
+        def run(batch: List[Any]) -> Dict[str, Any]:
+            kind, payload = batch[0]
+            if kind == 'collection':
+                return self._delete_collection(*payload, on_finished=on_finished)
+            if kind == 'node':
+                return self._delete_batch(payload, on_finished=on_finished, grace_period_seconds=0)
+            return self._delete_batch(payload, on_finished=on_finished)
+
+        processor = BatchProcessor(tasks, batch_size=1, max_workers=self.max_workers)
+        timeout = None if self.deadline_at is None else max(0.0, self.deadline_at - time.time())
+        result = processor.process(run, timeout=timeout)
+
+        merged = result.get('stats', {})
+        stats = {'total': len(pods), 'success': merged.get('success', 0), 'skipped': merged.get('skipped', 0)}
+        # 未完成的批次计为失败
+        stats['failed'] = stats['total'] - stats['success'] - stats['skipped']
+        self.metrics.inc(self.cluster_name, 'pods_deleted', stats['success'])
+        stats.update(latency_stats(result.get('latencies', [])))
+        log_delete_summary(self.cluster_name, stats)
+        return stats
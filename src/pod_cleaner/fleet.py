@@ -0,0 +1,292 @@
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .config import get_kubeconfig_dir, FLEET_PROCESSES, RUN_DEADLINE
+from .kubeconfig import resolve_kubeconfigs
+from .logger import setup_logger
+from .metrics import MetricsRegistry
+from .scheduler import ClusterHistory, RunSchedule
+from .snapshot_store import SnapshotWriter
+
+logger = setup_logger(__name__)
+
+# 子进程返回问题Pod时使用的字段顺序，以元组代替字典减少序列化的数据量
+POD_FIELDS = (
+    'namespace', 'name', 'uid', 'resource_version', 'status', 'reason', 'rule', 'creation_timestamp', 'node_name',
+)
+
+# 子进程中的集群管理器，由_init_worker创建，同一个子进程处理的所有集群共享
+_worker_manager = None
+
+def compact_pods(pods: List[Dict]) -> List[Tuple]:
+    """将问题Pod转换为按POD_FIELDS排列的元组"""
+    return [tuple(pod.get(field) for field in POD_FIELDS) for pod in pods]
+
+def expand_pods(rows: List[Tuple]) -> List[Dict]:
+    """将compact_pods的结果还原为问题Pod"""
+    return [dict(zip(POD_FIELDS, row)) for row in rows]
+
+def _init_worker(kwargs: Dict[str, Any]) -> None:
+    """子进程初始化：创建只在本进程中使用的集群管理器"""
+    global _worker_manager
+    from .cluster_manager import ClusterManager
+    # 运行历史由父进程记录，子进程不传入history_file
+    _worker_manager = ClusterManager(**kwargs)
+
+def _worker_scan(
+    cluster_name: str,
+    deadline_at: Optional[float],
+    namespace: Optional[str],
+) -> Tuple[Optional[List[Tuple]], Dict, float]:
+    """
+    在子进程中列出单个集群的问题Pod，使用父进程提交任务时的截止时间
+
+    Returns:
+        Tuple[Optional[List[Tuple]], Dict, float]: 问题Pod（失败时为None）、本次的指标和耗时（秒）
+    """
+    start = time.perf_counter()
+    _worker_manager.metrics = MetricsRegistry()
+    _worker_manager.deadline_at = deadline_at
+    result = _worker_manager._scan_cluster(cluster_name, namespace)
+    pods = result.get(cluster_name)
+    rows = compact_pods(pods) if pods is not None else None
+    return rows, _worker_manager.metrics.snapshot(), time.perf_counter() - start
+
+def _worker_delete(
+    cluster_name: str,
+    deadline_at: Optional[float],
+    namespace: Optional[str],
+    dry_run: bool,
+    rows: Optional[List[Tuple]],
+) -> Tuple[Optional[Dict[str, int]], Dict, float]:
+    """
+    在子进程中删除单个集群的问题Pod，rows为None时先列出，使用父进程提交任务时的截止时间
+
+    Returns:
+        Tuple[Optional[Dict[str, int]], Dict, float]: 删除统计信息（列出失败时为None）、本次的指标和耗时（秒）
+    """
+    start = time.perf_counter()
+    _worker_manager.metrics = MetricsRegistry()
+    _worker_manager.deadline_at = deadline_at
+    if rows is not None:
+        result = _worker_manager._delete_cluster_pods(cluster_name, expand_pods(rows), dry_run, allow_collection=False)
+    else:
+        scanned = _worker_manager._scan_cluster(cluster_name, namespace)
+        result = _worker_manager._delete_cluster_pods(cluster_name, scanned[cluster_name], dry_run) if scanned else {}
+    return result.get(cluster_name), _worker_manager.metrics.snapshot(), time.perf_counter() - start
+
+class FleetManager:
+    """
+    多进程集群管理器
+
+    JSON解码和规则计算受GIL限制只能使用一个CPU核心。FleetManager把集群分配给进程池，
+    每个子进程运行自己的ClusterManager，只把精简的问题Pod元组、删除统计和指标数据返回父进程。
+    集群逐个分配给空闲的子进程，耗时长的集群不会让同一分片中的其他集群排队；
+    按运行历史先提交耗时最长的集群，到达截止时间后返回已完成集群的结果。
+
+    提供与ClusterManager相同的列出和删除接口，不支持检查点和daemon模式。
+    """
+
+    def __init__(
+        self,
+        processes: int = FLEET_PROCESSES,
+        kubeconfig_dir: Optional[str] = None,
+        cluster_names: Optional[Iterable[str]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        snapshot: Optional[SnapshotWriter] = None,
+        deadline: float = RUN_DEADLINE,
+        history_file: Optional[str] = None,
+        **kwargs,
+    ):
+        """
+        初始化多进程集群管理器
+
+        Args:
+            processes: 子进程数，不超过集群数
+            kubeconfig_dir: kubeconfig目录路径，默认读取KUBECONFIG_DIR
+            cluster_names: 可选的集群名称列表，只管理这些集群
+            metrics: 合并所有子进程指标的指标，默认新建
+            snapshot: 可选的快照缓冲，在父进程中写入子进程返回的问题Pod
+            deadline: 从创建时开始计算的截止时间（秒），0表示不限制；子进程使用相同的截止时间
+            history_file: 每个集群运行历史的文件，由父进程读写，为空时只在内存中记录
+            **kwargs: 传递给子进程中ClusterManager的其他参数，必须可以序列化
+        """
+        self.kubeconfig_dir = kubeconfig_dir or get_kubeconfig_dir()
+        self.kubeconfigs = resolve_kubeconfigs(self.kubeconfig_dir, cluster_names)
+        # 父进程不创建客户端，clusters只用于获取集群名称
+        self.clusters = self.kubeconfigs
+        self.metrics = metrics or MetricsRegistry()
+        self.snapshot = snapshot
+        self.deadline_at = time.time() + deadline if deadline else None
+        self.history = ClusterHistory(history_file)
+        self.schedule: Optional[RunSchedule] = None
+        self.processes = max(1, min(processes, len(self.kubeconfigs)))
+        self.worker_kwargs = dict(kwargs, kubeconfig_dir=self.kubeconfig_dir, cluster_names=list(self.kubeconfigs))
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """第一次使用时创建进程池"""
+        if self._executor is None:
+            # 父进程中有日志线程和线程池，使用spawn避免fork后子进程继承持有中的锁
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.worker_kwargs,),
+            )
+            logger.info(f"启动 {self.processes} 个子进程处理 {len(self.kubeconfigs)} 个集群")
+        return self._executor
+
+    def _submit(self, schedule: RunSchedule, fn, args: Dict[str, Tuple]) -> Dict[Future, str]:
+        """
+        按调度顺序提交每个集群的任务，耗时最长的集群最先开始
+
+        Args:
+            schedule: 本次运行的调度
+            fn: 子进程中执行的函数，前两个参数为集群名称和截止时间
+            args: 每个集群的其他参数
+        """
+        executor = self._get_executor()
+        return {
+            executor.submit(fn, cluster_name, self.deadline_at, *args[cluster_name]): cluster_name
+            for cluster_name in schedule.order
+        }
+
+    def _iter_completed(self, futures: Dict[Future, str], schedule: RunSchedule) -> Iterator[Tuple[str, Any]]:
+        """
+        按完成顺序返回每个集群的结果，合并子进程的指标并记录运行历史；子进程异常退出时只记录错误
+
+        到达截止时间后不再等待，已经在子进程中运行的集群标记为超时中止，其余为未开始。
+        """
+        try:
+            for future in as_completed(futures, timeout=schedule.remaining()):
+                cluster_name = futures[future]
+                try:
+                    result, snapshot, elapsed = future.result()
+                except Exception as e:
+                    logger.error(f"子进程处理集群 {cluster_name} 失败: {str(e)}")
+                    schedule.finish(cluster_name, False, duration=0.0)
+                    continue
+                scanned = self.metrics.counter(cluster_name, 'pods_scanned')
+                self.metrics.merge(snapshot)
+                if isinstance(result, dict):
+                    # 删除统计：截止时间前没有删除完的集群不算完成
+                    ok = not (result['failed'] and schedule.expired())
+                    problem_pods = result['total']
+                else:
+                    ok = result is not None
+                    problem_pods = len(result) if result is not None else None
+                schedule.finish(
+                    cluster_name, ok, duration=elapsed,
+                    pods=int(self.metrics.counter(cluster_name, 'pods_scanned') - scanned) or None,
+                    problem_pods=problem_pods,
+                )
+                if result is not None:
+                    yield cluster_name, result
+        except FuturesTimeoutError:
+            for future, cluster_name in futures.items():
+                if future.running():
+                    schedule.start(cluster_name)
+        finally:
+            for future in futures:
+                future.cancel()
+            schedule.close()
+
+    def extend_deadline(self, seconds: float) -> None:
+        """
+        推迟截止时间，之后提交的任务在子进程中使用新的截止时间
+
+        Args:
+            seconds: 推迟的秒数，没有设置截止时间时忽略
+        """
+        if self.deadline_at is not None:
+            self.deadline_at += seconds
+
+    def close(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def iter_problem_pods(self, namespace: Optional[str] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        在子进程中并行列出所有集群的问题Pod，每个集群完成后立即返回
+
+        Args:
+            namespace: 可选的命名空间过滤
+
+        Yields:
+            Tuple[str, List[Dict]]: 集群名称和该集群的问题Pod列表
+        """
+        if not self.kubeconfigs:
+            return
+        schedule = self.schedule = RunSchedule(self.kubeconfigs, self.history, 'list', self.deadline_at)
+        futures = self._submit(schedule, _worker_scan, {name: (namespace,) for name in self.kubeconfigs})
+        for cluster_name, rows in self._iter_completed(futures, schedule):
+            pods = expand_pods(rows)
+            if self.snapshot is not None:
+                self.snapshot.add(cluster_name, pods)
+            yield cluster_name, pods
+
+    def iter_problem_pod_records(self, namespace: Optional[str] = None) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        逐个返回问题Pod，与ClusterManager.iter_problem_pod_records的接口一致，以集群为单位输出
+
+        Yields:
+            Tuple[str, Optional[Dict]]: 集群名称和问题Pod，Pod为None表示该集群扫描完成
+        """
+        for cluster_name, pods in self.iter_problem_pods(namespace):
+            for pod in pods:
+                yield cluster_name, pod
+            yield cluster_name, None
+
+    def list_problem_pods(self, namespace: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        列出所有集群中满足清理规则的Pod
+
+        Returns:
+            Dict[str, List[Dict]]: 按集群名称组织的问题Pod列表
+        """
+        return dict(self.iter_problem_pods(namespace))
+
+    def iter_delete_problem_pods(
+        self,
+        namespace: Optional[str] = None,
+        dry_run: bool = False,
+        candidates: Optional[Dict[str, List[Dict]]] = None,
+    ) -> Iterator[Tuple[str, Dict[str, int]]]:
+        """
+        在子进程中并行删除所有集群中的问题Pod，每个集群完成后立即返回统计信息
+
+        Args:
+            namespace: 可选的命名空间过滤
+            dry_run: 是否执行试运行而不实际删除Pod
+            candidates: 预先列出的候选Pod，提供时不再重新列出
+
+        Yields:
+            Tuple[str, Dict[str, int]]: 集群名称和该集群的删除统计信息
+        """
+        if candidates is None:
+            tasks = {name: None for name in self.kubeconfigs}
+        else:
+            tasks = {name: compact_pods(pods) for name, pods in candidates.items() if name in self.kubeconfigs}
+        if not tasks:
+            return
+        schedule = self.schedule = RunSchedule(tasks, self.history, 'clean', self.deadline_at)
+        futures = self._submit(schedule, _worker_delete, {name: (namespace, dry_run, rows) for name, rows in tasks.items()})
+        yield from self._iter_completed(futures, schedule)
+
+    def delete_problem_pods(
+        self,
+        namespace: Optional[str] = None,
+        dry_run: bool = False,
+        candidates: Optional[Dict[str, List[Dict]]] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        删除所有集群中满足清理规则的Pod
+
+        Returns:
+            Dict[str, Dict[str, int]]: 每个集群的删除统计信息
+        """
+        return dict(self.iter_delete_problem_pods(namespace, dry_run, candidates))
@@ -0,0 +1,81 @@
+import socket
+import threading
+from typing import Any, Dict, List, Tuple
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# 压缩请求头，API服务器只对超过128KB的响应（如大的Pod列表）使用gzip压缩，urllib3读取时自动解压
+GZIP_HEADERS: Dict[str, str] = {'Accept-Encoding': 'gzip'}
+
+# TCP keepalive的空闲时间、探测间隔（秒）和探测次数，让空闲的连接穿过负载均衡器的空闲超时
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+
+_http2_lock = threading.Lock()
+_http2_enabled = None
+
+def keepalive_socket_options() -> List[Tuple[int, int, int]]:
+    """
+    开启TCP keepalive的socket选项，平台不支持的选项会被跳过
+
+    Returns:
+        List[Tuple[int, int, int]]: 包含urllib3默认选项（TCP_NODELAY）的socket选项
+    """
+    from urllib3.connection import HTTPConnection
+
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    for name, value in (
+        ('TCP_KEEPIDLE', KEEPALIVE_IDLE),
+        ('TCP_KEEPALIVE', KEEPALIVE_IDLE),  # macOS上的名称
+        ('TCP_KEEPINTVL', KEEPALIVE_INTERVAL),
+        ('TCP_KEEPCNT', KEEPALIVE_COUNT),
+    ):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+def tune_api_client(api_client: Any, tcp_keepalive: bool, gzip: bool) -> None:
+    """
+    调整kubernetes客户端的连接池和默认请求头
+
+    kubernetes客户端的Configuration不支持socket选项，这里直接修改PoolManager
+    创建连接池时使用的参数，只影响之后新建的连接。生成的API方法不接受自定义请求头，
+    压缩请求头作为客户端的默认请求头发送。
+
+    Args:
+        api_client: kubernetes.client.ApiClient
+        tcp_keepalive: 是否开启TCP keepalive
+        gzip: 是否请求gzip压缩的响应
+    """
+    if gzip:
+        for name, value in GZIP_HEADERS.items():
+            api_client.set_default_header(name, value)
+    if tcp_keepalive:
+        api_client.rest_client.pool_manager.connection_pool_kw['socket_options'] = keepalive_socket_options()
+
+def enable_http2() -> bool:
+    """
+    让urllib3在TLS握手时协商HTTP/2（urllib3的实验性功能，需要安装h2）
+
+    对整个进程生效，只需调用一次。urllib3的HTTP/2连接每次只处理一个请求，不做多路复用，
+    主要收益是头部压缩；明文HTTP和不支持HTTP/2的API服务器仍使用HTTP/1.1。
+
+    Returns:
+        bool: 是否已开启
+    """
+    global _http2_enabled
+    with _http2_lock:
+        if _http2_enabled is None:
+            try:
+                import h2  # noqa: F401
+                from urllib3.http2 import inject_into_urllib3
+            except ImportError:
+                logger.warning("HTTP/2需要urllib3>=2.3和h2: pip install pod-cleaner[http2]，继续使用HTTP/1.1")
+                _http2_enabled = False
+            else:
+                inject_into_urllib3()
+                _http2_enabled = True
+        return _http2_enabled
@@ -0,0 +1,64 @@
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def is_kubeconfig_file(filename: str) -> bool:
+    """
+    判断文件名是否是kubeconfig文件
+    
+    符合要求的文件：
+    1. 以.yaml或.yml结尾
+    2. 以k8s或K8S开头
+    隐藏文件会被跳过
+    """
+    if filename.startswith('.'):
+        return False
+    return filename.endswith(('.yaml', '.yml')) or filename.startswith(('k8s', 'K8S'))
+
+def discover_kubeconfigs(kubeconfig_dir: str, cluster_names: Optional[Iterable[str]] = None) -> List[Tuple[str, str]]:
+    """
+    扫描目录中的kubeconfig文件，只读取文件名，不解析文件内容
+    
+    Args:
+        kubeconfig_dir: kubeconfig目录路径
+        cluster_names: 可选的集群名称列表，只返回这些集群
+        
+    Returns:
+        List[Tuple[str, str]]: (集群名称, kubeconfig路径) 列表
+    """
+    selected = set(cluster_names) if cluster_names else None
+    kubeconfigs = []
+    for filename in sorted(os.listdir(kubeconfig_dir)):
+        if not is_kubeconfig_file(filename):
+            continue
+        cluster_name = os.path.splitext(filename)[0]
+        if selected is not None and cluster_name not in selected:
+            continue
+        kubeconfig_path = os.path.join(kubeconfig_dir, filename)
+        # 跳过目录
+        if os.path.isdir(kubeconfig_path):
+            continue
+        kubeconfigs.append((cluster_name, kubeconfig_path))
+    return kubeconfigs
+
+def resolve_kubeconfigs(kubeconfig_dir: str, cluster_names: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    获取要管理的集群，目录不存在或指定的集群没有对应的kubeconfig时记录日志
+
+    Args:
+        kubeconfig_dir: kubeconfig目录路径
+        cluster_names: 可选的集群名称列表，只返回这些集群
+
+    Returns:
+        Dict[str, str]: 集群名称到kubeconfig路径的映射
+    """
+    if not os.path.exists(kubeconfig_dir):
+        logger.error(f"Kubeconfig目录不存在: {kubeconfig_dir}")
+        return {}
+
+    kubeconfigs = dict(discover_kubeconfigs(kubeconfig_dir, cluster_names))
+    for cluster_name in sorted(set(cluster_names or ()) - set(kubeconfigs)):
+        logger.warning(f"未找到集群的kubeconfig文件: {cluster_name}")
+    return kubeconfigs
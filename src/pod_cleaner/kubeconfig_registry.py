@@ -0,0 +1,204 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from .cluster_cache import file_fingerprint
+from .config import KUBECONFIG_POLL_INTERVAL
+from .kubeconfig import discover_kubeconfigs
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# inotify事件：文件创建、删除、改名、写入完成和属性变化，以及目录本身被删除或移动
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+# 收到事件后等待该时间（秒）再扫描，合并一次轮换中连续的多个事件
+DEBOUNCE_SECONDS = 0.2
+
+class KubeconfigChanges(NamedTuple):
+    """一次扫描发现的kubeconfig变化"""
+    # 新增的集群: 集群名称到kubeconfig路径
+    added: Dict[str, str]
+    # 内容变化的集群: 集群名称到kubeconfig路径
+    changed: Dict[str, str]
+    # 被删除的集群名称
+    removed: List[str]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+class _Inotify:
+    """
+    通过libc的inotify监听目录，不需要额外的依赖；不可用时创建失败
+    """
+
+    def __init__(self, path: str):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1失败")
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch失败: {path}")
+
+    def wait(self, timeout: float) -> bool:
+        """
+        等待目录中的事件
+
+        Returns:
+            bool: 是否收到了事件
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        # 事件的内容不重要，收到后重新扫描整个目录
+        time.sleep(DEBOUNCE_SECONDS)
+        while True:
+            try:
+                if not os.read(self.fd, 65536):
+                    break
+            except BlockingIOError:
+                break
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+class KubeconfigRegistry:
+    """
+    kubeconfig目录的指纹登记
+
+    每个kubeconfig文件记录mtime、大小和sha256。重新扫描时只对mtime或大小变化的文件计算哈希，
+    内容不变（如只更新了mtime）的文件不算变化，因此扫描的开销与变化的文件数量成正比。
+    Linux上通过inotify等待目录变化，不可用时按KUBECONFIG_POLL_INTERVAL轮询。
+    """
+
+    def __init__(
+        self,
+        kubeconfig_dir: str,
+        cluster_names: Optional[Iterable[str]] = None,
+        poll_interval: float = KUBECONFIG_POLL_INTERVAL,
+        use_inotify: bool = True,
+    ):
+        """
+        初始化登记并记录当前所有kubeconfig的指纹
+
+        Args:
+            kubeconfig_dir: kubeconfig目录路径
+            cluster_names: 可选的集群名称列表，只登记这些集群
+            poll_interval: 轮询间隔（秒）；使用inotify时也按该间隔兜底扫描一次
+            use_inotify: 是否尝试使用inotify
+        """
+        self.kubeconfig_dir = kubeconfig_dir
+        self.cluster_names = list(cluster_names) if cluster_names else None
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[str, Dict]] = {}
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self._inotify = _Inotify(kubeconfig_dir)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"无法使用inotify监听kubeconfig目录，改为每 {poll_interval} 秒轮询: {str(e)}")
+        self.scan()
+
+    @property
+    def mode(self) -> str:
+        """监听方式: inotify或poll"""
+        return 'inotify' if self._inotify is not None else 'poll'
+
+    def kubeconfigs(self) -> Dict[str, str]:
+        """当前登记的集群名称到kubeconfig路径的映射"""
+        with self._lock:
+            return {name: path for name, (path, _) in self._entries.items()}
+
+    def scan(self) -> KubeconfigChanges:
+        """
+        重新扫描目录，更新指纹并返回变化
+
+        Returns:
+            KubeconfigChanges: 新增、内容变化和被删除的集群
+        """
+        try:
+            found = discover_kubeconfigs(self.kubeconfig_dir, self.cluster_names)
+        except OSError as e:
+            # 目录暂时不可读（如正在被替换）时保持原状，下次再扫描
+            logger.warning(f"扫描kubeconfig目录失败: {str(e)}")
+            return KubeconfigChanges({}, {}, [])
+
+        with self._lock:
+            entries = dict(self._entries)
+        added: Dict[str, str] = {}
+        changed: Dict[str, str] = {}
+        current: Dict[str, Tuple[str, Dict]] = {}
+        for cluster_name, path in found:
+            old = entries.get(cluster_name)
+            try:
+                stat = os.stat(path)
+                if old is not None and old[0] == path and old[1]['mtime_ns'] == stat.st_mtime_ns \
+                        and old[1]['size'] == stat.st_size:
+                    current[cluster_name] = old
+                    continue
+                fingerprint = file_fingerprint(path)
+            except OSError:
+                # 文件在扫描过程中被删除
+                continue
+            current[cluster_name] = (path, fingerprint)
+            if old is None:
+                added[cluster_name] = path
+            elif old[0] != path or old[1]['sha256'] != fingerprint['sha256']:
+                changed[cluster_name] = path
+        removed = sorted(set(entries) - set(current))
+        with self._lock:
+            self._entries = current
+        changes = KubeconfigChanges(added, changed, removed)
+        if changes and entries:
+            logger.info(
+                f"kubeconfig变化: 新增 {', '.join(added) or '无'}，"
+                f"更新 {', '.join(changed) or '无'}，删除 {', '.join(removed) or '无'}"
+            )
+        return changes
+
+    def wait(self, stop: threading.Event) -> bool:
+        """
+        等待目录可能发生变化
+
+        使用inotify时收到事件或超过poll_interval后返回，否则等待poll_interval后返回。
+
+        Args:
+            stop: 设置后立即返回False
+
+        Returns:
+            bool: 是否需要重新扫描
+        """
+        if self._inotify is None:
+            return not stop.wait(self.poll_interval)
+        deadline = time.monotonic() + self.poll_interval
+        while not stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            # 每秒检查一次stop
+            if self._inotify.wait(min(1.0, remaining)):
+                return not stop.is_set()
+        return False
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
@@ -1,45 +1,146 @@
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List, Optional
+from rich.console import Console
 from rich.logging import RichHandler
-from .config import LOG_FORMAT, LOG_DATE_FORMAT, LOG_DIR, LOG_FILE
+from .config import LOG_FORMAT, LOG_DATE_FORMAT, LOG_FILE, LOG_JSON, LOG_LEVEL
+
+# LogRecord自带的属性，其余属性视为通过extra传入的字段
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {'message', 'asctime'}
+# 可以原样交给后台线程的参数类型，其余参数可能在调用方之后被修改
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+_lock = threading.RLock()
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+# 控制台和文件处理器，停止后台线程后直接挂到日志记录器上
+_handlers: List[logging.Handler] = []
+_loggers: List[logging.Logger] = []
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    每条日志输出为一行JSON，通过extra传入的字段（如cluster、stats）作为顶层键
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, LOG_DATE_FORMAT),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class _RecordQueueHandler(QueueHandler):
+    """
+    把原始的LogRecord放入队列，格式化留给后台线程
+
+    默认的prepare()会在调用方线程中格式化消息，这里只复制记录；
+    参数中有可变对象时才在调用方渲染消息，避免后台线程看到之后被修改的值。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        args = record.args
+        if isinstance(args, dict):
+            args = args.values()
+        if args and not all(isinstance(arg, _SCALAR_TYPES) for arg in args):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+def _get_handlers() -> List[logging.Handler]:
+    """
+    第一次调用时创建控制台和文件处理器，并启动后台写日志的线程
+
+    所有日志记录器共享同一个QueueHandler：调用方只把日志放入队列，
+    Rich渲染和文件写入都在QueueListener的线程中完成。
+    后台线程停止后返回控制台和文件处理器，日志直接在调用方写出。
+    """
+    global _queue_handler, _listener
+    with _lock:
+        if _queue_handler is not None:
+            return [_queue_handler] if _listener is not None else list(_handlers)
+
+        # 确保日志目录存在
+        os.makedirs(os.path.dirname(LOG_FILE) or '.', exist_ok=True)
+
+        # 控制台处理器（使用rich格式化），写入stderr，不混入list-pods在stdout中输出的数据
+        console_handler = RichHandler(console=Console(stderr=True), rich_tracebacks=True)
+        console_handler.setLevel(LOG_LEVEL)
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+
+        # 文件处理器
+        file_handler = RotatingFileHandler(
+            LOG_FILE,
+            maxBytes=10*1024*1024,  # 10MB
+            backupCount=5,
+            encoding='utf-8'
+        )
+        file_handler.setLevel(LOG_LEVEL)
+        if LOG_JSON:
+            file_handler.setFormatter(JsonLinesFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+
+        _handlers[:] = [console_handler, file_handler]
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = QueueListener(log_queue, *_handlers, respect_handler_level=True)
+        _listener.start()
+        # 进程退出前写出队列中剩余的日志
+        atexit.register(stop_logging)
+        _queue_handler = _RecordQueueHandler(log_queue)
+        return [_queue_handler]
+
+def stop_logging() -> None:
+    """
+    停止后台写日志的线程，并写出队列中剩余的日志
+
+    已配置的日志记录器改为直接使用控制台和文件处理器，
+    之后（如atexit或进程池关闭时）写的日志不会丢失。
+    """
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        for logger in _loggers:
+            logger.removeHandler(_queue_handler)
+        _listener.stop()
+        _listener = None
+        for logger in _loggers:
+            for handler in _handlers:
+                logger.addHandler(handler)
 
 def setup_logger(name: str) -> logging.Logger:
     """
     设置日志记录器
-    
+
+    可以重复调用，同一个日志记录器只会添加一次处理器。
+
     Args:
         name: 日志记录器名称
-    
+
     Returns:
         logging.Logger: 配置好的日志记录器
     """
-    # 确保日志目录存在
-    os.makedirs(LOG_DIR, exist_ok=True)
-    
-    # 创建日志记录器
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    # 创建控制台处理器（使用rich格式化）
-    console_handler = RichHandler(rich_tracebacks=True)
-    console_handler.setLevel(logging.INFO)
-    console_formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
-    console_handler.setFormatter(console_formatter)
-    
-    # 创建文件处理器
-    file_handler = RotatingFileHandler(
-        LOG_FILE,
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'
-    )
-    file_handler.setLevel(logging.INFO)
-    file_formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
-    file_handler.setFormatter(file_formatter)
-    
-    # 添加处理器到日志记录器
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    
-    return logger 
\ No newline at end of file
+    logger.setLevel(LOG_LEVEL)
+    with _lock:
+        for handler in _get_handlers():
+            if handler not in logger.handlers:
+                logger.addHandler(handler)
+        if logger not in _loggers:
+            _loggers.append(logger)
+    return logger
@@ -0,0 +1,271 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Tuple
+
+# 指标名称前缀
+METRICS_PREFIX = 'pod_cleaner'
+
+# 耗时直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 计数器及其说明
+COUNTERS = {
+    'pods_scanned': '列出的Pod数量',
+    'pods_matched': '满足清理规则的Pod数量',
+    'list_pages': '列表请求的页数',
+    'bytes_received': '列表响应的字节数（仅fast_decode时统计）',
+    'api_errors': 'API请求失败次数',
+    'retries': '遇到429/503后的重试次数',
+    'pods_deleted': '删除成功的Pod数量',
+    'watch_events': 'daemon模式下收到的watch事件数量',
+}
+
+# 耗时阶段及其说明
+STAGES = {
+    'connect': '解析kubeconfig、创建客户端和探测集群',
+    'list_page': '单页列表请求（包含读取响应）',
+    'decode': '单页响应解码为Pod记录',
+    'filter': '单页Pod的规则计算',
+    'delete': '单个删除请求',
+}
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Histogram:
+    """
+    固定桶的耗时直方图，与Prometheus的histogram类型对应
+    """
+
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        # 最后一个桶对应+Inf
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """
+        根据桶估算分位数（秒），取所在桶的上限；落在+Inf桶中时返回最大值
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_ms': round(self.sum * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            'p50_ms': round(self.quantile(0.5) * 1000, 3),
+            'p90_ms': round(self.quantile(0.9) * 1000, 3),
+            'p99_ms': round(self.quantile(0.99) * 1000, 3),
+        }
+
+class MetricsRegistry:
+    """
+    按集群记录计数器和各阶段耗时，可在多个线程间共享
+
+    - summary()/write_json() 输出JSON摘要，用于 --metrics-out
+    - render_prometheus()/write_textfile() 输出Prometheus文本格式，可供node_exporter的textfile收集器读取
+    - serve() 在后台线程中提供 /metrics 接口
+    """
+
+    def __init__(self):
+        self._counters: Dict[Tuple[str, str], float] = {}
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def inc(self, cluster_name: str, name: str, value: float = 1) -> None:
+        """
+        增加集群的计数器
+        """
+        key = (cluster_name, name)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def counter(self, cluster_name: str, name: str) -> float:
+        """
+        集群计数器的当前值，没有记录时为0
+        """
+        with self._lock:
+            return self._counters.get((cluster_name, name), 0)
+
+    def observe(self, cluster_name: str, stage: str, seconds: float) -> None:
+        """
+        记录集群某个阶段的一次耗时
+        """
+        key = (cluster_name, stage)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, cluster_name: str, stage: str) -> Iterator[None]:
+        """
+        记录代码块耗时的上下文管理器，代码块抛出异常时同样记录
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(cluster_name, stage, time.perf_counter() - start)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        生成JSON摘要
+
+        Returns:
+            Dict[str, Any]: 运行时长，以及按集群组织的计数器和各阶段耗时统计
+        """
+        clusters: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (cluster_name, name), value in sorted(self._counters.items()):
+                clusters.setdefault(cluster_name, {'counters': {}, 'timings': {}})['counters'][name] = value
+            for (cluster_name, stage), histogram in sorted(self._histograms.items()):
+                clusters.setdefault(cluster_name, {'counters': {}, 'timings': {}})['timings'][stage] = histogram.to_dict()
+        return {
+            'started': self.started,
+            'elapsed_seconds': round(time.time() - self.started, 3),
+            'clusters': clusters,
+        }
+
+    def snapshot(self) -> Dict[str, List]:
+        """
+        导出计数器和直方图的原始数据，可以在其他进程中用merge()合并
+
+        Returns:
+            Dict[str, List]: counters为(集群, 名称, 值)列表，histograms为(集群, 阶段, 桶计数, 次数, 总和, 最大值)列表
+        """
+        with self._lock:
+            return {
+                'counters': [(cluster_name, name, value) for (cluster_name, name), value in self._counters.items()],
+                'histograms': [
+                    (cluster_name, stage, list(h.counts), h.count, h.sum, h.max)
+                    for (cluster_name, stage), h in self._histograms.items()
+                ],
+            }
+
+    def merge(self, snapshot: Dict[str, List]) -> None:
+        """
+        合并snapshot()导出的数据
+        """
+        with self._lock:
+            for cluster_name, name, value in snapshot['counters']:
+                key = (cluster_name, name)
+                self._counters[key] = self._counters.get(key, 0) + value
+            for cluster_name, stage, counts, count, total, maximum in snapshot['histograms']:
+                histogram = self._histograms.get((cluster_name, stage))
+                if histogram is None:
+                    histogram = self._histograms[(cluster_name, stage)] = Histogram()
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.count += count
+                histogram.sum += total
+                histogram.max = max(histogram.max, maximum)
+
+    def render_prometheus(self) -> str:
+        """
+        生成Prometheus文本格式（exposition format 0.0.4）
+        """
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(h.counts), h.count, h.sum) for key, h in self._histograms.items())
+
+        for name, description in COUNTERS.items():
+            samples = [(cluster_name, value) for (cluster_name, counter), value in counters if counter == name]
+            if not samples:
+                continue
+            metric = f"{METRICS_PREFIX}_{name}_total"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} counter")
+            for cluster_name, value in samples:
+                lines.append(f'{metric}{{cluster="{_escape_label(cluster_name)}"}} {value:g}')
+
+        if histograms:
+            metric = f"{METRICS_PREFIX}_stage_duration_seconds"
+            lines.append(f"# HELP {metric} 各阶段耗时（{', '.join(f'{k}: {v}' for k, v in STAGES.items())}）")
+            lines.append(f"# TYPE {metric} histogram")
+            for (cluster_name, stage), counts, count, total in histograms:
+                labels = f'cluster="{_escape_label(cluster_name)}",stage="{_escape_label(stage)}"'
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'{metric}_sum{{{labels}}} {total:.6f}')
+                lines.append(f'{metric}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path: str) -> None:
+        """
+        将JSON摘要写入文件
+        """
+        _write_atomic(path, json.dumps(self.summary(), ensure_ascii=False, indent=2))
+
+    def write_textfile(self, path: str) -> None:
+        """
+        将Prometheus文本写入文件，先写临时文件再替换，避免收集器读到不完整的内容
+        """
+        _write_atomic(path, self.render_prometheus())
+
+    def serve(self, port: int, host: str = '') -> ThreadingHTTPServer:
+        """
+        在后台线程中提供 /metrics 接口
+
+        Returns:
+            ThreadingHTTPServer: HTTP服务，调用shutdown()停止
+        """
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        return server
+
+def _write_atomic(path: str, content: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
@@ -0,0 +1,66 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from .pod_record import json_loads, parse_timestamp
+
+def node_is_dead(item: Dict[str, Any], now: datetime, grace: float) -> bool:
+    """
+    节点是否已确认失联
+
+    Ready条件不为True（NotReady或节点控制器已标记为Unknown）且持续了grace秒以上，
+    刚刚变为NotReady的节点可能只是短暂抖动，不计为失联。
+
+    Args:
+        item: 原始JSON中的Node对象
+        now: 当前时间
+        grace: NotReady的最短持续时间（秒）
+    """
+    conditions = (item.get('status') or {}).get('conditions') or ()
+    ready = next((condition for condition in conditions if condition.get('type') == 'Ready'), None)
+    if ready is None:
+        # 刚注册、尚未上报状态的节点不计为失联
+        return False
+    if ready.get('status') == 'True':
+        return False
+    since = parse_timestamp(ready.get('lastTransitionTime'))
+    return since is None or now - since >= timedelta(seconds=grace)
+
+def decode_node_list(data: bytes, now: datetime, grace: float) -> Tuple[List[str], List[str], Optional[str]]:
+    """
+    解析原始的NodeList响应，只保留节点名称和是否失联
+
+    Node对象中有镜像列表等大量字段，不做kubernetes模型的反序列化。
+
+    Returns:
+        Tuple: 所有节点名称、失联的节点名称和continue token
+    """
+    node_list = json_loads(data)
+    names, dead = [], []
+    for item in node_list.get('items') or ():
+        name = (item.get('metadata') or {}).get('name')
+        names.append(name)
+        if node_is_dead(item, now, grace):
+            dead.append(name)
+    return names, dead, (node_list.get('metadata') or {}).get('continue') or None
+
+def index_pods_by_dead_node(pods: Iterable[Dict], nodes: Set[str], dead_nodes: Set[str]) -> Dict[str, List[Dict]]:
+    """
+    建立失联节点到问题Pod的索引
+
+    节点在列表中且已确认失联，或者节点已被删除（不在节点列表中）时，
+    该节点上的问题Pod进入索引；尚未调度的Pod和正常节点上的Pod不在索引中。
+
+    Args:
+        pods: 问题Pod列表
+        nodes: 集群中的所有节点名称
+        dead_nodes: 已确认失联的节点名称
+
+    Returns:
+        Dict[str, List[Dict]]: 节点名称到该节点上问题Pod的映射
+    """
+    index: Dict[str, List[Dict]] = defaultdict(list)
+    for pod in pods:
+        node_name = pod.get('node_name')
+        if node_name and (node_name in dead_nodes or node_name not in nodes):
+            index[node_name].append(pod)
+    return dict(index)
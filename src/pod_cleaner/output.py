@@ -0,0 +1,122 @@
+import csv
+import json
+import sys
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, IO, List, Optional, Sequence, Tuple
+
+# list-pods支持的输出格式，table为Rich表格，其余为便于脚本处理的格式
+OUTPUT_TABLE = "table"
+OUTPUT_JSON = "json"
+OUTPUT_NDJSON = "ndjson"
+OUTPUT_CSV = "csv"
+OUTPUT_FORMATS = (OUTPUT_TABLE, OUTPUT_JSON, OUTPUT_NDJSON, OUTPUT_CSV)
+
+# 逐个Pod输出时的字段
+POD_FIELDS = ('cluster', 'namespace', 'name', 'status', 'reason', 'rule', 'creation_timestamp', 'uid')
+
+# --summary-only输出时的字段
+SUMMARY_FIELDS = ('cluster', 'namespace', 'reason', 'count')
+
+def pod_row(cluster_name: str, pod: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将问题Pod转换为只包含POD_FIELDS的输出行，时间使用ISO 8601格式
+
+    Args:
+        cluster_name: 集群名称
+        pod: 集群管理器返回的问题Pod
+
+    Returns:
+        Dict[str, Any]: 输出行
+    """
+    created = pod.get('creation_timestamp')
+    return {
+        'cluster': cluster_name,
+        'namespace': pod.get('namespace'),
+        'name': pod.get('name'),
+        'status': pod.get('status'),
+        'reason': pod.get('reason'),
+        'rule': pod.get('rule'),
+        'creation_timestamp': created.isoformat() if isinstance(created, datetime) else created,
+        'uid': pod.get('uid'),
+    }
+
+class RecordWriter:
+    """
+    以json、ndjson或csv格式逐行写出记录
+
+    每行写出后不再保留，内存占用与记录数量无关。json格式写出一个数组，
+    数组的括号分别在第一行之前和close()时写出。
+    """
+
+    def __init__(self, output: str, fields: Sequence[str], stream: Optional[IO[str]] = None):
+        if output not in (OUTPUT_JSON, OUTPUT_NDJSON, OUTPUT_CSV):
+            raise ValueError(f"不支持的输出格式: {output}")
+        self.output = output
+        self.fields = tuple(fields)
+        self.stream = stream or sys.stdout
+        self.count = 0
+        self._csv = None
+        if output == OUTPUT_CSV:
+            self._csv = csv.DictWriter(self.stream, fieldnames=self.fields, extrasaction='ignore', lineterminator='\n')
+            self._csv.writeheader()
+        elif output == OUTPUT_JSON:
+            self.stream.write('[')
+
+    def write(self, row: Dict[str, Any]) -> None:
+        """写出一行记录"""
+        if self._csv is not None:
+            self._csv.writerow(row)
+        elif self.output == OUTPUT_NDJSON:
+            self.stream.write(json.dumps(row, ensure_ascii=False))
+            self.stream.write('\n')
+        else:
+            self.stream.write(',\n' if self.count else '\n')
+            self.stream.write(json.dumps(row, ensure_ascii=False))
+        self.count += 1
+
+    def flush(self) -> None:
+        """将已写出的记录交给下游，例如每个集群扫描完成时"""
+        self.stream.flush()
+
+    def close(self) -> None:
+        """结束输出，json格式写出数组的结尾"""
+        if self.output == OUTPUT_JSON:
+            self.stream.write('\n]\n' if self.count else ']\n')
+        self.stream.flush()
+
+class PodSummary:
+    """
+    按集群、命名空间和原因统计问题Pod的数量，不保存逐个Pod的记录
+    """
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.clusters: List[str] = []
+
+    def add(self, cluster_name: str, pod: Dict[str, Any]) -> None:
+        """统计一个问题Pod"""
+        self.counts[(cluster_name, pod.get('namespace'), pod.get('reason') or pod.get('status'))] += 1
+
+    def finish_cluster(self, cluster_name: str) -> None:
+        """记录扫描完成的集群，没有问题Pod的集群也会出现在结果中"""
+        self.clusters.append(cluster_name)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        按集群名称排序、同一集群内按数量从多到少排序的统计行
+
+        Returns:
+            List[Dict[str, Any]]: 包含SUMMARY_FIELDS的统计行
+        """
+        items: List[Tuple[Tuple[str, str, str], int]] = sorted(
+            self.counts.items(), key=lambda item: (item[0][0], -item[1], item[0][1] or '', item[0][2] or ''),
+        )
+        return [
+            {'cluster': cluster, 'namespace': namespace, 'reason': reason, 'count': count}
+            for (cluster, namespace, reason), count in items
+        ]
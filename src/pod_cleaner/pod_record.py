@@ -0,0 +1,192 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson是可选依赖，不可用时退回标准库
+    import json
+    json_loads = json.loads
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """
+    解析Kubernetes的RFC3339时间字符串
+
+    Args:
+        value: 时间字符串，例如 2024-01-01T00:00:00Z
+
+    Returns:
+        Optional[datetime]: 带时区的时间，输入为空时返回None
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+class ContainerStatusRecord:
+    """容器状态的精简记录"""
+
+    __slots__ = ('name', 'ready', 'restart_count', 'reason', 'exit_code')
+
+    def __init__(self, name: str, ready: bool = False, restart_count: int = 0,
+                 reason: Optional[str] = None, exit_code: Optional[int] = None):
+        self.name = name
+        self.ready = ready
+        self.restart_count = restart_count
+        # 终止原因（如OOMKilled）或等待原因（如CrashLoopBackOff）
+        self.reason = reason
+        self.exit_code = exit_code
+
+    @classmethod
+    def from_dict(cls, status: Dict[str, Any]) -> 'ContainerStatusRecord':
+        """从原始JSON中的containerStatuses条目创建记录"""
+        state = status.get('state') or {}
+        terminated = state.get('terminated')
+        waiting = state.get('waiting')
+        if terminated:
+            reason, exit_code = terminated.get('reason'), terminated.get('exitCode')
+        elif waiting:
+            reason, exit_code = waiting.get('reason'), None
+        else:
+            reason, exit_code = None, None
+        return cls(
+            status.get('name'),
+            status.get('ready', False),
+            status.get('restartCount', 0),
+            reason,
+            exit_code,
+        )
+
+    @classmethod
+    def from_model(cls, status: Any) -> 'ContainerStatusRecord':
+        """从kubernetes客户端的V1ContainerStatus创建记录"""
+        state = status.state
+        reason, exit_code = None, None
+        if state is not None and state.terminated is not None:
+            reason, exit_code = state.terminated.reason, state.terminated.exit_code
+        elif state is not None and state.waiting is not None:
+            reason = state.waiting.reason
+        return cls(status.name, status.ready, status.restart_count, reason, exit_code)
+
+class PodRecord:
+    """
+    Pod的精简记录
+
+    只保留清理所需的字段，避免保存完整的V1Pod模型
+    """
+
+    __slots__ = (
+        'name', 'namespace', 'uid', 'resource_version', 'phase',
+        'creation_timestamp', 'deletion_timestamp', 'owner_kind', 'container_statuses', 'node_name',
+    )
+
+    def __init__(self, name: str, namespace: str, uid: Optional[str], resource_version: Optional[str],
+                 phase: Optional[str], creation_timestamp: Optional[datetime],
+                 container_statuses: Tuple[ContainerStatusRecord, ...] = (),
+                 deletion_timestamp: Optional[datetime] = None, owner_kind: Optional[str] = None,
+                 node_name: Optional[str] = None):
+        self.name = name
+        self.namespace = namespace
+        self.uid = uid
+        self.resource_version = resource_version
+        self.phase = phase
+        self.creation_timestamp = creation_timestamp
+        # 不为空表示Pod正在被删除
+        self.deletion_timestamp = deletion_timestamp
+        # 所属控制器的类型，如ReplicaSet、Job，没有控制器时为None
+        self.owner_kind = owner_kind
+        self.container_statuses = container_statuses
+        # 调度到的节点，尚未调度时为None
+        self.node_name = node_name
+
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> 'PodRecord':
+        """从原始JSON中的Pod对象创建记录"""
+        metadata = item.get('metadata') or {}
+        spec = item.get('spec') or {}
+        status = item.get('status') or {}
+        # 优先使用controller为true的ownerReference
+        owners = metadata.get('ownerReferences') or ()
+        owner = next((ref for ref in owners if ref.get('controller')), owners[0] if owners else None)
+        return cls(
+            metadata.get('name'),
+            metadata.get('namespace'),
+            metadata.get('uid'),
+            metadata.get('resourceVersion'),
+            status.get('phase'),
+            parse_timestamp(metadata.get('creationTimestamp')),
+            tuple(ContainerStatusRecord.from_dict(cs) for cs in status.get('containerStatuses') or ()),
+            parse_timestamp(metadata.get('deletionTimestamp')),
+            owner.get('kind') if owner else None,
+            spec.get('nodeName'),
+        )
+
+    @classmethod
+    def from_model(cls, pod: Any) -> 'PodRecord':
+        """从kubernetes客户端的V1Pod创建记录"""
+        status = pod.status
+        owners = pod.metadata.owner_references or ()
+        owner = next((ref for ref in owners if ref.controller), owners[0] if owners else None)
+        return cls(
+            pod.metadata.name,
+            pod.metadata.namespace,
+            pod.metadata.uid,
+            pod.metadata.resource_version,
+            status.phase if status else None,
+            pod.metadata.creation_timestamp,
+            tuple(ContainerStatusRecord.from_model(cs) for cs in (status.container_statuses if status else None) or ()),
+            pod.metadata.deletion_timestamp,
+            owner.kind if owner else None,
+            pod.spec.node_name if pod.spec else None,
+        )
+
+    @property
+    def reason(self) -> Optional[str]:
+        """第一个带有原因的容器的终止或等待原因（如OOMKilled），都没有时为Pod状态"""
+        for status in self.container_statuses:
+            if status.reason:
+                return status.reason
+        return self.phase
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        返回兼容旧接口的字典视图
+
+        Returns:
+            Dict[str, Any]: 包含name、namespace、status、reason、creation_timestamp、node_name等字段
+        """
+        return {
+            'name': self.name,
+            'namespace': self.namespace,
+            'status': self.phase,
+            'reason': self.reason,
+            'creation_timestamp': self.creation_timestamp,
+            'uid': self.uid,
+            'resource_version': self.resource_version,
+            'node_name': self.node_name,
+        }
+
+class PodListPage(NamedTuple):
+    """一页Pod列表"""
+    records: List[PodRecord]
+    # 分页的continue token，为空表示已是最后一页
+    continue_token: Optional[str]
+    # 列表的resourceVersion，可用于从该版本开始watch
+    resource_version: Optional[str]
+
+def decode_pod_list(data: bytes) -> PodListPage:
+    """
+    解析原始的PodList响应
+
+    Args:
+        data: API服务器返回的JSON字节串
+
+    Returns:
+        PodListPage: Pod记录列表、continue token和resourceVersion
+    """
+    pod_list = json_loads(data)
+    metadata = pod_list.get('metadata') or {}
+    records = [PodRecord.from_dict(item) for item in pod_list.get('items') or ()]
+    return PodListPage(records, metadata.get('continue') or None, metadata.get('resourceVersion'))
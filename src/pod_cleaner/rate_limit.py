@@ -0,0 +1,125 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    令牌桶限流器
+
+    以固定速率补充令牌，允许最多burst个请求的突发，可在多个线程间共享
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数，小于等于0表示不限流
+            burst: 桶的容量，即允许的最大突发请求数
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        预留令牌并返回需要等待的时间，不阻塞
+
+        令牌不足时会预支未来的令牌，调用方需等待返回的秒数后再发出请求，
+        便于在asyncio中使用
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            float: 需要等待的时间（秒）
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: int = 1) -> None:
+        """
+        获取令牌，令牌不足时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+class AdaptiveConcurrencyLimiter:
+    """
+    自适应并发限制器（AIMD）
+
+    请求耗时低于目标值时加性增加并发上限（每完成约一个上限数量的请求加1），
+    耗时超过目标值或请求失败（如429）时将上限减半。
+    同一时间段内的多个慢请求只减半一次：只有在上次减半之后发出的请求才会再次触发减半。
+    可在多个线程间共享。
+    """
+
+    def __init__(self, max_limit: int, latency_target: float, min_limit: int = 1, decrease_factor: float = 0.5):
+        """
+        初始化限制器
+
+        Args:
+            max_limit: 并发上限的最大值
+            latency_target: 目标请求耗时（秒）
+            min_limit: 并发上限的最小值
+            decrease_factor: 减小上限时的乘数
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self._limit = float(max(self.min_limit, self.max_limit // 2))
+        self._in_flight = 0
+        self._last_decrease = float('-inf')
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """当前的并发上限"""
+        return int(self._limit)
+
+    def acquire(self) -> float:
+        """
+        等待可用的并发名额
+
+        Returns:
+            float: 请求开始时间，需要传给release
+        """
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+        return time.monotonic()
+
+    def release(self, start: float, error: bool = False) -> None:
+        """
+        释放并发名额，并根据请求耗时调整上限
+
+        Args:
+            start: acquire返回的请求开始时间
+            error: 请求是否因过载失败
+        """
+        now = time.monotonic()
+        with self._condition:
+            self._in_flight -= 1
+            if error or now - start > self.latency_target:
+                if start >= self._last_decrease:
+                    self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                    self._last_decrease = now
+            else:
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            self._condition.notify_all()
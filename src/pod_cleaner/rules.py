@@ -0,0 +1,343 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from .config import POD_ERROR_STATES
+from .pod_record import PodRecord
+
+# 规则中的谓词，参数为Pod记录和当前时间
+Predicate = Callable[[PodRecord, datetime], bool]
+
+# 规则支持的字段
+RULE_FIELDS = (
+    'name', 'phases', 'container_reasons', 'exit_codes', 'min_age', 'owner_kinds',
+    'namespaces', 'namespace_prefixes', 'namespace_regex', 'labels',
+)
+
+# 时长单位（秒）
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def phase_field_selectors(phases: Iterable[str]) -> List[str]:
+    """
+    根据Pod状态生成field selector
+
+    field selector不支持"或"条件，因此每个状态生成一个独立的selector
+
+    Args:
+        phases: Pod状态列表
+
+    Returns:
+        List[str]: field selector列表
+    """
+    return [f"status.phase={phase}" for phase in phases]
+
+def parse_duration(value: Union[int, float, str]) -> float:
+    """
+    解析时长，支持秒数或带单位的字符串（如 30m、2h、7d）
+
+    Returns:
+        float: 秒数
+
+    Raises:
+        ValueError: 格式错误
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    if value and value[-1] in DURATION_UNITS:
+        return float(value[:-1]) * DURATION_UNITS[value[-1]]
+    return float(value)
+
+def _as_list(rule_name: str, field: str, value: Any) -> List:
+    if isinstance(value, (str, int)):
+        return [value]
+    if not isinstance(value, list) or not value:
+        raise ValueError(f"规则 {rule_name} 的 {field} 必须是非空列表")
+    return value
+
+class PodQuery(NamedTuple):
+    """推送到API服务器的一次Pod列表查询"""
+    field_selector: Optional[str] = None
+    label_selector: Optional[str] = None
+
+    def kwargs(self) -> Dict[str, str]:
+        """
+        返回传递给list接口的selector参数
+        """
+        kwargs = {}
+        if self.field_selector:
+            kwargs['field_selector'] = self.field_selector
+        if self.label_selector:
+            kwargs['label_selector'] = self.label_selector
+        return kwargs
+
+    def __str__(self) -> str:
+        return ';'.join(selector for selector in self if selector) or '*'
+
+class Rule:
+    """
+    编译后的清理规则
+
+    规则中的所有条件同时满足时匹配。条件在加载时编译为谓词列表，
+    按开销从小到大排列；状态、单个命名空间和标签会推送到API服务器的selector中。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        phases: Optional[List[str]] = None,
+        container_reasons: Optional[List[str]] = None,
+        exit_codes: Optional[List[int]] = None,
+        min_age: Optional[Union[int, float, str]] = None,
+        owner_kinds: Optional[List[str]] = None,
+        namespaces: Optional[List[str]] = None,
+        namespace_prefixes: Optional[List[str]] = None,
+        namespace_regex: Optional[str] = None,
+        labels: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Args:
+            name: 规则名称
+            phases: Pod状态，满足其一即可
+            container_reasons: 容器的终止或等待原因（如OOMKilled），任一容器满足即可
+            exit_codes: 容器的退出码，任一容器满足即可
+            min_age: Pod的最小存在时长，秒数或带单位的字符串（如 30m、2h、7d）
+            owner_kinds: Pod所属控制器的类型（如Job、ReplicaSet）
+            namespaces: 命名空间
+            namespace_prefixes: 命名空间前缀
+            namespace_regex: 命名空间正则表达式（re.search）
+            labels: Pod标签，只推送到label selector中
+        """
+        self.name = name
+        # 只依赖命名空间的条件，分片扫描时用于跳过不可能匹配的命名空间
+        namespace_predicates: List[Callable[[str], bool]] = []
+        if namespaces:
+            namespace_set = frozenset(namespaces)
+            namespace_predicates.append(lambda namespace: namespace in namespace_set)
+        if namespace_prefixes:
+            prefixes = tuple(namespace_prefixes)
+            namespace_predicates.append(lambda namespace: namespace.startswith(prefixes))
+        if namespace_regex:
+            search = re.compile(namespace_regex).search
+            namespace_predicates.append(lambda namespace: search(namespace) is not None)
+        self.namespace_predicates = tuple(namespace_predicates)
+
+        predicates: List[Predicate] = [
+            lambda pod, now, predicate=predicate: predicate(pod.namespace) for predicate in namespace_predicates
+        ]
+        if phases:
+            phase_set = frozenset(phases)
+            predicates.append(lambda pod, now: pod.phase in phase_set)
+        if owner_kinds:
+            kind_set = frozenset(owner_kinds)
+            predicates.append(lambda pod, now: pod.owner_kind in kind_set)
+        # 存在时长条件单独保存，daemon模式下用于计算Pod满足规则的时间
+        self.min_age: Optional[timedelta] = None
+        self._age_predicate: Optional[Predicate] = None
+        if min_age is not None:
+            min_age_seconds = parse_duration(min_age)
+            self.min_age = timedelta(seconds=min_age_seconds)
+            self._age_predicate = (
+                lambda pod, now: pod.creation_timestamp is not None
+                and (now - pod.creation_timestamp).total_seconds() >= min_age_seconds
+            )
+            predicates.append(self._age_predicate)
+        if container_reasons:
+            reason_set = frozenset(container_reasons)
+            predicates.append(lambda pod, now: any(cs.reason in reason_set for cs in pod.container_statuses))
+        if exit_codes:
+            code_set = frozenset(exit_codes)
+            predicates.append(lambda pod, now: any(cs.exit_code in code_set for cs in pod.container_statuses))
+        self.predicates = tuple(predicates)
+
+        # 可以由API服务器完成的过滤
+        namespace_selector = f"metadata.namespace={namespaces[0]}" if namespaces and len(namespaces) == 1 else None
+        if phases:
+            self.field_selectors = [
+                f"{selector},{namespace_selector}" if namespace_selector else selector
+                for selector in phase_field_selectors(phases)
+            ]
+        else:
+            self.field_selectors = [namespace_selector] if namespace_selector else []
+        self.label_selector = ','.join(f"{key}={value}" for key, value in sorted(labels.items())) if labels else None
+        # 只按状态和命名空间过滤时，命名空间中该状态的所有Pod都满足规则，可以使用delete_collection批量删除
+        self.collection_safe = bool(phases) and not (
+            container_reasons or exit_codes or min_age is not None or owner_kinds or labels
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Rule':
+        """
+        从YAML中的规则定义创建规则
+
+        Raises:
+            ValueError: 规则格式错误
+        """
+        if not isinstance(data, dict) or not data.get('name'):
+            raise ValueError(f"规则必须是包含name字段的映射: {data!r}")
+        name = str(data['name'])
+        unknown = sorted(set(data) - set(RULE_FIELDS))
+        if unknown:
+            raise ValueError(f"规则 {name} 包含不支持的字段: {', '.join(unknown)}")
+        if len(data) == 1:
+            raise ValueError(f"规则 {name} 没有任何条件")
+
+        kwargs: Dict[str, Any] = {}
+        for field in ('phases', 'container_reasons', 'owner_kinds', 'namespaces', 'namespace_prefixes'):
+            if data.get(field) is not None:
+                kwargs[field] = [str(value) for value in _as_list(name, field, data[field])]
+        if data.get('labels') is not None:
+            if not isinstance(data['labels'], dict) or not data['labels']:
+                raise ValueError(f"规则 {name} 的 labels 必须是非空映射")
+            kwargs['labels'] = {str(k): str(v) for k, v in data['labels'].items()}
+        try:
+            if data.get('exit_codes') is not None:
+                kwargs['exit_codes'] = [int(code) for code in _as_list(name, 'exit_codes', data['exit_codes'])]
+            if data.get('min_age') is not None:
+                kwargs['min_age'] = parse_duration(data['min_age'])
+            if data.get('namespace_regex') is not None:
+                re.compile(str(data['namespace_regex']))
+                kwargs['namespace_regex'] = str(data['namespace_regex'])
+        except (ValueError, re.error) as e:
+            raise ValueError(f"规则 {name} 格式错误: {str(e)}")
+        return cls(name, **kwargs)
+
+    def matches_namespace(self, namespace: str) -> bool:
+        """
+        判断命名空间中的Pod是否可能满足规则
+        """
+        return all(predicate(namespace) for predicate in self.namespace_predicates)
+
+    def matches(self, pod: PodRecord, now: datetime) -> bool:
+        """
+        判断Pod是否满足规则的所有本地条件，标签条件由label selector保证
+        """
+        for predicate in self.predicates:
+            if not predicate(pod, now):
+                return False
+        return True
+
+    def matures_at(self, pod: PodRecord, now: datetime) -> Optional[datetime]:
+        """
+        Pod只因存在时长不足而不满足规则时，返回Pod开始满足规则的时间
+
+        Returns:
+            Optional[datetime]: creation_timestamp + min_age；规则没有min_age、Pod已满足规则或有其他条件不满足时返回None
+        """
+        if self.min_age is None or pod.creation_timestamp is None:
+            return None
+        due = pod.creation_timestamp + self.min_age
+        if due <= now:
+            return None
+        for predicate in self.predicates:
+            if predicate is not self._age_predicate and not predicate(pod, now):
+                return None
+        return due
+
+class RuleSet:
+    """
+    一组清理规则，Pod满足任一规则即为问题Pod
+    """
+
+    def __init__(self, rules: List[Rule]):
+        if not rules:
+            raise ValueError("至少需要一条规则")
+        self.rules = rules
+
+    @classmethod
+    def default(cls) -> 'RuleSet':
+        """
+        默认规则：状态为POD_ERROR_STATES之一的Pod
+        """
+        return cls([Rule.from_dict({'name': 'error-states', 'phases': list(POD_ERROR_STATES)})])
+
+    @classmethod
+    def load(cls, path: str) -> 'RuleSet':
+        """
+        从YAML文件加载规则
+
+        文件格式：
+            rules:
+              - name: unknown-pods
+                phases: [Unknown]
+                namespace_prefixes: [kube, istio]
+
+        Raises:
+            ValueError: 文件格式错误
+        """
+        import yaml
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+        rules = data.get('rules') if isinstance(data, dict) else None
+        if not isinstance(rules, list):
+            raise ValueError(f"规则文件 {path} 中缺少rules列表")
+        return cls([Rule.from_dict(rule) for rule in rules])
+
+    @property
+    def collection_safe(self) -> bool:
+        """
+        是否所有规则都只按状态和命名空间过滤，此时可以按状态批量删除命名空间中的Pod
+        """
+        return all(rule.collection_safe for rule in self.rules)
+
+    def matches_namespace(self, namespace: str) -> bool:
+        """
+        判断命名空间中的Pod是否可能满足任一规则
+        """
+        return any(rule.matches_namespace(namespace) for rule in self.rules)
+
+    def plan(self) -> List[Tuple[PodQuery, List[Rule]]]:
+        """
+        将规则合并为尽量少的列表查询
+
+        有规则无法推送到selector时，只做一次不带selector的完整列表，
+        并在同一遍中计算所有不依赖标签的规则；依赖标签的规则总是使用自己的label selector。
+
+        Returns:
+            List[Tuple[PodQuery, List[Rule]]]: 查询和需要在其结果上计算的规则
+        """
+        full_scan = any(not rule.field_selectors and not rule.label_selector for rule in self.rules)
+        groups: Dict[PodQuery, List[Rule]] = {}
+        for rule in self.rules:
+            if full_scan and not rule.label_selector:
+                groups.setdefault(PodQuery(), []).append(rule)
+                continue
+            for field_selector in rule.field_selectors or [None]:
+                groups.setdefault(PodQuery(field_selector, rule.label_selector), []).append(rule)
+        return list(groups.items())
+
+def match_rules(rules: List[Rule], pod: PodRecord, now: Optional[datetime] = None) -> Optional[Rule]:
+    """
+    返回Pod满足的第一条规则
+
+    Args:
+        rules: 规则列表
+        pod: Pod记录
+        now: 当前时间，默认为调用时的UTC时间
+
+    Returns:
+        Optional[Rule]: 满足的规则，都不满足时返回None
+    """
+    now = now or datetime.now(timezone.utc)
+    for rule in rules:
+        if rule.matches(pod, now):
+            return rule
+    return None
+
+def next_match_time(rules: List[Rule], pod: PodRecord, now: datetime) -> Optional[datetime]:
+    """
+    不满足任何规则的Pod最早在什么时间因存在时长增加而满足某条规则
+
+    Returns:
+        Optional[datetime]: 最早的时间，存在时长增加后也不会满足任何规则时返回None
+    """
+    times = [due for due in (rule.matures_at(pod, now) for rule in rules) if due is not None]
+    return min(times) if times else None
+
+def problem_pod_dict(pod: PodRecord, rule: Rule) -> Dict[str, Any]:
+    """
+    问题Pod的字典视图，附带满足的规则名称（rule字段）
+    """
+    pod_dict = pod.to_dict()
+    pod_dict['rule'] = rule.name
+    return pod_dict
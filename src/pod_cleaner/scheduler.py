@@ -0,0 +1,320 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from .logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows上没有fcntl，不对并发写入加锁
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+# 一次运行中集群的状态
+STATUS_OK = 'ok'
+STATUS_FAILED = 'failed'
+# 已开始但在截止时间前没有完成
+STATUS_DEADLINE = 'deadline'
+# 到截止时间时还没有开始
+STATUS_NOT_STARTED = 'not_started'
+
+STATUS_LABELS = {
+    STATUS_OK: '完成',
+    STATUS_FAILED: '失败',
+    STATUS_DEADLINE: '超时中止',
+    STATUS_NOT_STARTED: '未开始',
+}
+
+# 历史耗时和Pod数量的指数移动平均系数，越大越偏向最近一次运行
+HISTORY_ALPHA = 0.3
+
+# 按预期耗时分配并发时，单个集群最多使用默认并发数的倍数
+MAX_WORKER_BOOST = 4
+
+class ClusterHistory:
+    """
+    集群运行历史的本地记录
+
+    按集群和操作（list、clean）保存耗时、扫描的Pod数量和问题Pod数量的指数移动平均，
+    用于安排下一次运行的顺序和并发。可在多个线程间共享；path为空时只在内存中记录。
+    写回时对文件加锁，并合并其他进程在此期间写入的其他集群的记录。
+    """
+
+    def __init__(self, path: Optional[str] = None, alpha: float = HISTORY_ALPHA):
+        self.path = path
+        self.alpha = alpha
+        self._entries: Dict[str, Dict[str, Dict]] = {}
+        # 本次运行更新过的(集群, 操作)
+        self._updated: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        if self.path:
+            self._entries = self._read()
+
+    def _read(self) -> Dict[str, Dict[str, Dict]]:
+        """读取历史文件，文件不存在或损坏时返回空记录"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                return entries
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取集群运行历史失败，将按默认顺序处理集群: {str(e)}")
+        return {}
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """写回时对历史文件加锁，多个进程同时写回时依次执行"""
+        with open(f"{self.path}.lock", 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get(self, cluster_name: str, operation: str) -> Optional[Dict]:
+        """
+        集群某个操作的历史，没有时使用另一个操作的历史
+
+        Returns:
+            Optional[Dict]: duration、pods、problem_pods、runs和updated_at，没有历史时返回None
+        """
+        with self._lock:
+            operations = self._entries.get(cluster_name) or {}
+            entry = operations.get(operation)
+            if entry is None and operations:
+                entry = next(iter(operations.values()))
+            return dict(entry) if entry is not None else None
+
+    def record(
+        self,
+        cluster_name: str,
+        operation: str,
+        duration: float,
+        pods: Optional[int] = None,
+        problem_pods: Optional[int] = None,
+        complete: bool = True,
+    ) -> None:
+        """
+        记录一次运行
+
+        Args:
+            cluster_name: 集群名称
+            operation: 操作名称
+            duration: 耗时（秒）
+            pods: 扫描的Pod数量
+            problem_pods: 问题Pod数量
+            complete: 是否完整运行；未完成时耗时只作为下限，不会降低历史耗时
+        """
+        with self._lock:
+            entry = self._entries.setdefault(cluster_name, {}).get(operation)
+            if entry is None:
+                entry = self._entries[cluster_name][operation] = {'duration': duration, 'runs': 0}
+            elif complete:
+                entry['duration'] += self.alpha * (duration - entry['duration'])
+            else:
+                entry['duration'] = max(entry['duration'], duration)
+            for key, value in (('pods', pods), ('problem_pods', problem_pods)):
+                if value is None or not complete:
+                    continue
+                previous = entry.get(key)
+                entry[key] = value if previous is None else previous + self.alpha * (value - previous)
+            entry['duration'] = round(entry['duration'], 3)
+            entry['runs'] += 1
+            entry['updated_at'] = time.time()
+            self._updated.add((cluster_name, operation))
+
+    def save(self) -> None:
+        """
+        有变化时写回历史文件
+
+        在文件锁内重新读取文件，只用本次更新过的记录覆盖，再写临时文件并替换，
+        并发运行的其他进程写入的记录不会丢失，读取方也不会读到写了一半的文件。
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._updated:
+                return
+            updated = {key: dict(self._entries[key[0]][key[1]]) for key in self._updated}
+            self._updated = set()
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with self._file_lock():
+                entries = self._read()
+                for (cluster_name, operation), entry in updated.items():
+                    operations = entries.get(cluster_name)
+                    if not isinstance(operations, dict):
+                        operations = entries[cluster_name] = {}
+                    operations[operation] = entry
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"写入集群运行历史失败: {str(e)}")
+
+class RunSchedule:
+    """
+    一次运行的集群调度
+
+    - 按历史耗时从长到短排列集群，没有历史的集群按已知的最长耗时估计，排在前面
+    - 集群内部的并发按预期耗时与平均耗时之比分配，总量与每个集群使用默认并发时大致相同
+    - 记录全局截止时间和每个集群的状态，到达截止时间后未完成的集群标记为超时中止或未开始
+    """
+
+    def __init__(
+        self,
+        cluster_names: Iterable[str],
+        history: ClusterHistory,
+        operation: str,
+        deadline_at: Optional[float] = None,
+    ):
+        """
+        Args:
+            cluster_names: 本次运行的集群
+            history: 集群运行历史
+            operation: 操作名称，list或clean
+            deadline_at: 截止时间（time.time()时间戳），None表示不限制
+        """
+        self.history = history
+        self.operation = operation
+        self.deadline_at = deadline_at
+        cluster_names = list(cluster_names)
+        known = {}
+        for cluster_name in cluster_names:
+            entry = history.get(cluster_name, operation)
+            if entry is not None:
+                known[cluster_name] = max(entry['duration'], 0.001)
+        default_cost = max(known.values()) if known else 1.0
+        self.costs = {name: known.get(name, default_cost) for name in cluster_names}
+        # sorted是稳定排序，耗时相同的集群保持原来的顺序
+        self.order: List[str] = sorted(cluster_names, key=lambda name: -self.costs[name])
+        mean_cost = sum(self.costs.values()) / len(self.costs) if self.costs else 1.0
+        self._scale = {name: cost / mean_cost for name, cost in self.costs.items()}
+        self.status: Dict[str, str] = {}
+        self._started: Dict[str, float] = {}
+        self._closed = False
+        self._lock = threading.Lock()
+        if known:
+            logger.debug(f"按历史耗时安排 {len(cluster_names)} 个集群，最长: {self.order[0]} ({self.costs[self.order[0]]:.1f}s)")
+
+    def remaining(self) -> Optional[float]:
+        """距离截止时间的秒数，不限制时返回None"""
+        if self.deadline_at is None:
+            return None
+        return max(0.0, self.deadline_at - time.time())
+
+    def expired(self) -> bool:
+        """是否已经到达截止时间"""
+        return self.deadline_at is not None and time.time() >= self.deadline_at
+
+    def workers(self, cluster_name: str, base: int) -> int:
+        """
+        按预期耗时分配的集群内部并发数
+
+        Args:
+            cluster_name: 集群名称
+            base: 默认并发数
+
+        Returns:
+            int: 不少于1、不超过base * MAX_WORKER_BOOST的并发数
+        """
+        scale = self._scale.get(cluster_name, 1.0)
+        return max(1, min(base * MAX_WORKER_BOOST, round(base * scale)))
+
+    def start(self, cluster_name: str) -> None:
+        """记录集群开始处理"""
+        with self._lock:
+            self._started.setdefault(cluster_name, time.time())
+
+    def finish(
+        self,
+        cluster_name: str,
+        ok: bool,
+        duration: Optional[float] = None,
+        pods: Optional[int] = None,
+        problem_pods: Optional[int] = None,
+    ) -> str:
+        """
+        记录集群处理结束并更新历史
+
+        没有成功且已经到达截止时间的集群标记为超时中止。调用close()之后结束的集群不再改变状态。
+
+        Args:
+            cluster_name: 集群名称
+            ok: 是否成功
+            duration: 耗时（秒），默认从start()开始计算
+            pods: 扫描的Pod数量
+            problem_pods: 问题Pod数量
+
+        Returns:
+            str: 集群的状态
+        """
+        with self._lock:
+            if self._closed:
+                return self.status.get(cluster_name, STATUS_DEADLINE)
+            started = self._started.get(cluster_name)
+            if duration is None:
+                duration = time.time() - started if started is not None else 0.0
+            if ok:
+                status = STATUS_OK
+            else:
+                status = STATUS_DEADLINE if self.expired() else STATUS_FAILED
+            self.status[cluster_name] = status
+        if status == STATUS_OK:
+            self.history.record(cluster_name, self.operation, duration, pods, problem_pods)
+        elif status == STATUS_DEADLINE:
+            self.history.record(cluster_name, self.operation, duration, complete=False)
+        return status
+
+    def close(self) -> Dict[str, str]:
+        """
+        结束本次运行：没有结束的集群按是否已开始标记为超时中止或未开始，并写回历史
+
+        没有截止时间或尚未到达截止时间时（调用方提前结束或子进程异常退出），未结束的集群同样这样标记，
+        但不会记入历史耗时。
+
+        Returns:
+            Dict[str, str]: 按调度顺序排列的每个集群的状态
+        """
+        now = time.time()
+        expired = self.expired()
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                for cluster_name in self.order:
+                    if cluster_name in self.status:
+                        continue
+                    started = self._started.get(cluster_name)
+                    if started is None:
+                        self.status[cluster_name] = STATUS_NOT_STARTED
+                        continue
+                    self.status[cluster_name] = STATUS_DEADLINE
+                    if expired:
+                        # 超时的集群下次更早开始
+                        self.history.record(cluster_name, self.operation, now - started, complete=False)
+            status = {name: self.status[name] for name in self.order}
+        self.history.save()
+        incomplete = [name for name, value in status.items() if value in (STATUS_DEADLINE, STATUS_NOT_STARTED)]
+        if incomplete and expired:
+            logger.warning(f"已到达截止时间，{len(incomplete)} 个集群未完成: {', '.join(incomplete)}")
+        elif incomplete:
+            logger.warning(f"运行提前结束，{len(incomplete)} 个集群未完成: {', '.join(incomplete)}")
+        return status
+
+    def incomplete(self) -> Dict[str, str]:
+        """
+        因截止时间超时中止或没有开始的集群
+
+        处理失败的集群（如无法连接）已经单独记录错误，不算作未完成。
+        """
+        with self._lock:
+            return {name: value for name, value in self.status.items()
+                    if value in (STATUS_DEADLINE, STATUS_NOT_STARTED)}
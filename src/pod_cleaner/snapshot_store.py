@@ -0,0 +1,290 @@
+import json
+import mmap
+import os
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .config import SNAPSHOT_DIR
+from .logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows上没有fcntl，不对并发写入加锁
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+# 快照中保存的列，都以字典编码为uint32
+SNAPSHOT_COLUMNS = ('cluster', 'namespace', 'node', 'reason', 'rule')
+
+# 列文件中每个值的类型，array和memoryview共用
+COLUMN_TYPECODE = 'I'
+
+META_FILE = 'meta.json'
+LOCK_FILE = '.lock'
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+def parse_since(value: str, now: Optional[float] = None) -> float:
+    """
+    解析查询的起始时间
+
+    Args:
+        value: 相对时间（如 30m、24h、7d、2w）或ISO格式的日期时间
+        now: 当前时间戳，默认为time.time()
+
+    Returns:
+        float: 起始时间戳
+    """
+    now = time.time() if now is None else now
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*', value)
+    if match:
+        return now - float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+    try:
+        moment = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"无法解析的时间: {value}，可以使用 30m、24h、7d 或 ISO 格式的日期")
+    if moment.tzinfo is None:
+        moment = moment.astimezone()
+    return moment.timestamp()
+
+def _group_counts(views: Dict[str, memoryview], by: Sequence[str], filter_columns: Sequence[str],
+                  wanted: Tuple[int, ...], start: int, end: int) -> Counter:
+    """
+    统计[start, end)行中每组的行数
+
+    切片只在函数内使用，返回后不再引用映射的内存，mmap可以关闭。
+    """
+    keys = [views[column][start:end] for column in by]
+    if filter_columns:
+        conditions = [views[column][start:end] for column in filter_columns]
+        width = len(by)
+        return Counter(row[:width] for row in zip(*keys, *conditions) if row[width:] == wanted)
+    if len(by) == 1:
+        # 单列分组时直接统计整数，不创建元组
+        return Counter({(code,): n for code, n in Counter(keys[0]).items()})
+    return Counter(zip(*keys))
+
+class SnapshotWriter:
+    """
+    单次扫描的快照缓冲
+
+    扫描过程中以写入方本地的字典编码问题Pod，只保存整数，不保存Pod记录；
+    commit()时在锁内映射为存储的全局字典编号并追加到列文件。可在多个线程间共享。
+    """
+
+    def __init__(self, store: 'SnapshotStore'):
+        self.store = store
+        self.taken_at = time.time()
+        self._lock = threading.Lock()
+        self._strings: Dict[str, Dict[str, int]] = {column: {} for column in SNAPSHOT_COLUMNS}
+        self._columns: Dict[str, array] = {column: array(COLUMN_TYPECODE) for column in SNAPSHOT_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._columns[SNAPSHOT_COLUMNS[0]])
+
+    def add(self, cluster_name: str, pods: Iterable[Dict]) -> None:
+        """
+        记录一个集群中的问题Pod（list_problem_pods返回的格式）
+        """
+        with self._lock:
+            for pod in pods:
+                values = (cluster_name, pod.get('namespace'), pod.get('node_name'), pod.get('reason'), pod.get('rule'))
+                for column, value in zip(SNAPSHOT_COLUMNS, values):
+                    strings = self._strings[column]
+                    value = value or ''
+                    code = strings.get(value)
+                    if code is None:
+                        code = strings[value] = len(strings)
+                    self._columns[column].append(code)
+
+    def commit(self) -> int:
+        """
+        将本次扫描作为一个快照追加到存储，没有问题Pod时也记录快照
+
+        Returns:
+            int: 写入的行数
+        """
+        with self._lock:
+            return self.store.append(self.taken_at, self._strings, self._columns)
+
+class SnapshotStore:
+    """
+    只追加的列式快照存储
+
+    目录结构：
+        meta.json      行数、每列的字典和快照索引 [[时间戳, 起始行, 行数], ...]，每次提交时原子替换
+        <列名>.u32     每列一个文件，按行保存字典编号（uint32，本机字节序）
+
+    写入时先把新行追加到列文件，再替换meta.json；进程在两步之间中断时，
+    列文件末尾多出的数据不在meta.json的行数内，读取时被忽略，下次写入时被截断。
+    读取时用mmap映射列文件，按快照索引切片，不复制数据。
+    """
+
+    def __init__(self, path: str = SNAPSHOT_DIR):
+        self.path = path
+        self.meta = self._load_meta()
+
+    def _column_path(self, column: str) -> str:
+        return os.path.join(self.path, f"{column}.u32")
+
+    def _load_meta(self) -> Dict:
+        try:
+            with open(os.path.join(self.path, META_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'rows': 0, 'dictionaries': {column: [] for column in SNAPSHOT_COLUMNS}, 'snapshots': []}
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """写入时对整个存储加锁，多个进程同时提交时依次执行"""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, LOCK_FILE), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def writer(self) -> SnapshotWriter:
+        """创建一次扫描的快照缓冲"""
+        return SnapshotWriter(self)
+
+    def append(self, taken_at: float, strings: Dict[str, Dict[str, int]], columns: Dict[str, array]) -> int:
+        """
+        追加一个快照
+
+        Args:
+            taken_at: 快照时间戳
+            strings: 每列写入方本地的字典（字符串到本地编号）
+            columns: 每列按本地编号编码的值
+
+        Returns:
+            int: 写入的行数
+        """
+        with self._locked():
+            # 其他进程可能已经提交了新的快照
+            meta = self._load_meta()
+            start = meta['rows']
+            count = len(columns[SNAPSHOT_COLUMNS[0]])
+            for column in SNAPSHOT_COLUMNS:
+                dictionary = meta['dictionaries'].setdefault(column, [])
+                codes = {value: code for code, value in enumerate(dictionary)}
+                mapping = [0] * len(strings[column])
+                for value, local in strings[column].items():
+                    code = codes.get(value)
+                    if code is None:
+                        code = len(dictionary)
+                        dictionary.append(value)
+                    mapping[local] = code
+                encoded = array(COLUMN_TYPECODE, [mapping[local] for local in columns[column]])
+                with open(self._column_path(column), 'ab') as f:
+                    # 截断上次中断时多写入的数据
+                    f.truncate(start * encoded.itemsize)
+                    encoded.tofile(f)
+            meta['rows'] = start + count
+            meta['snapshots'].append([round(taken_at, 3), start, count])
+            tmp_path = os.path.join(self.path, META_FILE + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, os.path.join(self.path, META_FILE))
+            self.meta = meta
+        logger.debug(f"快照已写入 {self.path}: {count} 行")
+        return count
+
+    @contextmanager
+    def _mapped_columns(self, columns: Sequence[str]) -> Iterator[Dict[str, memoryview]]:
+        """
+        以mmap映射列文件，返回只包含已提交行的memoryview
+        """
+        rows = self.meta['rows']
+        files, maps, views = [], [], {}
+        try:
+            for column in columns:
+                if rows == 0:
+                    views[column] = memoryview(array(COLUMN_TYPECODE))
+                    continue
+                f = open(self._column_path(column), 'rb')
+                files.append(f)
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                maps.append(mapped)
+                itemsize = array(COLUMN_TYPECODE).itemsize
+                views[column] = memoryview(mapped)[:rows * itemsize].cast(COLUMN_TYPECODE)
+            yield views
+        finally:
+            for view in views.values():
+                view.release()
+            for mapped in maps:
+                mapped.close()
+            for f in files:
+                f.close()
+
+    def snapshots(self, since: Optional[float] = None) -> List[Tuple[float, int, int]]:
+        """
+        时间戳不早于since的快照
+
+        Returns:
+            List[Tuple[float, int, int]]: (时间戳, 起始行, 行数) 列表
+        """
+        return [tuple(entry) for entry in self.meta['snapshots'] if since is None or entry[0] >= since]
+
+    def query(
+        self,
+        by: Sequence[str],
+        since: Optional[float] = None,
+        filters: Optional[Dict[str, str]] = None,
+        top: int = 0,
+    ) -> List[Dict]:
+        """
+        按列分组统计问题Pod出现的次数
+
+        Args:
+            by: 分组的列，取值见SNAPSHOT_COLUMNS
+            since: 只统计该时间戳之后的快照
+            filters: 列名到值的等值过滤条件
+            top: 只返回次数最多的前N组，0表示全部返回
+
+        Returns:
+            List[Dict]: 每组的列值、count（出现次数）、snapshots（出现在多少个快照中）和last_seen，按count降序
+        """
+        filters = filters or {}
+        for column in list(by) + list(filters):
+            if column not in SNAPSHOT_COLUMNS:
+                raise ValueError(f"不支持的列: {column}，可选值: {', '.join(SNAPSHOT_COLUMNS)}")
+        dictionaries = self.meta['dictionaries']
+        filter_codes = []
+        for column, value in filters.items():
+            try:
+                filter_codes.append(dictionaries[column].index(value))
+            except ValueError:
+                # 从未出现过的值
+                return []
+
+        counts: Counter = Counter()
+        snapshot_counts: Counter = Counter()
+        last_seen: Dict[Tuple, float] = {}
+        with self._mapped_columns(list(by) + list(filters)) as views:
+            for taken_at, start, count in self.snapshots(since):
+                current = _group_counts(views, by, list(filters), tuple(filter_codes), start, start + count)
+                counts.update(current)
+                snapshot_counts.update(current.keys())
+                for key in current:
+                    last_seen[key] = taken_at
+
+        ranked = counts.most_common(top or None)
+        return [
+            {
+                **{column: dictionaries[column][code] for column, code in zip(by, key)},
+                'count': count,
+                'snapshots': snapshot_counts[key],
+                'last_seen': datetime.fromtimestamp(last_seen[key], timezone.utc).isoformat(timespec='seconds'),
+            }
+            for key, count in ranked
+        ]
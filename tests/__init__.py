@@ -1 +1,13 @@
-# Test package init 
\ No newline at end of file
+"""
+测试包：日志写入临时目录，运行测试不在仓库中产生日志文件
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+if not os.environ.get('LOG_FILE'):
+    _log_dir = tempfile.mkdtemp(prefix='pod_cleaner_test_logs_')
+    # 子进程（如多进程模式的工作进程）继承环境变量，同样写入临时目录
+    os.environ['LOG_FILE'] = os.path.join(_log_dir, 'pod_cleaner.log')
+    atexit.register(shutil.rmtree, _log_dir, ignore_errors=True)
@@ -0,0 +1,639 @@
+"""
+用于单元测试和性能测试的本地Kubernetes API服务器替身
+
+只实现Pod Cleaner用到的接口：
+- GET /version、/api/v1/namespaces、/api/v1/nodes
+- GET /api/v1/pods 和 /api/v1/namespaces/{ns}/pods：limit/continue分页、field selector、
+  简单的label selector，以及watch（chunked、bookmark、resourceVersion过期时返回410）
+- DELETE 单个Pod（支持uid前置条件）和 delete_collection
+- POST /fake/pods 注入新的Pod并产生ADDED事件
+- 与API服务器一样，请求头带有Accept-Encoding: gzip时压缩超过128KB的响应
+
+Pod只以数组形式保存状态，响应时按模板生成JSON，单个进程可以模拟数十万个Pod。
+可以注入固定延迟和按比例返回的429。
+
+单独运行时启动一个集群，并在标准输出打印 {"port": 端口}：
+    python -m tests.fake_apiserver --pods 100000 --latency 0.01
+"""
+import argparse
+import collections
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# 状态编码，DELETED表示Pod已删除
+PHASES = ('Running', 'Failed', 'Unknown', 'Error')
+DELETED = 255
+
+# 每种状态的容器状态
+CONTAINER_STATES = {
+    'Running': '{"running":{"startedAt":"2024-01-01T00:00:10Z"}}',
+    'Failed': '{"terminated":{"reason":"OOMKilled","exitCode":137,"startedAt":"2024-01-01T00:00:10Z","finishedAt":"2024-01-01T01:00:00Z"}}',
+    'Unknown': '{"terminated":{"reason":"ContainerStatusUnknown","exitCode":137,"startedAt":"2024-01-01T00:00:10Z","finishedAt":"2024-01-01T01:00:00Z"}}',
+    'Error': '{"terminated":{"reason":"Error","exitCode":1,"startedAt":"2024-01-01T00:00:10Z","finishedAt":"2024-01-01T01:00:00Z"}}',
+}
+
+# 与真实Pod大小相近的JSON模板（约2KB）
+POD_TEMPLATE = (
+    '{"metadata":{"name":"%(name)s","namespace":"%(namespace)s","uid":"%(uid)s","resourceVersion":"%(rv)d",'
+    '"creationTimestamp":"2024-01-01T00:00:00Z","generateName":"app-%(app)d-5d4f8b7c9-",'
+    '"labels":{"app":"app-%(app)d","pod-template-hash":"5d4f8b7c9"},'
+    '"annotations":{"kubectl.kubernetes.io/restartedAt":"2024-01-01T00:00:00Z","prometheus.io/scrape":"true"},'
+    '"ownerReferences":[{"apiVersion":"apps/v1","kind":"ReplicaSet","name":"app-%(app)d-5d4f8b7c9",'
+    '"uid":"00000000-0000-4000-8000-%(app)012d","controller":true,"blockOwnerDeletion":true}]},'
+    '"spec":{"nodeName":"%(node)s","restartPolicy":"Always","serviceAccountName":"default",'
+    '"terminationGracePeriodSeconds":30,"dnsPolicy":"ClusterFirst","schedulerName":"default-scheduler",'
+    '"containers":[{"name":"app","image":"registry.example.com/team/app:1.%(app)d.0","imagePullPolicy":"IfNotPresent",'
+    '"ports":[{"containerPort":8080,"protocol":"TCP"}],'
+    '"env":[{"name":"POD_NAME","valueFrom":{"fieldRef":{"fieldPath":"metadata.name"}}},{"name":"LOG_LEVEL","value":"info"}],'
+    '"resources":{"limits":{"cpu":"500m","memory":"512Mi"},"requests":{"cpu":"100m","memory":"128Mi"}},'
+    '"volumeMounts":[{"name":"kube-api-access","mountPath":"/var/run/secrets/kubernetes.io/serviceaccount","readOnly":true}]}],'
+    '"tolerations":[{"key":"node.kubernetes.io/not-ready","operator":"Exists","effect":"NoExecute","tolerationSeconds":300}]},'
+    '"status":{"phase":"%(phase)s","hostIP":"192.168.%(host_ip)s","podIP":"10.%(pod_ip)s","startTime":"2024-01-01T00:00:05Z",'
+    '"qosClass":"Burstable","conditions":[{"type":"Initialized","status":"True","lastTransitionTime":"2024-01-01T00:00:05Z"},'
+    '{"type":"Ready","status":"%(ready)s","lastTransitionTime":"2024-01-01T00:00:10Z"},'
+    '{"type":"PodScheduled","status":"True","lastTransitionTime":"2024-01-01T00:00:05Z"}],'
+    '"containerStatuses":[{"name":"app","ready":%(ready_bool)s,"restartCount":%(restarts)d,'
+    '"image":"registry.example.com/team/app:1.%(app)d.0","imageID":"registry.example.com/team/app@sha256:%(app)064d",'
+    '"containerID":"containerd://%(index)064x","started":%(ready_bool)s,"state":%(state)s}]}}'
+)
+
+# 应用标签的取值数量
+APP_COUNT = 50
+
+# watch事件日志保留的最大事件数，更早的resourceVersion视为过期
+MAX_EVENTS = 100000
+
+class FakeCluster:
+    """
+    一个模拟集群的Pod状态
+
+    Pod的名称、命名空间、uid和节点都由序号推导，只保存resourceVersion和状态，
+    新增的Pod追加到末尾，删除后状态置为DELETED，因此序号可以直接作为continue token。
+    """
+
+    def __init__(
+        self,
+        pods: int = 10000,
+        namespaces: int = 20,
+        nodes: int = 10,
+        not_ready_nodes: int = 1,
+        missing_nodes: int = 0,
+        bad_ratio: float = 0.05,
+        seed: int = 1,
+    ):
+        """
+        Args:
+            pods: Pod数量
+            namespaces: 命名空间数量，Pod按序号轮流分配
+            nodes: 节点数量，Pod按序号轮流分配
+            not_ready_nodes: 其中NotReady的节点数量
+            missing_nodes: 其中已被删除的节点数量（从最后一个节点开始），节点列表中不返回这些节点，Pod仍保留
+            bad_ratio: 问题Pod（Failed/Unknown/Error各占三分之一）的比例
+            seed: 随机种子，相同参数生成相同的集群
+        """
+        self.namespaces = [f"ns-{i:03d}" for i in range(max(1, namespaces))]
+        self.nodes = [f"node-{i:03d}" for i in range(max(1, nodes))]
+        self.not_ready_nodes = frozenset(self.nodes[:not_ready_nodes])
+        self.missing_nodes = frozenset(self.nodes[len(self.nodes) - missing_nodes:] if missing_nodes > 0 else ())
+        # 带有gracePeriodSeconds=0的删除请求数
+        self.force_deletes = 0
+        self.uid_prefix = f"{seed:08x}"
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.rv = 1000
+        self.phases = bytearray()
+        self.rvs = array('q')
+        # 每个命名空间中Pod的序号，按序号递增
+        self.by_namespace: Dict[str, array] = {namespace: array('q') for namespace in self.namespaces}
+        self.events: collections.deque = collections.deque()
+        self.compacted_rv = self.rv
+        rnd = random.Random(seed)
+        for _ in range(pods):
+            r = rnd.random()
+            self._append(PHASES[1 + int(r / bad_ratio * 3) % 3] if r < bad_ratio else 'Running')
+
+    def _append(self, phase: str) -> int:
+        index = len(self.phases)
+        self.rv += 1
+        self.phases.append(PHASES.index(phase))
+        self.rvs.append(self.rv)
+        self.by_namespace[self.namespace_of(index)].append(index)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.phases)
+
+    def namespace_of(self, index: int) -> str:
+        return self.namespaces[index % len(self.namespaces)]
+
+    def node_of(self, index: int) -> str:
+        return self.nodes[index % len(self.nodes)]
+
+    def uid_of(self, index: int) -> str:
+        return f"{self.uid_prefix}-0000-4000-8000-{index:012x}"
+
+    @staticmethod
+    def name_of(index: int) -> str:
+        return f"pod-{index:07d}"
+
+    @staticmethod
+    def index_of(name: str) -> Optional[int]:
+        if not name.startswith('pod-'):
+            return None
+        try:
+            return int(name[4:])
+        except ValueError:
+            return None
+
+    def render(self, index: int, phase_code: Optional[int] = None, rv: Optional[int] = None) -> str:
+        """
+        生成Pod的JSON
+        """
+        phase = PHASES[self.phases[index] if phase_code is None else phase_code]
+        ready = phase == 'Running'
+        return POD_TEMPLATE % {
+            'name': self.name_of(index),
+            'namespace': self.namespace_of(index),
+            'uid': self.uid_of(index),
+            'rv': self.rvs[index] if rv is None else rv,
+            'app': index % APP_COUNT,
+            'node': self.node_of(index),
+            'phase': phase,
+            'host_ip': f"{index % len(self.nodes) // 256}.{index % len(self.nodes) % 256}",
+            'pod_ip': f"{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}",
+            'ready': 'True' if ready else 'False',
+            'ready_bool': 'true' if ready else 'false',
+            'restarts': 0 if ready else 1,
+            'index': index,
+            'state': CONTAINER_STATES[phase],
+        }
+
+    def matches(
+        self,
+        index: int,
+        field_selector: Optional[str],
+        label_selector: Optional[str],
+        phase_code: Optional[int] = None,
+    ) -> bool:
+        """
+        判断Pod是否满足selector，只支持 = 和 != 条件
+
+        Args:
+            phase_code: 按指定的状态计算，用于watch事件；默认使用当前状态
+        """
+        if phase_code is None:
+            phase_code = self.phases[index]
+            if phase_code == DELETED:
+                return False
+        for selector, fields in ((field_selector, self._field_value), (label_selector, self._label_value)):
+            if not selector:
+                continue
+            for requirement in selector.split(','):
+                negate = '!=' in requirement
+                key, _, value = requirement.partition('!=' if negate else '=')
+                value = value.lstrip('=')
+                if (fields(index, key.strip(), phase_code) == value.strip()) == negate:
+                    return False
+        return True
+
+    def _field_value(self, index: int, key: str, phase_code: int) -> Optional[str]:
+        if key == 'status.phase':
+            return PHASES[phase_code]
+        if key == 'metadata.namespace':
+            return self.namespace_of(index)
+        if key == 'metadata.name':
+            return self.name_of(index)
+        if key == 'spec.nodeName':
+            return self.node_of(index)
+        return None
+
+    def _label_value(self, index: int, key: str, phase_code: int) -> Optional[str]:
+        if key == 'app':
+            return f"app-{index % APP_COUNT}"
+        if key == 'pod-template-hash':
+            return '5d4f8b7c9'
+        return None
+
+    def list_page(
+        self,
+        namespace: Optional[str],
+        field_selector: Optional[str],
+        label_selector: Optional[str],
+        limit: int,
+        start: int,
+    ) -> Tuple[List[int], Optional[int], int]:
+        """
+        从start开始列出一页满足条件的Pod
+
+        Returns:
+            Tuple: Pod序号列表、下一页的起始位置（没有下一页时为None）和当前resourceVersion
+        """
+        with self.lock:
+            indexes = self.by_namespace.get(namespace, array('q')) if namespace else range(len(self.phases))
+            items = []
+            position = start
+            total = len(indexes)
+            while position < total:
+                index = indexes[position]
+                position += 1
+                if self.matches(index, field_selector, label_selector):
+                    items.append(index)
+                    if limit and len(items) >= limit:
+                        break
+            # 与API服务器一致：只有后面还有数据时才返回continue
+            next_start = position if limit and len(items) >= limit and position < total else None
+            return items, next_start, self.rv
+
+    def _record(self, event_type: str, index: int, phase_code: int) -> None:
+        self.events.append((self.rv, event_type, index, phase_code))
+        if len(self.events) > MAX_EVENTS:
+            self.compacted_rv = self.events.popleft()[0]
+        self.changed.notify_all()
+
+    def add_pods(self, count: int, phase: str, namespace: Optional[str] = None) -> List[int]:
+        """
+        追加新的Pod并产生ADDED事件
+
+        Args:
+            count: Pod数量
+            phase: Pod状态
+            namespace: 只在该命名空间中追加，默认按序号轮流分配
+
+        Returns:
+            List[int]: 新Pod的序号
+        """
+        added = []
+        with self.lock:
+            while len(added) < count:
+                if namespace and self.namespace_of(len(self.phases)) != namespace:
+                    # 占位的Pod直接标记为已删除，保证序号与命名空间的对应关系
+                    self._append('Running')
+                    self.phases[-1] = DELETED
+                    continue
+                index = self._append(phase)
+                self._record('ADDED', index, self.phases[index])
+                added.append(index)
+        return added
+
+    def delete(self, namespace: str, name: str, uid: Optional[str], grace_period: Optional[int] = None) -> Tuple[int, Optional[str]]:
+        """
+        删除单个Pod
+
+        Returns:
+            Tuple[int, Optional[str]]: HTTP状态码和被删除Pod的JSON
+        """
+        index = self.index_of(name)
+        with self.lock:
+            if index is None or index >= len(self.phases) or self.phases[index] == DELETED \
+                    or self.namespace_of(index) != namespace:
+                return 404, None
+            if uid and uid != self.uid_of(index):
+                return 409, None
+            if grace_period == 0:
+                self.force_deletes += 1
+            return 200, self._delete(index)
+
+    def _delete(self, index: int) -> str:
+        phase_code = self.phases[index]
+        self.rv += 1
+        self.rvs[index] = self.rv
+        self.phases[index] = DELETED
+        self._record('DELETED', index, phase_code)
+        return self.render(index, phase_code)
+
+    def delete_collection(self, namespace: str, field_selector: Optional[str], label_selector: Optional[str]) -> int:
+        """
+        删除命名空间中满足selector的所有Pod
+
+        Returns:
+            int: 删除的Pod数量
+        """
+        with self.lock:
+            indexes = [i for i in self.by_namespace.get(namespace, ()) if self.matches(i, field_selector, label_selector)]
+            for index in indexes:
+                self._delete(index)
+            return len(indexes)
+
+    def count(self, field_selector: Optional[str] = None) -> int:
+        """
+        统计满足field selector的现存Pod数量
+        """
+        with self.lock:
+            return sum(1 for index in range(len(self.phases)) if self.matches(index, field_selector, None))
+
+    def events_after(self, resource_version: int, timeout: float) -> Optional[List[Tuple[int, str, int, int]]]:
+        """
+        返回resourceVersion之后的事件，没有事件时最多等待timeout秒
+
+        Returns:
+            Optional[List]: 事件列表，resourceVersion已过期时返回None
+        """
+        with self.lock:
+            if resource_version < self.compacted_rv:
+                return None
+            if not self.events or self.events[-1][0] <= resource_version:
+                self.changed.wait(timeout)
+            return [event for event in self.events if event[0] > resource_version]
+
+# 超过该大小的响应使用gzip压缩，与API服务器的APIResponseCompression一致
+GZIP_MIN_BYTES = 128 * 1024
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写入，不关闭Nagle时每个请求会额外等待delayed ACK
+    disable_nagle_algorithm = True
+    cluster: FakeCluster = None
+    latency: float = 0.0
+    throttle_ratio: float = 0.0
+    retry_after: str = '0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, code: int, body) -> None:
+        data = body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        if len(data) > GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            data = gzip.compress(data, compresslevel=1)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _status(self, code: int, reason: str, message: str = '') -> None:
+        self._send_json(code, {'kind': 'Status', 'apiVersion': 'v1', 'status': 'Failure', 'code': code,
+                               'reason': reason, 'message': message or reason})
+
+    def _inject(self) -> bool:
+        """
+        注入延迟和429，返回True表示请求已被拒绝
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        if self.throttle_ratio and random.random() < self.throttle_ratio:
+            data = b'{"kind":"Status","apiVersion":"v1","status":"Failure","code":429,"reason":"TooManyRequests"}'
+            self.send_response(429)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Retry-After', self.retry_after)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return True
+        return False
+
+    def _parse(self) -> Tuple[List[str], Dict[str, str]]:
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        return url.path.strip('/').split('/'), query
+
+    def _read_body(self) -> Dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+    def do_GET(self):
+        parts, query = self._parse()
+        if parts == ['version']:
+            return self._send_json(200, {
+                'major': '1', 'minor': '29', 'gitVersion': 'v1.29.0-fake', 'gitCommit': 'fake',
+                'gitTreeState': 'clean', 'buildDate': '2024-01-01T00:00:00Z', 'goVersion': 'go1.21',
+                'compiler': 'gc', 'platform': 'linux/amd64',
+            })
+        if self._inject():
+            return
+        cluster = self.cluster
+        if parts == ['api', 'v1', 'namespaces']:
+            items = [{'metadata': {'name': namespace}, 'status': {'phase': 'Active'}} for namespace in cluster.namespaces]
+            return self._send_json(200, {'kind': 'NamespaceList', 'apiVersion': 'v1', 'metadata': {}, 'items': items})
+        if parts == ['api', 'v1', 'nodes']:
+            items = [{
+                'metadata': {'name': node},
+                'status': {'conditions': [{
+                    'type': 'Ready',
+                    'status': 'Unknown' if node in cluster.not_ready_nodes else 'True',
+                    'lastTransitionTime': '2024-01-01T00:00:00Z',
+                }]},
+            } for node in cluster.nodes if node not in cluster.missing_nodes]
+            return self._send_json(200, {'kind': 'NodeList', 'apiVersion': 'v1', 'metadata': {}, 'items': items})
+
+        if parts == ['api', 'v1', 'pods']:
+            namespace = None
+        elif len(parts) == 5 and parts[:3] == ['api', 'v1', 'namespaces'] and parts[4] == 'pods':
+            namespace = parts[3]
+        else:
+            return self._status(404, 'NotFound', self.path)
+
+        if query.get('watch', '').lower() in ('true', '1'):
+            return self._watch(namespace, query)
+        try:
+            start = int(query.get('continue') or 0)
+            limit = int(query.get('limit') or 0)
+        except ValueError:
+            return self._status(400, 'BadRequest', 'invalid continue or limit')
+        items, next_start, rv = cluster.list_page(
+            namespace, query.get('fieldSelector'), query.get('labelSelector'), limit, start,
+        )
+        metadata = {'resourceVersion': str(rv)}
+        if next_start is not None:
+            metadata['continue'] = str(next_start)
+        body = '{"kind":"PodList","apiVersion":"v1","metadata":%s,"items":[%s]}' % (
+            json.dumps(metadata), ','.join(cluster.render(index) for index in items),
+        )
+        self._send_json(200, body)
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def _watch(self, namespace: Optional[str], query: Dict[str, str]) -> None:
+        cluster = self.cluster
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        resource_version = int(query.get('resourceVersion') or cluster.rv)
+        deadline = time.monotonic() + float(query.get('timeoutSeconds') or 60)
+        bookmarks = query.get('allowWatchBookmarks', '').lower() in ('true', '1')
+        field_selector, label_selector = query.get('fieldSelector'), query.get('labelSelector')
+        try:
+            while time.monotonic() < deadline:
+                events = cluster.events_after(resource_version, min(1.0, max(0.0, deadline - time.monotonic())))
+                if events is None:
+                    self._write_chunk(b'{"type":"ERROR","object":{"kind":"Status","apiVersion":"v1","status":"Failure",'
+                                      b'"code":410,"reason":"Expired","message":"too old resource version"}}\n')
+                    break
+                for rv, event_type, index, phase_code in events:
+                    resource_version = rv
+                    if namespace and cluster.namespace_of(index) != namespace:
+                        continue
+                    # 按事件发生时的状态计算selector
+                    if cluster.matches(index, field_selector, label_selector, phase_code):
+                        pod = cluster.render(index, phase_code, rv)
+                        self._write_chunk(('{"type":"%s","object":%s}\n' % (event_type, pod)).encode('utf-8'))
+                if bookmarks:
+                    resource_version = max(resource_version, cluster.rv)
+                    self._write_chunk(('{"type":"BOOKMARK","object":{"kind":"Pod","apiVersion":"v1",'
+                                       '"metadata":{"resourceVersion":"%d"}}}\n' % resource_version).encode('utf-8'))
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def do_POST(self):
+        parts, query = self._parse()
+        if parts != ['fake', 'pods']:
+            return self._status(404, 'NotFound', self.path)
+        added = self.cluster.add_pods(
+            int(query.get('count') or 1), query.get('phase') or 'Unknown', query.get('namespace'),
+        )
+        self._send_json(200, {'added': len(added)})
+
+    def do_DELETE(self):
+        parts, query = self._parse()
+        body = self._read_body()
+        if self._inject():
+            return
+        if len(parts) == 5 and parts[:3] == ['api', 'v1', 'namespaces'] and parts[4] == 'pods':
+            deleted = self.cluster.delete_collection(parts[3], query.get('fieldSelector'), query.get('labelSelector'))
+            return self._send_json(200, {'kind': 'Status', 'apiVersion': 'v1', 'status': 'Success',
+                                         'details': {'deleted': deleted}})
+        if len(parts) == 6 and parts[:3] == ['api', 'v1', 'namespaces'] and parts[4] == 'pods':
+            uid = (body.get('preconditions') or {}).get('uid')
+            code, pod = self.cluster.delete(parts[3], parts[5], uid, body.get('gracePeriodSeconds'))
+            if code == 404:
+                return self._status(404, 'NotFound', f'pods "{parts[5]}" not found')
+            if code == 409:
+                return self._status(409, 'Conflict', 'Precondition failed: UID in precondition does not match')
+            return self._send_json(200, pod)
+        self._status(404, 'NotFound', self.path)
+
+def serve(
+    cluster: FakeCluster,
+    port: int = 0,
+    host: str = '127.0.0.1',
+    latency: float = 0.0,
+    throttle_ratio: float = 0.0,
+    retry_after: str = '0',
+) -> ThreadingHTTPServer:
+    """
+    在后台线程中启动模拟的API服务器
+
+    Args:
+        cluster: 模拟集群
+        port: 监听端口，0表示随机端口
+        host: 监听地址
+        latency: 每个请求注入的延迟（秒）
+        throttle_ratio: 按该比例返回429
+        retry_after: 429响应的Retry-After
+
+    Returns:
+        ThreadingHTTPServer: 服务器，server_address[1]为实际端口
+    """
+    handler = type('Handler', (FakeApiHandler,), {
+        'cluster': cluster, 'latency': latency, 'throttle_ratio': throttle_ratio, 'retry_after': retry_after,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"fake-apiserver-{server.server_address[1]}", daemon=True).start()
+    return server
+
+def write_kubeconfig(path: str, name: str, port: int, host: str = '127.0.0.1') -> None:
+    """
+    生成连接到模拟API服务器的kubeconfig
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(
+            "apiVersion: v1\n"
+            "kind: Config\n"
+            f"clusters:\n- name: {name}\n  cluster:\n    server: http://{host}:{port}\n"
+            f"contexts:\n- name: {name}\n  context:\n    cluster: {name}\n    user: {name}\n"
+            f"current-context: {name}\n"
+            f"users:\n- name: {name}\n  user:\n    token: fake-token\n"
+        )
+
+class FakeApiServerMixin:
+    """
+    单元测试夹具：在临时目录中生成kubeconfig，并启动连接到其中的API服务器替身
+
+    setUp中创建临时目录（self.kubeconfig_dir），serve_cluster()启动的服务器和临时目录在测试结束时自动清理
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.kubeconfig_dir = self.tmpdir.name
+
+    def serve_cluster(self, cluster: FakeCluster, *names: str, **kwargs) -> ThreadingHTTPServer:
+        """
+        启动模拟集群的API服务器，并为每个名称生成一个指向它的kubeconfig
+
+        Args:
+            cluster: 模拟集群
+            names: kubeconfig的集群名称
+            **kwargs: 传递给serve()的参数，如latency
+
+        Returns:
+            ThreadingHTTPServer: 服务器，server_address[1]为实际端口
+        """
+        server = serve(cluster, **kwargs)
+        # 清理按相反的顺序执行：先停止服务再关闭监听的socket
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        for name in names:
+            self.write_kubeconfig(name, server.server_address[1])
+        return server
+
+    def write_kubeconfig(self, name: str, port: int, host: str = '127.0.0.1') -> str:
+        """
+        在kubeconfig目录中生成{name}.yaml
+
+        Returns:
+            str: kubeconfig路径
+        """
+        path = os.path.join(self.kubeconfig_dir, f'{name}.yaml')
+        write_kubeconfig(path, name, port, host)
+        return path
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="用于性能测试的Kubernetes API服务器替身")
+    parser.add_argument('--port', type=int, default=0, help="监听端口，0表示随机端口")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    parser.add_argument('--pods', type=int, default=10000, help="Pod数量")
+    parser.add_argument('--namespaces', type=int, default=20, help="命名空间数量")
+    parser.add_argument('--nodes', type=int, default=10, help="节点数量")
+    parser.add_argument('--not-ready-nodes', type=int, default=1, help="NotReady的节点数量")
+    parser.add_argument('--missing-nodes', type=int, default=0, help="已被删除、不在节点列表中的节点数量")
+    parser.add_argument('--bad-ratio', type=float, default=0.05, help="问题Pod的比例")
+    parser.add_argument('--seed', type=int, default=1, help="随机种子")
+    parser.add_argument('--latency', type=float, default=0.0, help="每个请求注入的延迟（秒）")
+    parser.add_argument('--throttle-ratio', type=float, default=0.0, help="按该比例返回429")
+    parser.add_argument('--retry-after', default='0', help="429响应的Retry-After")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    cluster = FakeCluster(args.pods, args.namespaces, args.nodes, args.not_ready_nodes, args.missing_nodes,
+                          args.bad_ratio, args.seed)
+    server = serve(cluster, args.port, args.host, args.latency, args.throttle_ratio, args.retry_after)
+    # 父进程读取这一行获得端口
+    print(json.dumps({'port': server.server_address[1], 'pods': len(cluster)}), flush=True)
+    try:
+        # 父进程关闭标准输入时退出
+        sys.stdin.read()
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import asyncio
+import unittest
+from src.pod_cleaner.async_cluster_manager import AsyncClusterManager
+from tests.fake_apiserver import FakeApiServerMixin, FakeCluster
+
+class TestAsyncClusterManager(FakeApiServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cluster = FakeCluster(pods=600, namespaces=3, bad_ratio=0.2)
+        self.serve_cluster(self.cluster, 'good')
+        # 没有current-context的kubeconfig，创建客户端时失败
+        with open(self.write_kubeconfig('broken', 0), 'w', encoding='utf-8') as f:
+            f.write("apiVersion: v1\nkind: Config\n")
+
+    def create_manager(self, **kwargs):
+        manager = AsyncClusterManager(kubeconfig_dir=self.kubeconfig_dir, cache_ttl=0, delete_qps=0, **kwargs)
+        self.addCleanup(manager.close)
+        return manager
+
+    def test_iter_completed_raises(self):
+        manager = self.create_manager()
+
+        async def ok():
+            await asyncio.sleep(0.01)
+            return 'ok'
+
+        async def fail():
+            raise RuntimeError('boom')
+
+        async def slow():
+            await asyncio.sleep(30)
+
+        results = manager._iter_completed([ok(), fail(), slow()])
+        with self.assertRaises(RuntimeError):
+            list(results)
+
+    def test_broken_cluster_counts_as_failed(self):
+        manager = self.create_manager(batch_size=7, delete_workers=2)
+        pods = manager.list_problem_pods()
+        self.assertEqual(list(pods), ['good'])
+        expected = self.cluster.count('status.phase=Error') + self.cluster.count('status.phase=Unknown')
+        self.assertEqual(len(pods['good']), expected)
+
+        candidates = {'good': pods['good'], 'broken': pods['good'][:3]}
+        stats = manager.delete_problem_pods(candidates=candidates)
+        self.assertEqual((stats['good']['success'], stats['good']['failed']), (expected, 0))
+        self.assertEqual((stats['broken']['success'], stats['broken']['failed']), (0, 3))
+        self.assertEqual(self.cluster.count('status.phase=Error') + self.cluster.count('status.phase=Unknown'), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+from src.pod_cleaner.checkpoint import CheckpointJournal
+from src.pod_cleaner.cluster_manager import ClusterManager
+from tests.fake_apiserver import FakeApiServerMixin, FakeCluster
+
+class TestCheckpointJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'checkpoint.jsonl')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_replay(self):
+        journal = CheckpointJournal(self.path, namespace='default')
+        journal._record({'t': 'page', 'c': 'c1', 'q': '#0', 'next': 'token-1', 'pods': [
+            ['default', 'pod-a', 'uid-a', 'Failed', 'OOMKilled', 'oom', '2024-01-01T00:00:00Z', 'node-0'],
+            ['default', 'pod-b', 'uid-b', 'Failed', 'Error', 'failed', None, 'node-1'],
+        ]})
+        journal.record_deleted('c1', [{'namespace': 'default', 'name': 'pod-a', 'uid': 'uid-a'}])
+        journal.record_done('c2')
+        journal.close()
+        # 模拟写入一半时被中断
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"t": "done", "c"')
+
+        journal = CheckpointJournal(self.path, namespace='default', resume=True)
+        self.assertTrue(journal.resumed)
+        self.assertEqual(journal.query_progress('c1', '#0'), (False, 'token-1'))
+        self.assertEqual(journal.query_progress('c1', '#1'), (False, None))
+        self.assertFalse(journal.is_listed('c1'))
+        self.assertTrue(journal.is_done('c2'))
+        self.assertEqual([(pod['name'], pod['node_name']) for pod in journal.candidates('c1')], [('pod-b', 'node-1')])
+        self.assertEqual(journal.known_keys('c1'), {'uid-a', 'uid-b'})
+        self.assertFalse(journal.finished(['c1', 'c2']))
+        journal.close()
+
+        # 参数不同或不使用resume时重新开始
+        for kwargs in ({'namespace': 'other', 'resume': True}, {'namespace': 'default'}):
+            journal = CheckpointJournal(self.path, **kwargs)
+            self.assertFalse(journal.resumed)
+            self.assertFalse(journal.is_done('c2'))
+            journal.close(remove=True)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_run_parameters(self):
+        rules_file = os.path.join(self.tmpdir.name, 'rules.yaml')
+        with open(rules_file, 'w', encoding='utf-8') as f:
+            f.write("rules:\n  - name: failed\n    phases: [Failed]\n")
+        kwargs = {'namespace': None, 'rules_file': rules_file, 'clusters': ['c2', 'c1']}
+        journal = CheckpointJournal(self.path, **kwargs)
+        journal.record_done('c1')
+        journal.close()
+
+        journal = CheckpointJournal(self.path, resume=True, **dict(kwargs, clusters=['c1', 'c2']))
+        self.assertTrue(journal.resumed)
+        journal.close()
+
+        # 集群选择不同
+        journal = CheckpointJournal(self.path, resume=True, **dict(kwargs, clusters=['c1']))
+        self.assertFalse(journal.resumed)
+        journal.record_done('c1')
+        journal.close()
+
+        # 规则文件的路径相同但内容已修改
+        with open(rules_file, 'a', encoding='utf-8') as f:
+            f.write("    min_age: 1h\n")
+        journal = CheckpointJournal(self.path, resume=True, **dict(kwargs, clusters=['c1']))
+        self.assertFalse(journal.resumed)
+        self.assertFalse(journal.is_done('c1'))
+        journal.close(remove=True)
+
+class TestCheckpointedCleanup(FakeApiServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cluster = FakeCluster(pods=1000, namespaces=4, bad_ratio=0.2)
+        self.serve_cluster(self.cluster, 'bench')
+        self.path = os.path.join(self.kubeconfig_dir, 'checkpoint.jsonl')
+
+    def run_manager(self, resume: bool, func):
+        journal = CheckpointJournal(self.path, resume=resume)
+        manager = ClusterManager(kubeconfig_dir=self.kubeconfig_dir, page_size=50, cache_ttl=0, delete_qps=0,
+                                 checkpoint=journal)
+        try:
+            return func(manager), manager.metrics.summary()['clusters'].get('bench', {}).get('counters', {})
+        finally:
+            manager.close()
+            journal.close()
+
+    def test_resume(self):
+        expected = self.cluster.count('status.phase=Error') + self.cluster.count('status.phase=Unknown')
+
+        # 第一次运行在列出两页后中断
+        def interrupted(manager):
+            pods = manager.iter_cluster_problem_pods('bench')
+            for _ in range(2 * 50):
+                next(pods)
+        _, counters = self.run_manager(False, interrupted)
+        first_pages = counters['list_pages']
+
+        # 继续运行时从continue token继续列出，不重复列出已经记录的页
+        pods, counters = self.run_manager(True, lambda manager: manager.list_problem_pods())
+        self.assertEqual(len(pods['bench']), expected)
+        self.assertEqual(len({pod['uid'] for pod in pods['bench']}), expected)
+        manager = ClusterManager(kubeconfig_dir=self.kubeconfig_dir, page_size=50, cache_ttl=0)
+        try:
+            manager.list_problem_pods()
+            full_pages = manager.metrics.summary()['clusters']['bench']['counters']['list_pages']
+        finally:
+            manager.close()
+        self.assertEqual(counters['list_pages'], full_pages - first_pages)
+
+        # 删除一部分后中断，继续运行时只删除剩余的Pod，不再列出
+        self.run_manager(True, lambda manager: manager.create_deleter('bench').delete(
+            pods['bench'][:30], allow_collection=False,
+            on_finished=lambda finished: manager.checkpoint.record_deleted('bench', finished),
+        ))
+        stats, counters = self.run_manager(True, lambda manager: manager.delete_problem_pods(
+            candidates=manager.list_problem_pods()))
+        self.assertNotIn('list_pages', counters)
+        self.assertEqual(stats['bench']['total'], expected - 30)
+        self.assertEqual(stats['bench']['success'], expected - 30)
+        self.assertEqual(self.cluster.count('status.phase=Error') + self.cluster.count('status.phase=Unknown'), 0)
+
+        # 已完成的集群被跳过
+        pods, _ = self.run_manager(True, lambda manager: manager.list_problem_pods())
+        self.assertEqual(pods, {})
@@ -0,0 +1,142 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+import typer
+from rich.console import Console
+from typer.testing import CliRunner
+from src.pod_cleaner import cli
+from src.pod_cleaner.cli import create_pod_table
+from tests.fake_apiserver import FakeApiServerMixin, FakeCluster
+
+class TestCli(unittest.TestCase):
+    def test_pod_table_without_creation_timestamp(self):
+        created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        pods = [
+            {'namespace': 'default', 'name': 'pod-a', 'status': 'Failed', 'creation_timestamp': created},
+            {'namespace': 'default', 'name': 'pod-b', 'status': 'Failed', 'creation_timestamp': None},
+        ]
+        console = Console(record=True, width=200)
+        console.print(create_pod_table(pods))
+        lines = {line.split('│')[2].strip(): line.split('│')[4].strip()
+                 for line in console.export_text().splitlines() if 'pod-' in line}
+        self.assertEqual(lines, {'pod-a': '2024-01-01 00:00:00', 'pod-b': '-'})
+
+class TestCreateManager(FakeApiServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_kubeconfig('c1', 1)
+        # 环境变量中设置了截止时间和按历史调度
+        patchers = [
+            mock.patch.object(cli, 'RUN_DEADLINE', 60.0),
+            mock.patch.object(cli, 'SCHEDULE_BY_HISTORY', True),
+            mock.patch.object(cli, 'CLUSTER_HISTORY_FILE', os.path.join(self.tmpdir.name, 'history.json')),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_manager(self, engine, **kwargs):
+        manager = cli.create_manager(engine, kubeconfig_dir=self.kubeconfig_dir, cache_ttl=0, **kwargs)
+        self.addCleanup(manager.close)
+        return manager
+
+    def test_async_ignores_environment_defaults(self):
+        with self.assertLogs('src.pod_cleaner.cli', 'WARNING') as logs:
+            self.create_manager(cli.ENGINE_ASYNC, deadline=None, schedule=None)
+        self.assertIn('RUN_DEADLINE, SCHEDULE_BY_HISTORY', logs.output[0])
+        # 命令行中指定时仍然报错
+        for kwargs in ({'deadline': 10.0, 'schedule': None}, {'deadline': None, 'schedule': True}):
+            with self.assertRaises(typer.BadParameter):
+                cli.create_manager(cli.ENGINE_ASYNC, kubeconfig_dir=self.kubeconfig_dir, **kwargs)
+
+    def test_sync_uses_environment_defaults(self):
+        manager = self.create_manager(cli.ENGINE_SYNC, deadline=None, schedule=None)
+        self.assertIsNotNone(manager.deadline_at)
+        self.assertEqual(manager.history.path, cli.CLUSTER_HISTORY_FILE)
+        # daemon等不传入截止时间的命令不受环境变量影响
+        manager = self.create_manager(cli.ENGINE_SYNC)
+        self.assertIsNone(manager.deadline_at)
+        self.assertIsNone(manager.history.path)
+
+class TestListPods(FakeApiServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.serve_cluster(FakeCluster(pods=100, bad_ratio=0.2), 'good')
+        # 端口1上没有服务，连接失败
+        self.write_kubeconfig('bad', 1)
+        self.snapshot_dir = os.path.join(self.tmpdir.name, 'snapshots')
+        create_manager = cli.create_manager
+        # 不读写仓库中的集群元数据缓存
+        patchers = [
+            mock.patch.dict(os.environ),
+            mock.patch.object(cli, 'create_manager', lambda *args, **kwargs: create_manager(
+                *args, cache_ttl=0, **kwargs)),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_failed_cluster_is_not_partial(self):
+        result = CliRunner().invoke(cli.app, [
+            'list-pods', '-k', self.kubeconfig_dir, '-o', 'json', '--snapshot', '--snapshot-dir', self.snapshot_dir,
+            '--no-schedule', '--deadline', '0', '--connect-timeout', '1',
+        ])
+        # 没有设置截止时间时，无法连接的集群不会让运行变成部分完成
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertNotIn('未完成', result.output)
+        self.assertIn('快照已写入', result.output)
+
+class TestCleanPods(FakeApiServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cluster = FakeCluster(pods=100, bad_ratio=0.2)
+        self.serve_cluster(self.cluster, 'c1')
+        create_manager = cli.create_manager
+        patchers = [
+            mock.patch.dict(os.environ),
+            mock.patch.object(cli, 'CLUSTER_HISTORY_FILE', os.path.join(self.tmpdir.name, 'history.json')),
+            mock.patch.object(cli, 'create_manager', lambda *args, **kwargs: create_manager(
+                *args, cache_ttl=0, **kwargs)),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_confirmation_is_not_counted_in_deadline(self):
+        def slow_confirm(*args, **kwargs):
+            time.sleep(1.5)
+            return True
+
+        with mock.patch.object(cli.typer, 'confirm', slow_confirm):
+            result = CliRunner().invoke(cli.app, [
+                'clean-pods', '-k', self.kubeconfig_dir, '--deadline', '1', '--delete-qps', '0',
+                '--checkpoint-file', os.path.join(self.tmpdir.name, 'checkpoint.jsonl'),
+            ])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertNotIn('超时中止', result.output)
+        self.assertEqual(self.cluster.count('status.phase=Error') + self.cluster.count('status.phase=Unknown'), 0)
+
+class TestReport(unittest.TestCase):
+    def test_times_are_utc(self):
+        from src.pod_cleaner.snapshot_store import SnapshotStore
+        with tempfile.TemporaryDirectory() as tmpdir:
+            writer = SnapshotStore(tmpdir).writer()
+            writer.taken_at = 2000
+            writer.add('c1', [{'namespace': 'a', 'reason': 'Error', 'node_name': 'node-0', 'rule': 'failed'}])
+            writer.commit()
+            # 在非UTC的时区中运行时，标题和最近出现的时间也相同
+            with mock.patch.dict(os.environ, {'TZ': 'Asia/Shanghai'}):
+                time.tzset()
+                try:
+                    result = CliRunner().invoke(cli.app, ['report', '--snapshot-dir', tmpdir], env={'COLUMNS': '200'})
+                finally:
+                    time.tzset()
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('1970-01-01 00:33:20 ~ 1970-01-01 00:33:20 UTC', result.output)
+        self.assertIn('1970-01-01T00:33:20+00:00', result.output)
+
+if __name__ == '__main__':
+    unittest.main()
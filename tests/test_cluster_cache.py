@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from src.pod_cleaner.cluster_cache import ClusterInfoCache
+
+INFO = {"version": "v1.29.0", "api_server": "https://127.0.0.1:6443"}
+
+class TestClusterInfoCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmp.name, "cache", "clusters.json")
+        self.kubeconfig = os.path.join(self.tmp.name, "cluster1.yaml")
+        with open(self.kubeconfig, "w") as f:
+            f.write("apiVersion: v1\n")
+            
+    def tearDown(self):
+        self.tmp.cleanup()
+        
+    def test_roundtrip(self):
+        """测试写入后重新加载仍然命中，修改mtime但内容不变也命中"""
+        cache = ClusterInfoCache(self.cache_file, ttl=60)
+        self.assertIsNone(cache.get(self.kubeconfig))
+        cache.put(self.kubeconfig, INFO)
+        cache.save()
+        
+        os.utime(self.kubeconfig, (0, 0))
+        self.assertEqual(ClusterInfoCache(self.cache_file, ttl=60).get(self.kubeconfig), INFO)
+        
+    def test_invalidation(self):
+        """测试kubeconfig内容变化或缓存过期后失效"""
+        cache = ClusterInfoCache(self.cache_file, ttl=60)
+        cache.put(self.kubeconfig, INFO)
+        with open(self.kubeconfig, "a") as f:
+            f.write("kind: Config\n")
+        self.assertIsNone(cache.get(self.kubeconfig))
+        
+        cache.put(self.kubeconfig, INFO)
+        cache.ttl = 0.000001
+        self.assertIsNone(cache.get(self.kubeconfig))
+        
+    def test_disabled(self):
+        """测试ttl为0时禁用缓存"""
+        cache = ClusterInfoCache(self.cache_file, ttl=0)
+        cache.put(self.kubeconfig, INFO)
+        cache.save()
+        self.assertIsNone(cache.get(self.kubeconfig))
+        self.assertFalse(os.path.exists(self.cache_file))
+
+if __name__ == '__main__':
+    unittest.main()
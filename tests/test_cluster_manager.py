@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+from src.pod_cleaner.kubeconfig import discover_kubeconfigs, is_kubeconfig_file
+
+class TestDiscoverKubeconfigs(unittest.TestCase):
+    def test_is_kubeconfig_file(self):
+        """测试kubeconfig文件名过滤规则"""
+        self.assertTrue(is_kubeconfig_file("cluster1.yaml"))
+        self.assertTrue(is_kubeconfig_file("k8s-prod.yml"))
+        self.assertTrue(is_kubeconfig_file("K8S_dev"))
+        self.assertFalse(is_kubeconfig_file(".hidden.yaml"))
+        self.assertFalse(is_kubeconfig_file("README.md"))
+        
+    def test_discover_kubeconfigs(self):
+        """测试扫描目录时返回集群名称和路径，并跳过子目录"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for filename in ("b.yaml", "k8s-a", "notes.txt"):
+                open(os.path.join(tmpdir, filename), "w").close()
+            os.mkdir(os.path.join(tmpdir, "k8s-dir"))
+            
+            self.assertEqual(
+                discover_kubeconfigs(tmpdir),
+                [("b", os.path.join(tmpdir, "b.yaml")), ("k8s-a", os.path.join(tmpdir, "k8s-a"))],
+            )
+            
+    def test_discover_selected_clusters(self):
+        """测试只返回指定的集群"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for filename in ("a.yaml", "b.yaml"):
+                open(os.path.join(tmpdir, filename), "w").close()
+            
+            self.assertEqual(discover_kubeconfigs(tmpdir, ["b", "missing"]), [("b", os.path.join(tmpdir, "b.yaml"))])
+        
+if __name__ == "__main__":
+    unittest.main()
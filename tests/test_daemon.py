@@ -0,0 +1,95 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from src.pod_cleaner.daemon import PodCleanupDaemon, PodIndex
+from src.pod_cleaner.pod_record import PodRecord, parse_timestamp
+from src.pod_cleaner.rules import PodQuery, Rule
+
+def make_record(uid, deletion_timestamp=None):
+    return PodRecord(
+        f"pod-{uid}", "default", uid, "1", "Unknown", None,
+        deletion_timestamp=parse_timestamp(deletion_timestamp),
+    )
+
+class FakeManager:
+    """只提供集群列表的假集群管理器"""
+    clusters = {"c1": None}
+    batch_size = 50
+
+class TestPodIndex(unittest.TestCase):
+    def test_index(self):
+        """测试索引的替换、更新和删除"""
+        index = PodIndex()
+        index.replace("c1", "status.phase=Unknown", [make_record("a"), make_record("b")])
+        index.upsert("c1", "status.phase=Error", make_record("c"))
+        index.remove("c1", "status.phase=Unknown", "a")
+        index.remove("c1", "status.phase=Unknown", "missing")
+        self.assertEqual(index.counts(), {"c1": 2})
+        
+        self.assertEqual(index.replace("c1", "status.phase=Unknown", [make_record("b")]), set())
+        self.assertEqual(index.replace("c1", "status.phase=Unknown", []), {"b"})
+        self.assertEqual(index.counts(), {"c1": 1})
+
+class TestPodCleanupDaemon(unittest.TestCase):
+    def test_enqueue(self):
+        """测试同一个Pod只进入一次删除队列，正在删除的Pod被忽略"""
+        daemon = PodCleanupDaemon(FakeManager())
+        daemon._enqueue("c1", make_record("a"))
+        daemon._enqueue("c1", make_record("a"))
+        daemon._enqueue("c1", make_record("b", "2024-01-01T00:00:00Z"))
+        self.assertEqual(daemon._queues["c1"].qsize(), 1)
+
+    def test_min_age_recheck(self):
+        """测试存在时长不足的Pod在满足min_age时进入删除队列"""
+        daemon = PodCleanupDaemon(FakeManager())
+        rules = [Rule.from_dict({"name": "old-failed", "phases": ["Failed"], "min_age": "10m"})]
+        query = PodQuery("status.phase=Failed")
+        now = datetime.now(timezone.utc)
+
+        def make_pod(uid, phase="Failed"):
+            return PodRecord(f"pod-{uid}", "default", uid, "1", phase, now - timedelta(minutes=5))
+
+        daemon._apply_event("c1", query, rules, "ADDED", make_pod("young"), now)
+        daemon._apply_event("c1", query, rules, "ADDED", make_pod("gone"), now)
+        daemon._apply_event("c1", query, rules, "DELETED", make_pod("gone"), now)
+        daemon._apply_event("c1", query, rules, "ADDED", make_pod("running", "Running"), now)
+        self.assertEqual(daemon._queues["c1"].qsize(), 0)
+        self.assertEqual(daemon.index.counts().get("c1", 0), 0)
+
+        self.assertAlmostEqual(daemon._check_deferred(now), 300, delta=1)
+        self.assertEqual(daemon._queues["c1"].qsize(), 0)
+        self.assertIsNone(daemon._check_deferred(now + timedelta(minutes=6)))
+        self.assertEqual(daemon._queues["c1"].get_nowait().uid, "young")
+        self.assertEqual(daemon.index.counts(), {"c1": 1})
+
+    def test_dry_run(self):
+        """测试试运行不计为已删除，Pod移出索引后不再保留在去重集合中"""
+        daemon = PodCleanupDaemon(FakeManager(), dry_run=True)
+        rules = [Rule.from_dict({"name": "unknown", "phases": ["Unknown"]})]
+        query = PodQuery("status.phase=Unknown")
+        for uid in ("a", "b"):
+            daemon._apply_event("c1", query, rules, "ADDED", make_record(uid))
+
+        stop = threading.Event()
+        cleaner = threading.Thread(target=daemon._run_cleaner, args=("c1", daemon._queues["c1"], stop))
+        cleaner.start()
+        deadline = time.monotonic() + 5
+        while daemon.stats["c1"]["total"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stop.set()
+        cleaner.join()
+        self.assertEqual((daemon.stats["c1"]["dry_run"], daemon.stats["c1"]["success"]), (2, 0))
+        with self.assertLogs("src.pod_cleaner.daemon", "INFO") as logs:
+            daemon._log_summary()
+        self.assertIn("将删除 2 个", logs.output[0])
+        self.assertNotIn("已删除", logs.output[0])
+
+        # 已输出的Pod不重复进入队列，删除后从去重集合中移除
+        daemon._apply_event("c1", query, rules, "MODIFIED", make_record("a"))
+        self.assertEqual(daemon._queues["c1"].qsize(), 0)
+        daemon._apply_event("c1", query, rules, "DELETED", make_record("a"))
+        self.assertEqual(daemon._enqueued["c1"], {"b"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from unittest import mock
+from kubernetes.client.rest import ApiException
+from src.pod_cleaner.deleter import PodDeleter, percentile
+
+class FakeCoreApi:
+    """按预设顺序返回错误的假API客户端"""
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+        
+    def delete_namespaced_pod(self, name, namespace, body, _request_timeout=None):
+        self.calls += 1
+        if self.errors:
+            error = self.errors.pop(0)
+            if error is not None:
+                raise error
+
+class TestPodDeleter(unittest.TestCase):
+    def test_percentile(self):
+        """测试最近秩法百分位数"""
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([], 50), 0.0)
+        
+    @mock.patch("src.pod_cleaner.deleter.time.sleep")
+    def test_retry_on_429(self, sleep):
+        """测试429时退避重试后成功"""
+        api = FakeCoreApi([ApiException(status=429), None])
+        deleter = PodDeleter("c1", api, max_workers=1, qps=0)
+        stats = deleter.delete([{'name': 'p', 'namespace': 'ns', 'status': 'Failed'}])
+        self.assertEqual((stats['success'], stats['failed']), (1, 0))
+        self.assertEqual(api.calls, 2)
+        sleep.assert_called_once()
+        
+    def test_not_found_counts_as_success(self):
+        """测试404视为已删除"""
+        api = FakeCoreApi([ApiException(status=404)])
+        stats = PodDeleter("c1", api, max_workers=1, qps=0).delete([{'name': 'p', 'namespace': 'ns', 'status': 'Failed'}])
+        self.assertEqual((stats['total'], stats['success'], stats['failed']), (1, 1, 0))
+        
+    def test_forbidden_counts_as_failed(self):
+        """测试不可重试的错误计为失败"""
+        api = FakeCoreApi([ApiException(status=403)])
+        stats = PodDeleter("c1", api, max_workers=1, qps=0).delete([{'name': 'p', 'namespace': 'ns', 'status': 'Failed'}])
+        self.assertEqual((stats['success'], stats['failed']), (0, 1))
+        self.assertEqual(api.calls, 1)
+        
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from src.pod_cleaner.cluster_manager import ClusterManager
+from tests.fake_apiserver import FakeApiServerMixin, FakeCluster
+
+class TestFakeApiServer(FakeApiServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cluster = FakeCluster(pods=600, namespaces=4, bad_ratio=0.2)
+        self.serve_cluster(self.cluster, 'bench')
+
+    def test_list_and_delete(self):
+        expected = self.cluster.count('status.phase=Error') + self.cluster.count('status.phase=Unknown')
+        for fast_decode in (False, True):
+            manager = ClusterManager(kubeconfig_dir=self.kubeconfig_dir, page_size=7, fast_decode=fast_decode, cache_ttl=0)
+            try:
+                pods = manager.list_problem_pods()
+                self.assertEqual(len(pods['bench']), expected)
+                self.assertEqual(len({pod['uid'] for pod in pods['bench']}), expected)
+            finally:
+                manager.close()
+
+        manager = ClusterManager(kubeconfig_dir=self.kubeconfig_dir, page_size=50, cache_ttl=0, delete_qps=0)
+        try:
+            stats = manager.delete_problem_pods(candidates=manager.list_problem_pods())
+        finally:
+            manager.close()
+        self.assertEqual(stats['bench']['success'], expected)
+        self.assertEqual(self.cluster.count('status.phase=Unknown'), 0)
+        self.assertEqual(self.cluster.count('status.phase=Error'), 0)
+
+    def test_uid_precondition(self):
+        self.assertEqual(self.cluster.delete('ns-000', 'pod-0000000', 'other-uid')[0], 409)
+        self.assertEqual(self.cluster.delete('ns-001', 'pod-0000000', None)[0], 404)
+        self.assertEqual(self.cluster.delete('ns-000', 'pod-0000000', self.cluster.uid_of(0))[0], 200)
+        self.assertEqual(self.cluster.delete('ns-000', 'pod-0000000', None)[0], 404)
+
+    def test_gzip_and_pool_size(self):
+        expected = self.cluster.count('status.phase=Error') + self.cluster.count('status.phase=Unknown')
+        for fast_decode in (False, True):
+            # 不分页时响应超过128KB，API服务器替身返回gzip压缩的响应
+            manager = ClusterManager(kubeconfig_dir=self.kubeconfig_dir, page_size=0, fast_decode=fast_decode,
+                                     cache_ttl=0, max_workers=3)
+            try:
+                pods = manager.list_problem_pods()
+                api_client = manager.clusters['bench'].api_client
+                self.assertEqual(api_client.default_headers['Accept-Encoding'], 'gzip')
+                self.assertEqual(api_client.configuration.connection_pool_maxsize, 3)
+            finally:
+                manager.close()
+            self.assertEqual(len(pods['bench']), expected)
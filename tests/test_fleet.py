@@ -0,0 +1,67 @@
+import time
+import unittest
+from src.pod_cleaner.cluster_manager import ClusterManager
+from src.pod_cleaner.fleet import FleetManager, compact_pods, expand_pods
+from src.pod_cleaner.metrics import MetricsRegistry
+from tests.fake_apiserver import FakeApiServerMixin, FakeCluster
+
+class TestMetricsMerge(unittest.TestCase):
+    def test_merge(self):
+        worker = MetricsRegistry()
+        worker.inc('c1', 'list_pages', 2)
+        worker.observe('c1', 'list_page', 0.05)
+        parent = MetricsRegistry()
+        parent.inc('c1', 'list_pages')
+        parent.merge(worker.snapshot())
+        parent.merge(worker.snapshot())
+        summary = parent.summary()['clusters']['c1']
+        self.assertEqual(summary['counters']['list_pages'], 5)
+        self.assertEqual(summary['timings']['list_page']['count'], 2)
+
+class TestFleetManager(FakeApiServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cluster = FakeCluster(pods=600, namespaces=3, bad_ratio=0.2)
+        self.serve_cluster(self.cluster, 'f1', 'f2', 'f3')
+
+    def test_compact_roundtrip(self):
+        pods = [{'namespace': 'ns', 'name': 'pod-a', 'uid': 'uid-a', 'resource_version': '1', 'status': 'Failed',
+                 'reason': 'Error', 'rule': 'failed', 'creation_timestamp': None, 'node_name': 'node-0'}]
+        self.assertEqual(expand_pods(compact_pods(pods)), pods)
+
+    def test_list_and_delete(self):
+        manager = ClusterManager(kubeconfig_dir=self.kubeconfig_dir, page_size=100, cache_ttl=0)
+        try:
+            expected = manager.list_problem_pods()
+        finally:
+            manager.close()
+
+        fleet = FleetManager(2, kubeconfig_dir=self.kubeconfig_dir, page_size=100, cache_ttl=0, delete_qps=0)
+        try:
+            pods = fleet.list_problem_pods()
+            self.assertEqual(set(pods), {'f1', 'f2', 'f3'})
+            for name in pods:
+                self.assertEqual(sorted(pod['uid'] for pod in pods[name]),
+                                 sorted(pod['uid'] for pod in expected[name]))
+            counters = fleet.metrics.summary()['clusters']['f1']['counters']
+            self.assertEqual(counters['pods_matched'], len(expected['f1']))
+
+            # 三个kubeconfig指向同一个API服务器，只删除其中一个集群的候选Pod
+            stats = fleet.delete_problem_pods(candidates={'f1': pods['f1']})
+            self.assertEqual(stats['f1']['success'], len(pods['f1']))
+            self.assertEqual(self.cluster.count('status.phase=Error') + self.cluster.count('status.phase=Unknown'), 0)
+        finally:
+            fleet.close()
+
+    def test_extend_deadline(self):
+        fleet = FleetManager(2, kubeconfig_dir=self.kubeconfig_dir, cluster_names=['f1'], cache_ttl=0, delete_qps=0,
+                             deadline=1)
+        try:
+            pods = fleet.list_problem_pods()
+            # 进程池已经启动，推迟后的截止时间仍然传给子进程
+            time.sleep(max(0.0, fleet.deadline_at - time.time()) + 0.2)
+            fleet.extend_deadline(30)
+            stats = fleet.delete_problem_pods(candidates=pods)
+            self.assertEqual((stats['f1']['success'], stats['f1']['failed']), (len(pods['f1']), 0))
+        finally:
+            fleet.close()
@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入CLI时不应加载的重量级依赖，只在真正连接集群时才导入
+HEAVY_MODULES = ("kubernetes", "kubernetes_asyncio", "orjson")
+
+class TestImportTime(unittest.TestCase):
+    def test_cli_import_is_lazy(self):
+        """使用python -X importtime检查导入CLI时不会加载kubernetes客户端"""
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import src.pod_cleaner.cli"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        modules = {
+            line.rsplit("|", 1)[-1].strip()
+            for line in result.stderr.splitlines()
+            if line.startswith("import time:")
+        }
+        self.assertIn("src.pod_cleaner.cli", modules)
+        self.assertEqual([m for m in modules if m.split(".")[0] in HEAVY_MODULES], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from src.pod_cleaner.cluster_manager import ClusterManager
+from src.pod_cleaner.kubeconfig_registry import KubeconfigRegistry
+from tests.fake_apiserver import FakeApiServerMixin, FakeCluster, write_kubeconfig
+
+class TestKubeconfigRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, host='127.0.0.1', port=6443):
+        write_kubeconfig(os.path.join(self.dir, f'{name}.yaml'), name, port, host)
+
+    def test_scan(self):
+        self.write('a')
+        self.write('b')
+        with open(os.path.join(self.dir, 'notes.txt'), 'w') as f:
+            f.write('not a kubeconfig')
+        registry = KubeconfigRegistry(self.dir, use_inotify=False)
+        self.assertEqual(registry.mode, 'poll')
+        self.assertEqual(sorted(registry.kubeconfigs()), ['a', 'b'])
+        self.assertFalse(registry.scan())
+
+        # 只更新mtime，内容不变
+        path = os.path.join(self.dir, 'a.yaml')
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+        self.assertFalse(registry.scan())
+
+        self.write('b', host='localhost')
+        self.write('c')
+        os.remove(path)
+        changes = registry.scan()
+        self.assertEqual(list(changes.added), ['c'])
+        self.assertEqual(list(changes.changed), ['b'])
+        self.assertEqual(changes.removed, ['a'])
+        self.assertFalse(registry.scan())
+
+    def test_inotify_wait(self):
+        registry = KubeconfigRegistry(self.dir, poll_interval=30)
+        if registry.mode != 'inotify':
+            self.skipTest('inotify不可用')
+        try:
+            timer = threading.Timer(0.1, self.write, args=('a',))
+            timer.start()
+            start = time.monotonic()
+            self.assertTrue(registry.wait(threading.Event()))
+            self.assertLess(time.monotonic() - start, 5)
+            self.assertEqual(list(registry.scan().added), ['a'])
+        finally:
+            registry.close()
+
+class TestApplyKubeconfigChanges(FakeApiServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.port = self.serve_cluster(FakeCluster(pods=10)).server_address[1]
+        self.dir = self.kubeconfig_dir
+
+    def write(self, name, host='127.0.0.1'):
+        self.write_kubeconfig(name, self.port, host)
+
+    def test_only_affected_clusters_are_rebuilt(self):
+        for name in ('a', 'b', 'd'):
+            self.write(name)
+        manager = ClusterManager(kubeconfig_dir=self.dir, cache_ttl=0)
+        registry = KubeconfigRegistry(self.dir, use_inotify=False)
+        try:
+            self.assertEqual(sorted(manager.get_cluster_info()), ['a', 'b', 'd'])
+            api_b = manager.clusters['b']
+            api_d = manager.clusters['d']
+
+            self.write('b', host='localhost')
+            self.write('c')
+            os.remove(os.path.join(self.dir, 'a.yaml'))
+            manager.apply_kubeconfig_changes(registry.scan())
+
+            self.assertEqual(list(manager.clusters), ['b', 'c', 'd'])
+            self.assertNotIn('a', manager.clusters)
+            self.assertIs(manager.clusters['d'], api_d)
+            self.assertIsNot(manager.clusters['b'], api_b)
+            info = manager.get_cluster_info()
+            self.assertEqual(list(info), ['b', 'c', 'd'])
+            self.assertIn('localhost', info['b']['api_server'])
+            self.assertIn('127.0.0.1', info['d']['api_server'])
+        finally:
+            registry.close()
+            manager.close()
+
+if __name__ == '__main__':
+    unittest.main()
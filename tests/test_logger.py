@@ -0,0 +1,75 @@
+import json
+import logging
+import os
+import queue
+import tempfile
+import unittest
+from unittest import mock
+from logging.handlers import QueueHandler
+from src.pod_cleaner import logger as logger_module
+from src.pod_cleaner.logger import JsonLinesFormatter, setup_logger, stop_logging
+
+class TestLogger(unittest.TestCase):
+    def test_setup_is_idempotent(self):
+        first = setup_logger('pod_cleaner.test_logger')
+        second = setup_logger('pod_cleaner.test_logger')
+        self.assertIs(first, second)
+        self.assertEqual(len(first.handlers), 1)
+
+    def test_json_lines_formatter(self):
+        record = logging.makeLogRecord({
+            'name': 'pod_cleaner.deleter',
+            'levelno': logging.INFO,
+            'levelname': 'INFO',
+            'msg': '集群 %s 删除完成',
+            'args': ('c1',),
+            'cluster': 'c1',
+            'stats': {'total': 3, 'success': 3},
+        })
+        entry = json.loads(JsonLinesFormatter().format(record))
+        self.assertEqual(entry['message'], '集群 c1 删除完成')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['cluster'], 'c1')
+        self.assertEqual(entry['stats'], {'total': 3, 'success': 3})
+        self.assertNotIn('args', entry)
+
+    def test_prepare_keeps_raw_record(self):
+        handler = logger_module._RecordQueueHandler(queue.SimpleQueue())
+        record = logging.makeLogRecord({'msg': '集群 %s 删除 %d 个Pod', 'args': ('c1', 3)})
+        prepared = handler.prepare(record)
+        self.assertIsNot(prepared, record)
+        self.assertEqual((prepared.msg, prepared.args), ('集群 %s 删除 %d 个Pod', ('c1', 3)))
+
+        # 可变参数在调用方渲染，之后的修改不影响日志内容
+        pods = ['pod-a']
+        prepared = handler.prepare(logging.makeLogRecord({'msg': '待删除: %s', 'args': (pods,)}))
+        pods.append('pod-b')
+        self.assertEqual(prepared.getMessage(), "待删除: ['pod-a']")
+
+    def test_logs_after_stop_are_written(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        log_file = os.path.join(tmpdir.name, 'pod_cleaner.log')
+        # 使用独立的日志状态，不影响其他测试共享的后台线程
+        patches = {'LOG_FILE': log_file, 'LOG_JSON': False,
+                   '_queue_handler': None, '_listener': None, '_handlers': [], '_loggers': []}
+        for name, value in patches.items():
+            patcher = mock.patch.object(logger_module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        logger = logging.getLogger('pod_cleaner.test_logger.stop')
+        self.addCleanup(logger.handlers.clear)
+        self.addCleanup(lambda: [handler.close() for handler in logger_module._handlers])
+
+        setup_logger(logger.name).info('停止前')
+        stop_logging()
+        self.assertFalse(any(isinstance(handler, QueueHandler) for handler in logger.handlers))
+        logger.info('停止后')
+        setup_logger(logger.name)
+        self.assertEqual(len(logger.handlers), 2)
+        stop_logging()
+
+        with open(log_file, encoding='utf-8') as f:
+            content = f.read()
+        self.assertIn('停止前', content)
+        self.assertIn('停止后', content)
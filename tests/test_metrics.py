@@ -0,0 +1,31 @@
+import unittest
+from src.pod_cleaner.metrics import Histogram, MetricsRegistry
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_quantile(self):
+        histogram = Histogram()
+        for seconds in (0.001, 0.002, 0.02, 0.3):
+            histogram.observe(seconds)
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.quantile(0.5), 0.005)
+        # 分位数不超过观测到的最大值
+        self.assertEqual(histogram.quantile(0.99), 0.3)
+
+    def test_summary_and_prometheus(self):
+        metrics = MetricsRegistry()
+        metrics.inc('c1', 'pods_scanned', 500)
+        metrics.inc('c1', 'pods_scanned', 20)
+        metrics.observe('c1', 'list_page', 0.2)
+        with metrics.timer('c2', 'connect'):
+            pass
+
+        summary = metrics.summary()['clusters']
+        self.assertEqual(summary['c1']['counters'], {'pods_scanned': 520})
+        self.assertEqual(summary['c1']['timings']['list_page']['count'], 1)
+        self.assertIn('connect', summary['c2']['timings'])
+
+        text = metrics.render_prometheus()
+        self.assertIn('pod_cleaner_pods_scanned_total{cluster="c1"} 520', text)
+        self.assertIn('pod_cleaner_stage_duration_seconds_bucket{cluster="c1",stage="list_page",le="0.25"} 1', text)
+        self.assertIn('pod_cleaner_stage_duration_seconds_bucket{cluster="c1",stage="list_page",le="0.1"} 0', text)
+        self.assertIn('pod_cleaner_stage_duration_seconds_count{cluster="c2",stage="connect"} 1', text)
@@ -0,0 +1,53 @@
+import unittest
+from datetime import datetime, timezone
+from src.pod_cleaner.cluster_manager import ClusterManager
+from src.pod_cleaner.nodes import index_pods_by_dead_node, node_is_dead
+from tests.fake_apiserver import FakeApiServerMixin, FakeCluster
+
+def ready_node(status, since='2024-01-01T00:00:00Z'):
+    return {'metadata': {'name': 'n'},
+            'status': {'conditions': [{'type': 'Ready', 'status': status, 'lastTransitionTime': since}]}}
+
+class TestNodes(unittest.TestCase):
+    def test_node_is_dead(self):
+        now = datetime(2024, 1, 1, 0, 10, tzinfo=timezone.utc)
+        self.assertFalse(node_is_dead(ready_node('True'), now, 300))
+        self.assertTrue(node_is_dead(ready_node('Unknown'), now, 300))
+        self.assertTrue(node_is_dead(ready_node('False'), now, 300))
+        # NotReady的时间还不够长
+        self.assertFalse(node_is_dead(ready_node('Unknown', '2024-01-01T00:08:00Z'), now, 300))
+        self.assertFalse(node_is_dead({'metadata': {'name': 'n'}, 'status': {}}, now, 300))
+
+    def test_index(self):
+        pods = [{'name': 'a', 'node_name': 'dead'}, {'name': 'b', 'node_name': 'gone'},
+                {'name': 'c', 'node_name': 'ok'}, {'name': 'd', 'node_name': None}]
+        index = index_pods_by_dead_node(pods, {'dead', 'ok'}, {'dead'})
+        self.assertEqual({node: [pod['name'] for pod in pods] for node, pods in index.items()},
+                         {'dead': ['a'], 'gone': ['b']})
+
+class TestNodeAwareCleanup(FakeApiServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cluster = FakeCluster(pods=600, namespaces=3, nodes=6, not_ready_nodes=1, missing_nodes=1, bad_ratio=0.3)
+        self.serve_cluster(self.cluster, 'nodes')
+
+    def count_problem_pods(self, node=None):
+        node_selector = f',spec.nodeName={node}' if node else ''
+        return sum(self.cluster.count(f'status.phase={phase}{node_selector}') for phase in ('Error', 'Unknown'))
+
+    def test_force_delete_on_dead_nodes(self):
+        on_dead_nodes = self.count_problem_pods('node-000') + self.count_problem_pods('node-005')
+        total = self.count_problem_pods()
+        self.assertGreater(on_dead_nodes, 0)
+
+        manager = ClusterManager(kubeconfig_dir=self.kubeconfig_dir, page_size=100, cache_ttl=0, delete_qps=0,
+                                 batch_size=10, node_aware=True)
+        try:
+            stats = manager.delete_problem_pods()
+            counters = manager.metrics.summary()['clusters']['nodes']['counters']
+        finally:
+            manager.close()
+        self.assertEqual(stats['nodes']['success'], total)
+        self.assertEqual(counters['dead_node_pods'], on_dead_nodes)
+        self.assertEqual(self.cluster.force_deletes, on_dead_nodes)
+        self.assertEqual(self.count_problem_pods(), 0)
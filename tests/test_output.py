@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+import unittest
+from datetime import datetime, timezone
+from src.pod_cleaner.output import POD_FIELDS, SUMMARY_FIELDS, PodSummary, RecordWriter, pod_row
+
+class TestOutput(unittest.TestCase):
+    def setUp(self):
+        created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.pods = [
+            {'name': f'pod-{i}', 'namespace': 'ns-a' if i < 2 else 'ns-b', 'status': 'Failed',
+             'reason': 'OOMKilled' if i % 2 else 'Error', 'rule': 'failed', 'creation_timestamp': created,
+             'uid': f'uid-{i}', 'resource_version': '1'}
+            for i in range(3)
+        ]
+
+    def write(self, output, fields, rows):
+        stream = io.StringIO()
+        writer = RecordWriter(output, fields, stream)
+        for row in rows:
+            writer.write(row)
+        writer.close()
+        return stream.getvalue()
+
+    def test_formats(self):
+        rows = [pod_row('c1', pod) for pod in self.pods]
+        self.assertEqual(rows[0]['creation_timestamp'], '2024-01-01T00:00:00+00:00')
+        self.assertNotIn('resource_version', rows[0])
+
+        self.assertEqual(json.loads(self.write('json', POD_FIELDS, rows)), rows)
+        self.assertEqual(json.loads(self.write('json', POD_FIELDS, [])), [])
+        lines = self.write('ndjson', POD_FIELDS, rows).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], rows)
+        parsed = list(csv.DictReader(io.StringIO(self.write('csv', POD_FIELDS, rows))))
+        self.assertEqual([row['name'] for row in parsed], ['pod-0', 'pod-1', 'pod-2'])
+        self.assertEqual(parsed[0]['cluster'], 'c1')
+
+        with self.assertRaises(ValueError):
+            RecordWriter('table', POD_FIELDS, io.StringIO())
+
+    def test_summary(self):
+        summary = PodSummary()
+        for pod in self.pods + self.pods[:1]:
+            summary.add('c1', pod)
+        summary.finish_cluster('c1')
+        summary.finish_cluster('c2')
+        self.assertEqual(summary.total, 4)
+        self.assertEqual(summary.clusters, ['c1', 'c2'])
+        self.assertEqual(summary.rows(), [
+            {'cluster': 'c1', 'namespace': 'ns-a', 'reason': 'Error', 'count': 2},
+            {'cluster': 'c1', 'namespace': 'ns-a', 'reason': 'OOMKilled', 'count': 1},
+            {'cluster': 'c1', 'namespace': 'ns-b', 'reason': 'Error', 'count': 1},
+        ])
+        self.assertEqual(self.write('csv', SUMMARY_FIELDS, summary.rows()).splitlines()[0], 'cluster,namespace,reason,count')
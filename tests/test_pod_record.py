@@ -0,0 +1,51 @@
+import json
+import unittest
+from datetime import datetime, timezone
+from src.pod_cleaner.pod_record import decode_pod_list, parse_timestamp
+
+POD_LIST = {
+    "kind": "PodList",
+    "metadata": {"continue": "token-1"},
+    "items": [
+        {
+            "metadata": {"name": "web-1", "namespace": "default", "uid": "u1",
+                         "creationTimestamp": "2024-01-02T03:04:05Z"},
+            "status": {
+                "phase": "Failed",
+                "containerStatuses": [
+                    {"name": "app", "ready": False, "restartCount": 2,
+                     "state": {"terminated": {"reason": "OOMKilled", "exitCode": 137}}},
+                ],
+            },
+        },
+    ],
+}
+
+class TestPodRecord(unittest.TestCase):
+    def test_parse_timestamp(self):
+        """测试解析RFC3339时间"""
+        self.assertEqual(parse_timestamp("2024-01-02T03:04:05Z"), datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+        self.assertIsNone(parse_timestamp(None))
+        
+    def test_decode_pod_list(self):
+        """测试解析原始PodList并返回continue token"""
+        records, _continue, _ = decode_pod_list(json.dumps(POD_LIST).encode())
+        self.assertEqual(_continue, "token-1")
+        self.assertEqual(len(records), 1)
+        
+        pod = records[0]
+        self.assertEqual(pod.phase, "Failed")
+        self.assertEqual(pod.container_statuses[0].reason, "OOMKilled")
+        self.assertEqual(pod.container_statuses[0].exit_code, 137)
+        
+    def test_to_dict_compatible_view(self):
+        """测试字典视图保留旧接口的字段"""
+        records = decode_pod_list(json.dumps(POD_LIST).encode()).records
+        pod_info = records[0].to_dict()
+        self.assertEqual(pod_info['name'], "web-1")
+        self.assertEqual(pod_info['namespace'], "default")
+        self.assertEqual(pod_info['status'], "Failed")
+        self.assertEqual(pod_info['creation_timestamp'].year, 2024)
+        
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+from unittest import mock
+from src.pod_cleaner.rate_limit import AdaptiveConcurrencyLimiter
+
+class TestAdaptiveConcurrencyLimiter(unittest.TestCase):
+    @mock.patch('src.pod_cleaner.rate_limit.time.monotonic')
+    def test_aimd(self, monotonic):
+        limiter = AdaptiveConcurrencyLimiter(max_limit=8, latency_target=1.0)
+        self.assertEqual(limiter.limit, 4)
+
+        # 快速完成的请求逐步增加上限，不超过最大值
+        monotonic.return_value = 0.0
+        for _ in range(100):
+            limiter.release(limiter.acquire())
+        self.assertEqual(limiter.limit, 8)
+
+        # 同一时间段内的多个慢请求只减半一次
+        starts = [limiter.acquire() for _ in range(3)]
+        monotonic.return_value = 5.0
+        for start in starts:
+            limiter.release(start)
+        self.assertEqual(limiter.limit, 4)
+
+        # 过载错误同样减半，且不低于最小值
+        for _ in range(5):
+            limiter.release(limiter.acquire(), error=True)
+        self.assertEqual(limiter.limit, 1)
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from src.pod_cleaner.pod_record import ContainerStatusRecord, PodRecord
+from src.pod_cleaner.rules import (
+    PodQuery, Rule, RuleSet, match_rules, next_match_time, parse_duration, phase_field_selectors,
+)
+
+NOW = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+def make_pod(namespace="kube-system", phase="Failed", reason=None, exit_code=None, age_hours=1, owner_kind="ReplicaSet"):
+    statuses = (ContainerStatusRecord("c", reason=reason, exit_code=exit_code),)
+    return PodRecord(
+        "pod", namespace, "uid-1", "1", phase, NOW - timedelta(hours=age_hours), statuses,
+        owner_kind=owner_kind,
+    )
+
+class TestRule(unittest.TestCase):
+    def test_phase_field_selectors(self):
+        """测试每个状态生成一个field selector"""
+        self.assertEqual(
+            phase_field_selectors(["Error", "Unknown"]),
+            ["status.phase=Error", "status.phase=Unknown"],
+        )
+        
+    def test_parse_duration(self):
+        """测试时长解析"""
+        self.assertEqual(parse_duration(90), 90.0)
+        self.assertEqual(parse_duration("30m"), 1800.0)
+        self.assertEqual(parse_duration("2d"), 172800.0)
+        
+    def test_predicates(self):
+        """测试规则中的条件需要同时满足"""
+        rule = Rule.from_dict({
+            "name": "oom",
+            "container_reasons": ["OOMKilled"],
+            "namespace_prefixes": ["kube", "istio"],
+            "min_age": "2h",
+            "owner_kinds": ["ReplicaSet"],
+        })
+        self.assertTrue(rule.matches(make_pod(reason="OOMKilled", age_hours=3), NOW))
+        self.assertFalse(rule.matches(make_pod(reason="OOMKilled", age_hours=1), NOW))
+        self.assertFalse(rule.matches(make_pod(reason="Error", age_hours=3), NOW))
+        self.assertFalse(rule.matches(make_pod(namespace="default", reason="OOMKilled", age_hours=3), NOW))
+        self.assertFalse(rule.matches(make_pod(reason="OOMKilled", age_hours=3, owner_kind="Job"), NOW))
+        
+        rule = Rule.from_dict({"name": "exit", "exit_codes": [137], "namespace_regex": "^(kube|test)-"})
+        self.assertTrue(rule.matches(make_pod(namespace="test-a", exit_code=137), NOW))
+        self.assertFalse(rule.matches(make_pod(namespace="kube", exit_code=137), NOW))
+        
+    def test_matures_at(self):
+        """测试只因存在时长不足而不满足规则的Pod返回满足规则的时间"""
+        rule = Rule.from_dict({"name": "old", "container_reasons": ["OOMKilled"], "min_age": "2h"})
+        pod = make_pod(reason="OOMKilled", age_hours=0.5)
+        self.assertEqual(rule.matures_at(pod, NOW), pod.creation_timestamp + timedelta(hours=2))
+        self.assertIsNone(rule.matures_at(make_pod(reason="Error", age_hours=0.5), NOW))
+        self.assertIsNone(rule.matures_at(make_pod(reason="OOMKilled", age_hours=3), NOW))
+        self.assertIsNone(Rule.from_dict({"name": "x", "phases": ["Failed"]}).matures_at(pod, NOW))
+
+        later = Rule.from_dict({"name": "later", "phases": ["Failed"], "min_age": "1d"})
+        self.assertEqual(next_match_time([later, rule], pod, NOW), pod.creation_timestamp + timedelta(hours=2))
+        self.assertIsNone(next_match_time([later], make_pod(phase="Running"), NOW))
+
+    def test_invalid_rule(self):
+        """测试规则格式错误时抛出ValueError"""
+        for data in ({"phases": ["Failed"]}, {"name": "x"}, {"name": "x", "phase": "Failed"}, {"name": "x", "min_age": "1w"}):
+            with self.assertRaises(ValueError):
+                Rule.from_dict(data)
+                
+class TestRuleSet(unittest.TestCase):
+    def test_default_plan(self):
+        """测试默认规则按状态推送到field selector，可以批量删除"""
+        rules = RuleSet.default()
+        self.assertEqual(
+            [query for query, _ in rules.plan()],
+            [PodQuery("status.phase=Error"), PodQuery("status.phase=Unknown")],
+        )
+        self.assertTrue(rules.collection_safe)
+        self.assertEqual(str(PodQuery()), "*")
+        
+    def test_plan_pushdown(self):
+        """测试规则合并为查询：无法推送的规则合并为一次完整列表，标签规则使用自己的查询"""
+        rules = RuleSet([
+            Rule.from_dict({"name": "failed", "phases": ["Failed"], "namespaces": ["kube-system"]}),
+            Rule.from_dict({"name": "labeled", "phases": ["Failed"], "labels": {"app": "batch"}}),
+        ])
+        self.assertEqual(
+            [query for query, _ in rules.plan()],
+            [PodQuery("status.phase=Failed,metadata.namespace=kube-system"), PodQuery("status.phase=Failed", "app=batch")],
+        )
+        
+        rules.rules.append(Rule.from_dict({"name": "oom", "container_reasons": ["OOMKilled"]}))
+        plan = rules.plan()
+        self.assertEqual([query for query, _ in plan], [PodQuery(), PodQuery("status.phase=Failed", "app=batch")])
+        self.assertEqual([rule.name for rule in plan[0][1]], ["failed", "oom"])
+        self.assertFalse(rules.collection_safe)
+        
+    def test_load_example(self):
+        """测试加载仓库中与CronJob等价的规则文件"""
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pod-cleanup-rules.yaml")
+        rules = RuleSet.load(path)
+        self.assertEqual(match_rules(rules.rules, make_pod(reason="OOMKilled", phase="Running"), NOW).name, "oom-killed")
+        self.assertEqual(match_rules(rules.rules, make_pod(namespace="ingress-nginx", phase="Unknown"), NOW).name, "unknown")
+        self.assertIsNone(match_rules(rules.rules, make_pod(namespace="default"), NOW))
+        
+        with tempfile.NamedTemporaryFile("w", suffix=".yaml") as f:
+            f.write("rules: {}\n")
+            f.flush()
+            with self.assertRaises(ValueError):
+                RuleSet.load(f.name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import time
+import unittest
+from src.pod_cleaner.cluster_manager import ClusterManager
+from src.pod_cleaner.scheduler import (
+    ClusterHistory, RunSchedule, STATUS_DEADLINE, STATUS_FAILED, STATUS_NOT_STARTED, STATUS_OK,
+)
+from tests.fake_apiserver import FakeApiServerMixin, FakeCluster
+
+class TestRunSchedule(unittest.TestCase):
+    def test_order_and_workers(self):
+        history = ClusterHistory(None)
+        history.record('small', 'list', 1.0)
+        history.record('large', 'list', 10.0)
+        schedule = RunSchedule(['small', 'large', 'new'], history, 'list')
+        # 没有历史的集群按已知的最长耗时估计
+        self.assertEqual(schedule.order, ['large', 'new', 'small'])
+        self.assertEqual(schedule.workers('small', 10), 1)
+        self.assertEqual(schedule.workers('large', 10), 14)
+        self.assertEqual(schedule.workers('large', 2), 3)
+
+        # 没有任何历史时保持原来的顺序和并发
+        schedule = RunSchedule(['b', 'a'], ClusterHistory(None), 'clean')
+        self.assertEqual(schedule.order, ['b', 'a'])
+        self.assertEqual(schedule.workers('a', 10), 10)
+
+    def test_status(self):
+        schedule = RunSchedule(['a', 'b', 'c', 'd'], ClusterHistory(None), 'list', deadline_at=time.time() + 60)
+        schedule.start('a')
+        schedule.start('b')
+        schedule.start('c')
+        self.assertEqual(schedule.finish('a', True, pods=100, problem_pods=3), STATUS_OK)
+        self.assertEqual(schedule.finish('b', False), STATUS_FAILED)
+        status = schedule.close()
+        self.assertEqual(status, {'a': STATUS_OK, 'b': STATUS_FAILED, 'c': STATUS_DEADLINE, 'd': STATUS_NOT_STARTED})
+        # close()之后结束的集群不再改变状态
+        self.assertEqual(schedule.finish('c', True), STATUS_DEADLINE)
+        self.assertEqual(schedule.history.get('a', 'clean')['problem_pods'], 3)
+        self.assertIsNone(schedule.history.get('d', 'list'))
+
+    def test_history_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'history.json')
+            history = ClusterHistory(path, alpha=0.5)
+            history.record('a', 'list', 10.0, pods=1000)
+            history.record('a', 'list', 20.0, pods=3000)
+            # 未完成的运行只提高耗时的下限
+            history.record('a', 'list', 12.0, pods=10, complete=False)
+            history.save()
+            entry = ClusterHistory(path).get('a', 'list')
+            self.assertEqual((entry['duration'], entry['pods'], entry['runs']), (15.0, 2000, 3))
+
+    def test_concurrent_save(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'history.json')
+            first = ClusterHistory(path)
+            second = ClusterHistory(path)
+            first.record('a', 'list', 10.0)
+            second.record('b', 'list', 20.0)
+            first.save()
+            # 写回时合并其他进程已写入的集群
+            second.save()
+            history = ClusterHistory(path)
+            self.assertEqual((history.get('a', 'list')['duration'], history.get('b', 'list')['duration']), (10.0, 20.0))
+
+    def test_close_without_deadline(self):
+        schedule = RunSchedule(['a', 'b'], ClusterHistory(None), 'list')
+        schedule.start('a')
+        with self.assertLogs('src.pod_cleaner.scheduler', 'WARNING') as logs:
+            schedule.close()
+        self.assertIn('运行提前结束', logs.output[0])
+        self.assertNotIn('截止时间', logs.output[0])
+        # 没有到达截止时间时未完成的集群不记入历史
+        self.assertIsNone(schedule.history.get('a', 'list'))
+
+class TestDeadline(FakeApiServerMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.serve_cluster(FakeCluster(pods=200, bad_ratio=0.2), 'fast')
+        self.serve_cluster(FakeCluster(pods=200, bad_ratio=0.2), 'slow', latency=3)
+
+    def test_partial_results(self):
+        history_file = os.path.join(self.kubeconfig_dir, 'history.json')
+        manager = ClusterManager(kubeconfig_dir=self.kubeconfig_dir, page_size=50, cache_ttl=0,
+                                 history_file=history_file, deadline=1.5)
+        try:
+            start = time.monotonic()
+            pods = manager.list_problem_pods()
+            elapsed = time.monotonic() - start
+        finally:
+            manager.close()
+        self.assertLess(elapsed, 3)
+        self.assertEqual(list(pods), ['fast'])
+        self.assertEqual(manager.schedule.status, {'fast': STATUS_OK, 'slow': STATUS_DEADLINE})
+        self.assertEqual(manager.schedule.incomplete(), {'slow': STATUS_DEADLINE})
+
+        # 超时的集群下次最先开始
+        manager = ClusterManager(kubeconfig_dir=self.kubeconfig_dir, cache_ttl=0, history_file=history_file)
+        self.assertEqual(manager._new_schedule(list(manager.clusters), 'list').order, ['slow', 'fast'])
+        entry = manager.history.get('fast', 'list')
+        self.assertEqual(entry['problem_pods'], len(pods['fast']))
+        self.assertGreaterEqual(entry['pods'], entry['problem_pods'])
+
+class TestFailedCluster(FakeApiServerMixin, unittest.TestCase):
+    def test_failed_cluster_is_not_incomplete(self):
+        self.serve_cluster(FakeCluster(pods=100, bad_ratio=0.2), 'good')
+        # 端口1上没有服务，连接失败
+        self.write_kubeconfig('bad', 1)
+        manager = ClusterManager(kubeconfig_dir=self.kubeconfig_dir, cache_ttl=0, connect_timeout=1)
+        try:
+            pods = manager.list_problem_pods()
+        finally:
+            manager.close()
+        self.assertEqual(list(pods), ['good'])
+        self.assertEqual(manager.schedule.status, {'good': STATUS_OK, 'bad': STATUS_FAILED})
+        # 没有设置截止时间时，失败的集群不算作未完成
+        self.assertEqual(manager.schedule.incomplete(), {})
+
+if __name__ == '__main__':
+    unittest.main()
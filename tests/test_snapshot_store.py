@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from src.pod_cleaner.snapshot_store import SnapshotStore, parse_since
+
+def pod(namespace, reason, node='node-0', rule='failed'):
+    return {'namespace': namespace, 'reason': reason, 'node_name': node, 'rule': rule}
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'snapshots')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, taken_at, pods_by_cluster):
+        writer = SnapshotStore(self.path).writer()
+        writer.taken_at = taken_at
+        for cluster_name, pods in pods_by_cluster.items():
+            writer.add(cluster_name, pods)
+        return writer.commit()
+
+    def test_query(self):
+        self.assertEqual(SnapshotStore(self.path).query(['namespace']), [])
+        self.write(1000, {'c1': [pod('a', 'OOMKilled'), pod('a', 'OOMKilled'), pod('b', 'Error')]})
+        self.write(2000, {'c1': [pod('a', 'OOMKilled')], 'c2': [pod('b', 'OOMKilled', node=None)]})
+        self.write(3000, {})
+
+        store = SnapshotStore(self.path)
+        self.assertEqual(len(store.snapshots()), 3)
+        rows = store.query(['namespace', 'reason'])
+        self.assertEqual([(row['namespace'], row['reason'], row['count'], row['snapshots']) for row in rows], [
+            ('a', 'OOMKilled', 3, 2), ('b', 'Error', 1, 1), ('b', 'OOMKilled', 1, 1),
+        ])
+        self.assertEqual(rows[0]['last_seen'], '1970-01-01T00:33:20+00:00')
+
+        rows = store.query(['namespace'], filters={'reason': 'OOMKilled'}, top=1)
+        self.assertEqual([(row['namespace'], row['count']) for row in rows], [('a', 3)])
+        rows = store.query(['cluster'], since=1500)
+        self.assertEqual({row['cluster']: row['count'] for row in rows}, {'c1': 1, 'c2': 1})
+        self.assertEqual(store.query(['node'], filters={'cluster': 'c2'})[0]['node'], '')
+        self.assertEqual(store.query(['namespace'], filters={'reason': 'Evicted'}), [])
+        with self.assertRaises(ValueError):
+            store.query(['name'])
+
+    def test_interrupted_append(self):
+        self.write(1000, {'c1': [pod('a', 'Error')]})
+        # 模拟写入列文件后、替换meta.json之前被中断
+        with open(os.path.join(self.path, 'namespace.u32'), 'ab') as f:
+            f.write(b'\xff' * 6)
+        self.assertEqual(SnapshotStore(self.path).query(['namespace'])[0]['count'], 1)
+        self.write(2000, {'c1': [pod('b', 'Error')]})
+        rows = SnapshotStore(self.path).query(['namespace'])
+        self.assertEqual(sorted((row['namespace'], row['count']) for row in rows), [('a', 1), ('b', 1)])
+        self.assertEqual(os.path.getsize(os.path.join(self.path, 'namespace.u32')), 8)
+
+    def test_parse_since(self):
+        self.assertEqual(parse_since('2h', now=10000), 10000 - 7200)
+        self.assertEqual(parse_since('1.5d', now=200000), 200000 - 129600)
+        self.assertEqual(parse_since('1970-01-02T00:00:00Z'), 86400)
+        with self.assertRaises(ValueError):
+            parse_since('yesterday')